@@ -30,6 +30,7 @@ class CohereAgent(AIAgentInterface):
         cohere_model = os.getenv("COHERE_MODEL")
         if not cohere_model:
             raise ValueError("COHERE_MODEL environment variable is not set.")
+        self.model_name = cohere_model
 
         model = ChatCohere(model=cohere_model)
         system_message_prompt = SystemMessagePromptTemplate.from_template(
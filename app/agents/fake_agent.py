@@ -6,6 +6,8 @@ from app.ports.agent import AIAgentInterface
 
 
 class FakeAgent(AIAgentInterface):
+    model_name: str = "fake"
+
     async def query_with_context(self, question: str, context: str) -> str:
         context_part = (
             f"With the following context: \n{context}\n"
@@ -0,0 +1,32 @@
+"""How the configured agent is presented to the users."""
+
+import hashlib
+import json
+from typing import TypedDict
+
+from app.agents.fake_agent import FakeAgent
+from app.ports.agent import AIAgentInterface
+from app.ports.database import DatabaseManagerInterface
+
+
+class AgentInfo(TypedDict):
+    is_fake: bool
+    icon: str
+    label: str
+    embedding_model: str
+
+
+def describe_agent(agent: AIAgentInterface, db: DatabaseManagerInterface) -> AgentInfo:
+    is_fake = isinstance(agent, FakeAgent)
+    return {
+        "is_fake": is_fake,
+        "icon": "pets" if is_fake else "smart_toy",
+        "label": "RAG Parrot" if is_fake else "RAG Chatbot",
+        "embedding_model": db.embedding_model or "No Embedding Model",
+    }
+
+
+def agent_info_etag(info: AgentInfo) -> str:
+    """Strong ETag of a descriptor, the same in every process."""
+    digest = hashlib.sha256(json.dumps(info, sort_keys=True).encode()).hexdigest()
+    return f'"{digest[:16]}"'
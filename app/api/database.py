@@ -1,24 +1,47 @@
-from collections.abc import AsyncIterator
+import asyncio
+import codecs
+from collections.abc import AsyncIterator, Iterator
+from os import getenv
 from typing import Annotated, TypedDict
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
-from fastapi.responses import StreamingResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from app.agents import FakeAgent
+from app.agents.info import AgentInfo, agent_info_etag
 from app.api.dependencies import (
-    get_agent_from_state_annotation,
+    get_agent_info_from_state_annotation,
     get_cookie_session,
     get_db_from_state_annotation,
 )
-from app.usecases import add_content_into_db
+from app.ports.database import DEFAULT_PAGE_SIZE, VectorStatistics
+from app.usecases import add_stream_into_db
 
 router = APIRouter()
 
 
-MAX_FILE_SIZE = 1024 * 1024  # 1 MB
+# Uploads are ingested block by block, so the limit does not bound memory
+MAX_FILE_SIZE = int(getenv("MAX_FILE_SIZE_MB", "256")) * 1024 * 1024
+UPLOAD_BLOCK_SIZE = 64 * 1024
+MAX_PAGE_SIZE = 1000
+# The agent only changes when the application restarts
+AGENT_INFO_CACHE_CONTROL = "public, max-age=300"
+
+
+async def read_blocks(file: UploadFile) -> AsyncIterator[bytes]:
+    while block := await file.read(UPLOAD_BLOCK_SIZE):
+        yield block
 
 
-async def get_valid_file_content(file: UploadFile) -> str:
+async def get_valid_file(file: UploadFile) -> UploadFile:
     if file.content_type != "text/plain":
         raise HTTPException(
             status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
@@ -27,15 +50,21 @@ async def get_valid_file_content(file: UploadFile) -> str:
     if file.size and file.size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // 1024} KB",
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // 1024**2} MB",
         )
+    # Check the encoding before anything is stored, without loading the file
+    decoder = codecs.getincrementaldecoder("utf-8")()
     try:
-        return file.file.read().decode()
+        async for block in read_blocks(file):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
     except UnicodeError as err:
         raise HTTPException(
             status_code=status.HTTP_406_NOT_ACCEPTABLE,
             detail=f"The file cannot be uploaded: {str(err)}",
         )
+    await file.seek(0)
+    return file
 
 
 class EventStreamResponse(StreamingResponse):
@@ -53,26 +82,57 @@ class EventStreamResponse(StreamingResponse):
 )
 async def add_document_endpoint(
     db: get_db_from_state_annotation,
-    file_content: Annotated[str, Depends(get_valid_file_content)],
+    file: Annotated[UploadFile, Depends(get_valid_file)],
     cookie_session: Annotated[str, Depends(get_cookie_session)],
 ) -> AsyncIterator[str]:
-    async for percentage in add_content_into_db(db, file_content, cookie_session):
+    async for percentage in add_stream_into_db(
+        db, read_blocks(file), file.size, cookie_session
+    ):
         yield percentage
 
 
-class VectorsDataResponse(TypedDict):
-    number_of_vectors: int
-    longest_vector: int
-
-
 @router.get("/get-vectors-data")
 async def get_vectors_data(
     db: get_db_from_state_annotation,
     cookie_session: Annotated[str, Depends(get_cookie_session)],
-) -> VectorsDataResponse:
-    number_of_vectors = db.get_number_of_vectors(cookie_session)
-    longest_vector = db.get_length_of_longest_vector(cookie_session)
-    return {"number_of_vectors": number_of_vectors, "longest_vector": longest_vector}
+) -> VectorStatistics:
+    # Checking the revision of the session is a round trip to the session store
+    return await asyncio.to_thread(db.get_statistics, cookie_session)
+
+
+class ChunksPageResponse(TypedDict):
+    chunks: list[str]
+    next_cursor: int | None
+
+
+@router.get("/chunks")
+async def get_chunks_page(
+    db: get_db_from_state_annotation,
+    cookie_session: Annotated[str, Depends(get_cookie_session)],
+    cursor: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+) -> ChunksPageResponse:
+    """Return a page of chunks and the cursor of the next one, if any."""
+    # One extra chunk tells whether another page follows
+    chunks = db.get_chunks_page(cursor, limit + 1, cookie_session)
+    return {
+        "chunks": chunks[:limit],
+        "next_cursor": cursor + limit if len(chunks) > limit else None,
+    }
+
+
+class ChunkItem(TypedDict):
+    chunk: str
+
+
+@router.get("/chunks/stream")
+def stream_chunks(
+    db: get_db_from_state_annotation,
+    cookie_session: Annotated[str, Depends(get_cookie_session)],
+) -> Iterator[ChunkItem]:
+    """Stream every chunk as newline delimited JSON, one page in memory at a time."""
+    for chunk in db.iter_chunks(cookie_session):
+        yield {"chunk": chunk}
 
 
 class EmptyDatabaseResponse(TypedDict):
@@ -84,24 +144,27 @@ async def empty_database(
     db: get_db_from_state_annotation,
     cookie_session: Annotated[str, Depends(get_cookie_session)],
 ) -> EmptyDatabaseResponse:
-    db.empty_database(cookie_session)
+    await asyncio.to_thread(db.empty_database, cookie_session)
     return {"message": "Database emptied successfully"}
 
 
-class AgentInfoResponse(TypedDict):
-    is_fake: bool
-    icon: str
-    label: str
-    embedding_model: str
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
 
 
-@router.get("/agent-info")
-async def get_agent_info(agent: get_agent_from_state_annotation) -> AgentInfoResponse:
+@router.get(
+    "/agent-info",
+    response_model=AgentInfo,
+    responses={304: {"description": "The agent did not change"}},
+)
+async def get_agent_info(
+    agent_info: get_agent_info_from_state_annotation,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
     """Return information about the current AI agent configuration."""
-    is_fake = isinstance(agent, FakeAgent)
-    return {
-        "is_fake": is_fake,
-        "icon": "pets" if is_fake else "smart_toy",
-        "label": "RAG Parrot" if is_fake else "RAG Chatbot",
-        "embedding_model": "No Embedding Model" if is_fake else "Cohere",
-    }
+    etag = agent_info_etag(agent_info)
+    headers = {"ETag": etag, "Cache-Control": AGENT_INFO_CACHE_CONTROL}
+    if if_none_match is not None and etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(agent_info, headers=headers)
@@ -2,7 +2,11 @@ from typing import Annotated
 
 from fastapi import Depends, Request
 
+from app.agents.info import AgentInfo
+from app.middleware import SESSION_SCOPE_KEY
 from app.ports import AIAgentInterface, DatabaseManagerInterface
+from app.usecases.answer_cache import AnswerCache
+from app.usecases.prefetch import ContextPrefetcher
 
 
 async def get_db_from_state(request: Request) -> DatabaseManagerInterface:
@@ -23,5 +27,35 @@ get_agent_from_state_annotation = Annotated[
 ]
 
 
+async def get_agent_info_from_state(request: Request) -> AgentInfo:
+    return request.state.agent_info  # pragma: no cover
+
+
+get_agent_info_from_state_annotation = Annotated[
+    AgentInfo, Depends(get_agent_info_from_state, use_cache=True)
+]
+
+
+async def get_answer_cache_from_state(request: Request) -> AnswerCache:
+    return request.state.answer_cache  # pragma: no cover
+
+
+get_answer_cache_from_state_annotation = Annotated[
+    AnswerCache, Depends(get_answer_cache_from_state, use_cache=True)
+]
+
+
+async def get_prefetcher_from_state(request: Request) -> ContextPrefetcher:
+    return request.state.prefetcher  # pragma: no cover
+
+
+get_prefetcher_from_state_annotation = Annotated[
+    ContextPrefetcher, Depends(get_prefetcher_from_state, use_cache=True)
+]
+
+
 async def get_cookie_session(request: Request) -> str:
+    # Parsed once by the session middleware, without parsing the other cookies
+    if session := request.scope.get(SESSION_SCOPE_KEY):
+        return session
     return request.cookies.get("SESSION", "default")
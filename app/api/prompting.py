@@ -1,37 +1,78 @@
+import asyncio
 from collections.abc import AsyncIterator
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends
-from fastapi.sse import EventSourceResponse
+from fastapi import APIRouter, Body, Depends, Response, status
+from fastapi.sse import EventSourceResponse, ServerSentEvent
 
 from app.api.dependencies import (
     get_agent_from_state_annotation,
+    get_answer_cache_from_state_annotation,
     get_cookie_session,
     get_db_from_state_annotation,
+    get_prefetcher_from_state_annotation,
 )
-from app.usecases import query_agent, query_agent_with_stream_response
+from app.usecases import Timing, query_agent, stream_answer
+
+# Event of the stream telling when a stage of the answer was reached
+TIMING_EVENT = "timing"
 
 router = APIRouter()
 
 
+async def start_retrieval(
+    db: get_db_from_state_annotation,
+    prefetcher: get_prefetcher_from_state_annotation,
+    question: Annotated[str, Body()],
+    cookie_session: Annotated[str, Depends(get_cookie_session)],
+) -> asyncio.Task[str]:
+    """Take the prefetched retrieval of the context, or start it right away."""
+    return prefetcher.retrieve(db, question, cookie_session)
+
+
 @router.post("/query")
 async def query_agent_endpoint(
     db: get_db_from_state_annotation,
     agent: get_agent_from_state_annotation,
+    answer_cache: get_answer_cache_from_state_annotation,
     question: Annotated[str, Body()],
     cookie_session: Annotated[str, Depends(get_cookie_session)],
 ) -> str:
-    return await query_agent(db, agent, question, cookie_session)
+    return await query_agent(db, agent, question, cookie_session, answer_cache)
+
+
+@router.post("/prefetch-context", status_code=status.HTTP_202_ACCEPTED)
+async def prefetch_context(
+    db: get_db_from_state_annotation,
+    prefetcher: get_prefetcher_from_state_annotation,
+    question: Annotated[str, Body()],
+    cookie_session: Annotated[str, Depends(get_cookie_session)],
+) -> Response:
+    """Start retrieving the context of a question about to be asked.
+
+    The request is accepted even when the retrieval is not started, as
+    prefetching is disabled or throttled for the session.
+    """
+    prefetcher.prefetch(db, question, cookie_session)
+    return Response(status_code=status.HTTP_202_ACCEPTED)
 
 
 @router.post("/query-stream", response_class=EventSourceResponse)
 async def query_with_stream_response(
-    db: get_db_from_state_annotation,
     agent: get_agent_from_state_annotation,
+    answer_cache: get_answer_cache_from_state_annotation,
     question: Annotated[str, Body()],
-    cookie_session: Annotated[str, Depends(get_cookie_session)],
-) -> AsyncIterator[str]:
-    async for token in query_agent_with_stream_response(
-        db, agent, question, cookie_session
-    ):
-        yield token
+    context: Annotated[asyncio.Task[str], Depends(start_retrieval)],
+) -> AsyncIterator[str | ServerSentEvent]:
+    """Stream the tokens of the answer, and the ``timing`` of its stages in ms."""
+    async for token in stream_answer(agent, question, context, answer_cache):
+        if isinstance(token, Timing):
+            yield ServerSentEvent(
+                event=TIMING_EVENT,
+                data={
+                    "stage": token.stage,
+                    "elapsed_ms": round(token.elapsed * 1000, 3),
+                },
+            )
+        else:
+            yield token
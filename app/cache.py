@@ -0,0 +1,85 @@
+"""In-memory caches shared by the adapters and the use cases."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+
+class LRUCache[K, V]:
+    """Thread-safe mapping evicting the least recently used entries.
+
+    When ``ttl`` is set, entries older than ``ttl`` seconds are dropped on
+    access.
+
+    When ``weigh`` is set, ``max_size`` bounds the total weight of the
+    entries rather than their number, and an entry heavier than the bound is
+    not kept. An entry is weighed when set, so an entry growing in place is
+    set again to be weighed anew.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        weigh: Callable[[V], int] | None = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._weigh = weigh
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._weights: dict[K, int] = {}
+        self._total_weight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_weight(self) -> int:
+        """Total weight of the entries, their number without ``weigh``."""
+        return self._total_weight
+
+    def _remove(self, key: K) -> tuple[float, V] | None:
+        entry = self._entries.pop(key, None)
+        self._total_weight -= self._weights.pop(key, 0)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            stored_at, value = self._entries[key]
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        weight = self._weigh(value) if self._weigh is not None else 1
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (self._clock(), value)
+            self._weights[key] = weight
+            self._total_weight += weight
+            while self._total_weight > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            _, value = self._remove(key) or (0.0, None)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self._total_weight = 0
@@ -1,25 +1,105 @@
 import asyncio
-from collections.abc import AsyncGenerator
+import hashlib
+import shutil
+import uuid
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+)
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import partial
 from os import PathLike, getenv
+from pathlib import Path
 
-from chromadb import HttpClient
+from chromadb import Client, HttpClient, PersistentClient
 from chromadb.api import ClientAPI
+from chromadb.errors import NotFoundError
 from cohere.errors import TooManyRequestsError as CohereTooManyRequestsError
 from dotenv import load_dotenv
 from langchain_chroma.vectorstores import Chroma
 from langchain_cohere import CohereEmbeddings
-from langchain_community.document_loaders import DirectoryLoader
 from langchain_core.documents.base import Document
+from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import CharacterTextSplitter
 
-from app.ports.database import DatabaseManagerInterface
+from app.cache import LRUCache
+from app.databases.embedding_cache import (
+    DEFAULT_MAX_ENTRIES,
+    CachedEmbeddings,
+    EmbeddingStore,
+)
+from app.databases.ingestion import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_BATCH_TOKENS,
+    IngestionJob,
+    abatch_documents,
+    batch_documents,
+    chunk_id,
+)
+from app.databases.lexical_index import BM25Index, reciprocal_rank_fusion
+from app.databases.loader import FolderLoader, FolderManifest
+from app.databases.local_embeddings import LocalEmbeddings
+from app.databases.retrieval_cache import RetrievalCache
+from app.databases.scheduler import IngestionScheduler
+from app.databases.splitter import StreamingTextSplitter
+from app.databases.stats import SessionStatistics
+from app.ports.database import DatabaseManagerInterface, VectorStatistics
 from app.ports.errors import EmbeddingAPILimitError, TooManyRequestsError
+from app.ports.sessions import SessionStoreInterface
 
 load_dotenv()
 
 
 CHROMA_SERVER_HOST = getenv("CHROMA_SERVER_HOST")
 CHROMA_SERVER_PORT = getenv("CHROMA_SERVER_PORT")
+# Embedded, on-disk database used when no server is configured
+CHROMA_PERSIST_DIRECTORY = getenv("CHROMA_PERSIST_DIRECTORY")
+# One collection per session instead of one collection filtered by session
+CHROMA_COLLECTION_PER_SESSION = (
+    getenv("CHROMA_COLLECTION_PER_SESSION", "false").lower() == "true"
+)
+CHROMA_MAX_OPEN_COLLECTIONS = int(getenv("CHROMA_MAX_OPEN_COLLECTIONS", "256"))
+
+EMBEDDING_BATCH_SIZE = int(getenv("EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+EMBEDDING_BATCH_TOKENS = int(getenv("EMBEDDING_BATCH_TOKENS", DEFAULT_BATCH_TOKENS))
+
+EMBEDDING_PROVIDER = getenv("EMBEDDING_PROVIDER", "cohere")
+EMBEDDING_MODEL = "embed-v4.0"
+EMBEDDING_CACHE_PATH = getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(
+    getenv("EMBEDDING_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+)
+
+# Number of vectors read at a time when listing the sessions
+SESSIONS_PAGE_SIZE = 10_000
+
+# Chunks of the context, picked by fusing the best vector and lexical matches
+RETRIEVAL_TOP_K = int(getenv("RETRIEVAL_TOP_K", "3"))
+RETRIEVAL_CANDIDATES = int(getenv("RETRIEVAL_CANDIDATES", "8"))
+# Chunks indexed in memory across the sessions, about 3 kB each; a session
+# with more chunks is searched by vectors only
+LEXICAL_INDEX_MAX_CHUNKS = int(getenv("LEXICAL_INDEX_MAX_CHUNKS", "100000"))
+# Chunks whose length is kept in memory across the sessions, about 150 B each
+STATISTICS_MAX_CHUNKS = int(getenv("STATISTICS_MAX_CHUNKS", "2000000"))
+
+DOCUMENTS_MANIFEST_DIRECTORY = getenv(
+    "DOCUMENTS_MANIFEST_DIRECTORY", ".cache/manifests"
+)
+
+# Shared by every session of the process so they compete for the same quota
+embedding_scheduler = IngestionScheduler(
+    max_in_flight=int(getenv("EMBEDDING_MAX_IN_FLIGHT", "8")),
+    # Local embeddings are computed on the CPU, there is no quota to pace
+    requests_per_minute=None
+    if EMBEDDING_PROVIDER == "local"
+    else float(getenv("EMBEDDING_REQUESTS_PER_MINUTE", "100")),
+    max_retries=int(getenv("EMBEDDING_MAX_RETRIES", "5")),
+    retry_on=(CohereTooManyRequestsError,),
+)
 
 client: ClientAPI | None = None
 
@@ -34,81 +114,526 @@ if CHROMA_SERVER_HOST is not None and CHROMA_SERVER_PORT is not None:
         )
 elif CHROMA_SERVER_HOST is not None:
     client = HttpClient(host=CHROMA_SERVER_HOST)
+elif CHROMA_PERSIST_DIRECTORY is not None:
+    client = PersistentClient(path=CHROMA_PERSIST_DIRECTORY)
+
+
+def create_embeddings(provider: str) -> tuple[Embeddings, str]:
+    """Return the embeddings of a provider and the name of their model."""
+    if provider == "cohere":
+        embeddings = CohereEmbeddings(  # type: ignore
+            model=EMBEDDING_MODEL,
+            max_retries=1,  # retries are handled by the scheduler
+        )
+        return embeddings, EMBEDDING_MODEL
+    if provider == "local":
+        embeddings = LocalEmbeddings()
+        return embeddings, embeddings.model_name
+    raise ValueError(
+        f"Invalid EMBEDDING_PROVIDER: {provider}. Must be 'cohere' or 'local'."
+    )
+
+
+@dataclass(frozen=True)
+class ChromaSettings:
+    """Settings of a ChromaDatabaseManager, read from the environment by default."""
+
+    batch_size: int = EMBEDDING_BATCH_SIZE
+    batch_tokens: int = EMBEDDING_BATCH_TOKENS
+    embedding_provider: str = EMBEDDING_PROVIDER
+    manifest_directory: Path = Path(DOCUMENTS_MANIFEST_DIRECTORY)
+
+
+def collection_name(session: str) -> str:
+    return f"session-{hashlib.sha256(session.encode()).hexdigest()[:40]}"
 
 
 class ChromaDatabaseManager(DatabaseManagerInterface):
     db: Chroma
+    settings: ChromaSettings
+    client: ClientAPI
+    collection_per_session: bool
+    collections: LRUCache[str, Chroma]
+    embeddings: CachedEmbeddings
+    retrieval_cache: RetrievalCache
+    statistics: LRUCache[str, SessionStatistics]
+    lexical_indexes: LRUCache[str, BM25Index]
+    session_store: SessionStoreInterface | None
+    revisions: dict[str, str | None]
+    top_k: int
+    candidates: int
     text_splitter: CharacterTextSplitter
+    stream_splitter: StreamingTextSplitter
+    batch_size: int
+    batch_tokens: int
+    scheduler: IngestionScheduler
+    manifest_directory: Path
 
-    def __init__(self):
-        self.db = Chroma(
-            embedding_function=CohereEmbeddings(  # type: ignore
-                model="embed-v4.0"
-            ),
-            client=client,
+    def __init__(
+        self,
+        settings: ChromaSettings | None = None,
+        scheduler: IngestionScheduler = embedding_scheduler,
+        embedding_store: EmbeddingStore | None = None,
+        session_store: SessionStoreInterface | None = None,
+    ):
+        self.settings = settings if settings is not None else ChromaSettings()
+        embeddings, model_name = create_embeddings(self.settings.embedding_provider)
+        self.embedding_model = model_name
+        self.embeddings = CachedEmbeddings(
+            embeddings,
+            model_name=model_name,
+            # An empty store is falsy, as it defines __len__
+            store=embedding_store
+            if embedding_store is not None
+            else EmbeddingStore(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES),
+        )
+        self.client = client or Client()
+        self.db = Chroma(embedding_function=self.embeddings, client=self.client)
+        self.collection_per_session = CHROMA_COLLECTION_PER_SESSION
+        self.collections = LRUCache(CHROMA_MAX_OPEN_COLLECTIONS)
+        self.retrieval_cache = RetrievalCache()
+        # Bounded by chunks rather than sessions, as a single session may hold
+        # a million of them; empty sessions weigh too, so their number is bounded
+        self.statistics = LRUCache(
+            STATISTICS_MAX_CHUNKS, weigh=lambda statistics: statistics.count + 1
+        )
+        self.lexical_indexes = LRUCache(
+            LEXICAL_INDEX_MAX_CHUNKS, weigh=lambda index: len(index) + 1
+        )
+        # Only a shared store tells the documents changed by other workers
+        self.session_store = (
+            session_store
+            if session_store is not None and session_store.shared
+            else None
         )
+        self.revisions = {}
+        self.top_k = RETRIEVAL_TOP_K
+        self.candidates = RETRIEVAL_CANDIDATES
         self.text_splitter = CharacterTextSplitter(
             chunk_size=200, chunk_overlap=0, separator="\n"
         )
+        self.stream_splitter = StreamingTextSplitter(chunk_size=200, separator="\n")
+        self.batch_size = self.settings.batch_size
+        self.batch_tokens = self.settings.batch_tokens
+        self.scheduler = scheduler
+        self.manifest_directory = self.settings.manifest_directory
+
+    def warm_up(self) -> None:
+        # Chroma loads the HNSW index of a collection on its first query
+        sample = self.db.get(limit=1, include=["embeddings"])
+        if len(sample["embeddings"]):
+            self.db.similarity_search_by_vector(list(sample["embeddings"][0]), k=1)
+
+    def _collection(self, session: str) -> Chroma | None:
+        """Collection of a session, None if the session has no collection yet."""
+        if not self.collection_per_session:
+            return self.db
+        if (collection := self.collections.get(session)) is None:
+            try:
+                collection = Chroma(
+                    collection_name=collection_name(session),
+                    embedding_function=self.embeddings,
+                    client=self.client,
+                    create_collection_if_not_exists=False,
+                )
+            except NotFoundError:
+                return None
+            self.collections.set(session, collection)
+        return collection
+
+    def _writable_collection(self, session: str) -> Chroma:
+        """Collection of a session, created on the first write."""
+        if (collection := self._collection(session)) is None:
+            collection = Chroma(
+                collection_name=collection_name(session),
+                embedding_function=self.embeddings,
+                client=self.client,
+                # The name is a hash, the session is kept to list the sessions
+                collection_metadata={"session": session},
+            )
+            self.collections.set(session, collection)
+        return collection
+
+    def _read[T](self, session: str, read: Callable[[Chroma], T]) -> T | None:
+        """Read the collection of a session, None if the session has none.
+
+        A handle whose collection was dropped by another worker is opened
+        again once, as the session may have been written to since.
+        """
+        if (collection := self._collection(session)) is None:
+            return None
+        try:
+            return read(collection)
+        except NotFoundError:
+            self._forget(session)
+        if (collection := self._collection(session)) is None:
+            return None
+        return read(collection)
+
+    def _write[T](self, session: str, write: Callable[[Chroma], T]) -> T:
+        """Write to the collection of a session, created if missing.
+
+        The collection is created again when another worker dropped it since
+        its handle was opened.
+        """
+        try:
+            return write(self._writable_collection(session))
+        except NotFoundError:
+            self._forget(session)
+        return write(self._writable_collection(session))
+
+    async def _awrite[T](
+        self, session: str, write: Callable[[Chroma], Awaitable[T]]
+    ) -> T:
+        """``_write`` for the asynchronous operations of the collection."""
+        try:
+            return await write(self._writable_collection(session))
+        except NotFoundError:
+            self._forget(session)
+        return await write(self._writable_collection(session))
+
+    def _stored_ids(self, session: str, ids: list[str]) -> list[str]:
+        """The given chunk IDs already stored for a session."""
+        return self._write(session, lambda c: c.get(ids=ids, include=[]))["ids"]
+
+    def _filter(self, session: str) -> dict[str, str] | None:
+        return None if self.collection_per_session else {"session": session}
 
     async def add_text_to_db(
         self, text: str, cookie: str | None = None
     ) -> AsyncGenerator[float, None]:
-        chunks = [
-            Document(chunk, metadata={"session": cookie or "default"})
-            for chunk in self.text_splitter.split_text(text)
-        ]
-        uploaded_chunk_ids = []
+        session = cookie or "default"
+        job = IngestionJob.from_chunks(self.text_splitter.split_text(text), session)
+        # Chunks embedded by a previous, interrupted upload are kept
+        job.mark_stored(await asyncio.to_thread(self._stored_ids, session, job.ids))
+        if job.completed:
+            yield job.progress
 
+        # One embedding call and one bulk upsert per batch, paced by the
+        # scheduler shared with the other sessions
+        tasks = [
+            asyncio.ensure_future(self._add_batch(batch, session))
+            for batch in batch_documents(
+                job.pending(), self.batch_size, self.batch_tokens
+            )
+        ]
         try:
-            total_nb_of_chunks = len(chunks)
-            tasks = [self.db.aadd_documents([chunk]) for chunk in chunks]
-            completed = 0
             for coro in asyncio.as_completed(tasks):
-                # Add document and capture the IDs for potential rollback
-                result = await coro
-                uploaded_chunk_ids.extend(result)
-                completed += 1
-                yield completed / total_nb_of_chunks * 100
-
+                job.mark_stored(await coro)
+                yield job.progress
         except CohereTooManyRequestsError as err:
-            # If we have uploaded chunks, we need to roll them back
-            if uploaded_chunk_ids:
-                await self.db.adelete(ids=uploaded_chunk_ids)
             raise EmbeddingAPILimitError(
-                content=err.body, chunks_uploaded=len(uploaded_chunk_ids)
+                content=err.body,
+                chunks_uploaded=job.completed,
+                chunks_total=job.total,
             )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def add_text_stream_to_db(
+        self, pieces: AsyncIterable[str], cookie: str | None = None
+    ) -> AsyncGenerator[int, None]:
+        session = cookie or "default"
+        documents = self._documents(self.stream_splitter.split(pieces), session)
+        stored = 0
+        # Batches are embedded while the next ones are split, and reading
+        # pauses when the scheduler cannot take more, so memory stays bounded
+        pending: set[asyncio.Future[int]] = set()
+        try:
+            async for batch in abatch_documents(
+                documents, self.batch_size, self.batch_tokens
+            ):
+                if len(pending) >= self.scheduler.max_in_flight:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        stored += task.result()
+                        yield stored
+                pending.add(asyncio.ensure_future(self._add_missing(batch, session)))
+            for coro in asyncio.as_completed(pending):
+                stored += await coro
+                yield stored
+        except CohereTooManyRequestsError as err:
+            # The rest of the stream is not split, so the total is unknown
+            raise EmbeddingAPILimitError(content=err.body, chunks_uploaded=stored)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def _documents(
+        chunks: AsyncIterable[str], session: str
+    ) -> AsyncIterator[Document]:
+        async for chunk in chunks:
+            yield Document(
+                chunk, id=chunk_id(chunk, session), metadata={"session": session}
+            )
+
+    async def _add_missing(self, batch: list[Document], session: str) -> int:
+        """Add the chunks of a batch not stored yet, returning the batch size."""
+        documents = {str(doc.id): doc for doc in batch}
+        stored = await asyncio.to_thread(self._stored_ids, session, list(documents))
+        for document_id in stored:
+            del documents[document_id]
+        if documents:
+            await self._add_batch(list(documents.values()), session)
+        return len(batch)
+
+    async def _add_batch(self, batch: list[Document], session: str) -> list[str]:
+        add_batch = partial(
+            self._awrite,
+            session,
+            lambda c: c.aadd_documents(batch, ids=[doc.id for doc in batch]),
+        )
+        # The embedding store is a SQLite file, read off the event loop
+        texts = [doc.page_content for doc in batch]
+        if await asyncio.to_thread(self.embeddings.contains_all, texts):
+            # Every embedding is cached, no API quota is needed
+            ids = await add_batch()
+        else:
+            ids = await self.scheduler.submit(add_batch, session)
+        self._record_added(session, batch)
+        self.retrieval_cache.invalidate(session)
+        if self.session_store is not None:
+            await asyncio.to_thread(self._publish_revision, session, uuid.uuid4().hex)
+        return ids
+
+    def _forget(self, session: str) -> None:
+        """Drop the collection handle, statistics, index and contexts of a session."""
+        # The collection may have been dropped by another worker
+        self.collections.pop(session)
+        # Statistics are read again on the next access, which costs a single
+        # query on an empty session and keeps the memory of expired ones free
+        self.statistics.pop(session)
+        self.lexical_indexes.pop(session)
+        self.retrieval_cache.invalidate(session)
+
+    def _check_revision(self, session: str) -> None:
+        """Forget a session whose documents were changed by another worker."""
+        if self.session_store is None:
+            return
+        revision = self.session_store.get_revision(session)
+        if session not in self.revisions or self.revisions[session] != revision:
+            self._forget(session)
+            self.revisions[session] = revision
+
+    def _publish_revision(self, session: str, revision: str | None) -> None:
+        """Tell the other workers that the documents of a session changed."""
+        if self.session_store is None:
+            return
+        previous = self.session_store.swap_revision(session, revision)
+        if previous != self.revisions.get(session):
+            # Changed by another worker too, the local copies missed it
+            self._forget(session)
+        if revision is None:
+            self.revisions.pop(session, None)
+        else:
+            self.revisions[session] = revision
+
+    def _record_added(self, session: str, documents: list[Document]) -> None:
+        """Update the statistics and the lexical index with stored chunks."""
+        chunks = [(str(doc.id), doc.page_content) for doc in documents]
+        # Set again to be weighed with their new chunks; statistics not kept
+        # are read with the new chunks on their next access
+        if (statistics := self.statistics.get(session)) is not None:
+            statistics.add(chunks)
+            self.statistics.set(session, statistics)
+        if (index := self.lexical_indexes.get(session)) is not None:
+            index.add(chunks)
+            self.lexical_indexes.set(session, index)
+
+    def _record_removed(self, session: str, ids: list[str]) -> None:
+        """Update the statistics and the lexical index with deleted chunks."""
+        if (statistics := self.statistics.get(session)) is not None:
+            statistics.remove(ids)
+            self.statistics.set(session, statistics)
+        if (index := self.lexical_indexes.get(session)) is not None:
+            index.remove(ids)
+            self.lexical_indexes.set(session, index)
 
     def get_chunks(self, cookie: str | None = None) -> list[str]:
-        return self.db.get(where={"session": cookie or "default"})["documents"]
+        session = cookie or "default"
+        stored = self._read(session, lambda c: c.get(where=self._filter(session)))
+        return stored["documents"] if stored is not None else []
+
+    def get_chunks_page(
+        self, offset: int, limit: int, cookie: str | None = None
+    ) -> list[str]:
+        session = cookie or "default"
+        stored = self._read(
+            session,
+            lambda c: c.get(
+                where=self._filter(session),
+                limit=limit,
+                offset=offset,
+                include=["documents"],
+            ),
+        )
+        return stored["documents"] if stored is not None else []
 
     async def get_context(self, question, cookie: str | None = None) -> str:
+        session = cookie or "default"
+        if self.session_store is not None:
+            await asyncio.to_thread(self._check_revision, session)
+        if (context := self.retrieval_cache.get(session, question)) is not None:
+            return context
+        # Read before searching, as the documents may change meanwhile
+        generation = self.retrieval_cache.generation(session)
         try:
-            documents = await self.db.asimilarity_search(
-                question,
-                filter={"session": cookie or "default"},
-            )
+            chunks = await self._search(question, session)
         except CohereTooManyRequestsError as err:
             raise TooManyRequestsError(content=err.body)
-        if not documents:
-            return "there is no context, you are not allowed to answer"
+        if not chunks:
+            context = "there is no context, you are not allowed to answer"
+        else:
+            context = "\n\n".join(chunks)
+        self.retrieval_cache.set(session, question, context, generation)
+        return context
 
-        return "\n\n".join(doc.page_content for doc in documents)
+    async def _search(self, question: str, session: str) -> list[str]:
+        """``_hybrid_search`` of a session, reopening a handle gone stale."""
+        if (collection := self._collection(session)) is None:
+            return []
+        try:
+            return await self._hybrid_search(collection, question, session)
+        except NotFoundError:
+            # Dropped by another worker, with the lexical index read from it
+            self._forget(session)
+        if (collection := self._collection(session)) is None:
+            return []
+        return await self._hybrid_search(collection, question, session)
+
+    async def _hybrid_search(
+        self, collection: Chroma, question: str, session: str
+    ) -> list[str]:
+        """Best chunks by reciprocal rank fusion of vector and lexical matches.
+
+        Exact terms such as product codes or error messages are found by the
+        lexical index even when their embedding is not close to the question.
+        """
+        vector_hits = await collection.asimilarity_search(
+            question, k=self.candidates, filter=self._filter(session)
+        )
+        rankings = [[str(doc.id) for doc in vector_hits]]
+        if (index := await self._lexical_index(collection, session)) is not None:
+            rankings.append(index.search(question, self.candidates))
+        ranked = reciprocal_rank_fusion(rankings)[: self.top_k]
+        texts = {str(doc.id): doc.page_content for doc in vector_hits}
+        if missing := [chunk_id for chunk_id in ranked if chunk_id not in texts]:
+            stored = await asyncio.to_thread(
+                collection.get, ids=missing, include=["documents"]
+            )
+            texts.update(zip(stored["ids"], stored["documents"]))
+        return [texts[chunk_id] for chunk_id in ranked if chunk_id in texts]
+
+    async def _lexical_index(
+        self, collection: Chroma, session: str
+    ) -> BM25Index | None:
+        """Lexical index of a session, None if it would exceed the memory budget."""
+        if (index := self.lexical_indexes.get(session)) is None:
+            statistics = await asyncio.to_thread(self._statistics, session)
+            if statistics.count >= self.lexical_indexes.max_size:
+                return None
+            # Registered before reading the stored chunks, so that the chunks
+            # added meanwhile are indexed too; adding a chunk twice is a no-op
+            index = BM25Index()
+            self.lexical_indexes.set(session, index)
+            stored = await asyncio.to_thread(
+                collection.get, where=self._filter(session), include=["documents"]
+            )
+            index.add(zip(stored["ids"], stored["documents"]))
+            self.lexical_indexes.set(session, index)
+        return index
+
+    def _statistics(self, session: str) -> SessionStatistics:
+        if (statistics := self.statistics.get(session)) is None:
+            # Read once, then maintained on every add and delete while kept
+            statistics = SessionStatistics()
+            stored = self._read(
+                session,
+                lambda c: c.get(where=self._filter(session), include=["documents"]),
+            )
+            if stored is not None:
+                statistics.add(zip(stored["ids"], stored["documents"]))
+            self.statistics.set(session, statistics)
+        return statistics
+
+    def _checked_statistics(self, session: str) -> SessionStatistics:
+        self._check_revision(session)
+        return self._statistics(session)
 
     def get_number_of_vectors(self, cookie: str | None = None) -> int:
-        return len(self.db.get(where={"session": cookie or "default"})["documents"])
+        return self._checked_statistics(cookie or "default").count
 
     def get_length_of_longest_vector(self, cookie: str | None = None) -> int:
-        documents = self.db.get(where={"session": cookie or "default"})["documents"]
-        if not documents:
-            return 0
-        return len(max(documents, key=len))
+        return self._checked_statistics(cookie or "default").longest
+
+    def get_statistics(self, cookie: str | None = None) -> VectorStatistics:
+        return self._checked_statistics(cookie or "default").summary()
+
+    def get_sessions(self) -> set[str]:
+        if self.collection_per_session:
+            return {
+                collection.metadata["session"]
+                for collection in self.client.list_collections()
+                if collection.metadata and "session" in collection.metadata
+            }
+        sessions: set[str] = set()
+        offset = 0
+        while metadatas := self.db.get(
+            limit=SESSIONS_PAGE_SIZE, offset=offset, include=["metadatas"]
+        )["metadatas"]:
+            sessions.update(
+                str(metadata["session"])
+                for metadata in metadatas
+                if metadata and "session" in metadata
+            )
+            offset += len(metadatas)
+        return sessions
 
     def empty_database(self, cookie: str | None = None):
-        self.db.delete(where={"session": cookie or "default"})
+        if not self.collection_per_session:
+            self.db.delete(where={"session": cookie or "default"})
+        elif (collection := self._collection(cookie or "default")) is not None:
+            # Dropping the collection does not depend on the number of vectors,
+            # and another worker may have dropped it already
+            with suppress(NotFoundError):
+                collection.delete_collection()
+        self._forget(cookie or "default")
+        self._publish_revision(cookie or "default", None)
+        shutil.rmtree(self._manifests(cookie or "default"), ignore_errors=True)
+
+    def _manifests(self, session: str) -> Path:
+        return self.manifest_directory / hashlib.sha256(session.encode()).hexdigest()
 
     def load_documents_from_folder(self, folder: PathLike, cookie: str | None = None):
-        documents = DirectoryLoader(str(folder), "*.txt").load()
-        for doc in documents:
-            doc.metadata["session"] = cookie or "default"
-        self.db.add_documents(self.text_splitter.split_documents(documents))
+        session = cookie or "default"
+        folder_key = str(Path(folder).resolve()).encode()
+        manifest_path = (
+            self._manifests(session) / f"{hashlib.sha256(folder_key).hexdigest()}.json"
+        )
+        manifest = FolderManifest.load(manifest_path)
+        indexed = manifest.chunk_ids
+        # Files are read and split in a thread pool while the batches of the
+        # previous ones are embedded
+        documents = (
+            document
+            for loaded in FolderLoader(self.text_splitter).changed_files(
+                folder, session, manifest
+            )
+            for document in loaded.documents or []
+        )
+        for batch in batch_documents(documents, self.batch_size, self.batch_tokens):
+            unique = list({str(doc.id): doc for doc in batch}.values())
+            self._write(
+                session, lambda c: c.add_documents(unique, ids=[d.id for d in unique])
+            )
+            self._record_added(session, unique)
+        if stale := list(indexed - manifest.chunk_ids):
+            self._write(session, lambda c: c.delete(ids=stale))
+            self._record_removed(session, stale)
+        manifest.save(manifest_path)
+        self.retrieval_cache.invalidate(session)
+        self._publish_revision(session, uuid.uuid4().hex)
@@ -0,0 +1,198 @@
+"""Content-addressed, disk-backed cache of document embeddings."""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections.abc import Iterable
+from os import PathLike
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+from app.cache import LRUCache
+
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_QUERIES = 1024
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and whitespace so equivalent chunks share a key."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode()).hexdigest()
+
+
+class EmbeddingStore:
+    """SQLite store of embeddings evicting the least recently used entries."""
+
+    def __init__(
+        self,
+        path: str | PathLike = ":memory:",
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_accessed_at "
+            "ON embeddings (accessed_at)"
+        )
+        self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM embeddings"
+            ).fetchone()[0]
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Return the stored vectors of ``keys``, marking them as recently used."""
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                keys,
+            ).fetchall()
+            self._connection.execute(
+                f"UPDATE embeddings SET accessed_at = ? WHERE key IN ({placeholders})",
+                [time.time(), *keys],
+            )
+        return {key: array("f", vector).tolist() for key, vector in rows}
+
+    def contains_all(self, keys: list[str]) -> bool:
+        unique_keys = list(dict.fromkeys(keys))
+        if not unique_keys:
+            return True
+        placeholders = ",".join("?" * len(unique_keys))
+        with self._lock:
+            (count,) = self._connection.execute(
+                f"SELECT COUNT(*) FROM embeddings WHERE key IN ({placeholders})",
+                unique_keys,
+            ).fetchone()
+        return count == len(unique_keys)
+
+    def set_many(self, items: dict[str, list[float]]) -> None:
+        """Store vectors, then evict the least recently used overflowing entries."""
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [
+                    (key, array("f", vector).tobytes(), now)
+                    for key, vector in items.items()
+                ],
+            )
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper only sending texts missing from the store upstream.
+
+    Keys are derived from the model name and the normalized text, so the same
+    chunk uploaded by different sessions is embedded once. Query embeddings
+    are kept apart in a small in-memory LRU, as models embed questions and
+    documents differently.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        store: EmbeddingStore,
+        max_queries: int = DEFAULT_MAX_QUERIES,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.store = store
+        self.queries: LRUCache[str, list[float]] = LRUCache(max_queries)
+        self.hits = 0
+        self.misses = 0
+
+    def _keys(self, texts: Iterable[str]) -> list[str]:
+        return [cache_key(self.model_name, text) for text in texts]
+
+    def contains_all(self, texts: Iterable[str]) -> bool:
+        """Whether every text can be embedded without calling the model."""
+        return self.store.contains_all(self._keys(texts))
+
+    def _lookup(
+        self, texts: list[str]
+    ) -> tuple[list[str], dict[str, list[float]], dict[str, str]]:
+        keys = self._keys(texts)
+        cached = self.store.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        self.hits += sum(key in cached for key in keys)
+        self.misses += len(missing)
+        return keys, cached, missing
+
+    def _merge(
+        self,
+        keys: list[str],
+        cached: dict[str, list[float]],
+        missing: dict[str, str],
+        vectors: list[list[float]],
+    ) -> list[list[float]]:
+        computed = dict(zip(missing, vectors))
+        if computed:
+            self.store.set_many(computed)
+        return [computed[key] if key in computed else cached[key] for key in keys]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, cached, missing = self._lookup(texts)
+        vectors = (
+            self.embeddings.embed_documents(list(missing.values())) if missing else []
+        )
+        return self._merge(keys, cached, missing, vectors)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, cached, missing = await asyncio.to_thread(self._lookup, texts)
+        vectors = (
+            await self.embeddings.aembed_documents(list(missing.values()))
+            if missing
+            else []
+        )
+        return await asyncio.to_thread(self._merge, keys, cached, missing, vectors)
+
+    def _cached_query(self, key: str) -> list[float] | None:
+        vector = self.queries.get(key)
+        if vector is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return vector
+
+    def embed_query(self, text: str) -> list[float]:
+        key = cache_key(self.model_name, text)
+        if (vector := self._cached_query(key)) is None:
+            vector = self.embeddings.embed_query(text)
+            self.queries.set(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = cache_key(self.model_name, text)
+        if (vector := self._cached_query(key)) is None:
+            vector = await self.embeddings.aembed_query(text)
+            self.queries.set(key, vector)
+        return vector
@@ -1,28 +1,55 @@
-from collections import defaultdict
-from collections.abc import AsyncGenerator
-from difflib import get_close_matches
+from collections import Counter, defaultdict
+from collections.abc import AsyncGenerator, AsyncIterable
 from os import PathLike
+from pathlib import Path
 
-from langchain_community.document_loaders import DirectoryLoader
 from langchain_text_splitters import CharacterTextSplitter
 
+from app.databases.loader import FolderLoader, FolderManifest
+from app.databases.local_index import LocalIndex
+from app.databases.splitter import StreamingTextSplitter
+from app.databases.stats import SessionStatistics
 from app.ports import DatabaseManagerInterface
+from app.ports.database import VectorStatistics
 
 
 class FakeDatabaseManager(DatabaseManagerInterface):
     db: defaultdict[str, list[str]]
+    manifests: dict[tuple[str, str], FolderManifest]
+    folder_chunks: dict[str, dict[str, str]]
+    indexes: dict[str, tuple[list[str], LocalIndex]]
 
     text_splitter: CharacterTextSplitter = CharacterTextSplitter(
         chunk_size=200, chunk_overlap=0, separator="\n"
     )
 
+    stream_splitter: StreamingTextSplitter = StreamingTextSplitter(
+        chunk_size=200, separator="\n"
+    )
+
     def __init__(self):
         self.db = defaultdict(list)
+        self.manifests = {}
+        self.folder_chunks = {}
+        self.indexes = {}
 
     async def get_context(self, question: str, cookie: str | None = None) -> str:
         user_db = self.db[cookie or "default"]
-        context = get_close_matches(question, user_db, n=1, cutoff=0.1)
-        return "\n\n".join(context) if context else ""
+        positions = self._index(cookie or "default").search(question, k=1)
+        return "\n\n".join(user_db[position] for position in positions)
+
+    def _index(self, session: str) -> LocalIndex:
+        """Index of the chunks of a session, catching up with appended chunks.
+
+        The index is rebuilt when the list of chunks is replaced or shrinks.
+        """
+        chunks = self.db[session]
+        indexed, index = self.indexes.get(session, (None, None))
+        if index is None or indexed is not chunks or len(index) > len(chunks):
+            index = LocalIndex()
+            self.indexes[session] = (chunks, index)
+        index.add(chunks[len(index) :])
+        return index
 
     async def add_text_to_db(
         self, text: str, cookie: str | None = None
@@ -32,9 +59,23 @@ class FakeDatabaseManager(DatabaseManagerInterface):
             self.db[cookie or "default"].append(chunk)
             yield (progress + 1) / len(chunks) * 100
 
+    async def add_text_stream_to_db(
+        self, pieces: AsyncIterable[str], cookie: str | None = None
+    ) -> AsyncGenerator[int, None]:
+        stored = 0
+        async for chunk in self.stream_splitter.split(pieces):
+            self.db[cookie or "default"].append(chunk)
+            stored += 1
+            yield stored
+
     def get_chunks(self, cookie: str | None = None) -> list[str]:
         return self.db[cookie or "default"]
 
+    def get_chunks_page(
+        self, offset: int, limit: int, cookie: str | None = None
+    ) -> list[str]:
+        return self.db[cookie or "default"][offset : offset + limit]
+
     def get_number_of_vectors(self, cookie: str | None = None) -> int:
         return len(self.db[cookie or "default"])
 
@@ -43,12 +84,47 @@ class FakeDatabaseManager(DatabaseManagerInterface):
             return 0
         return len(max(self.db[cookie or "default"], key=len))
 
+    def get_statistics(self, cookie: str | None = None) -> VectorStatistics:
+        statistics = SessionStatistics()
+        statistics.add(
+            (str(index), chunk)
+            for index, chunk in enumerate(self.db[cookie or "default"])
+        )
+        return statistics.summary()
+
+    def get_sessions(self) -> set[str]:
+        return {session for session, chunks in self.db.items() if chunks}
+
     def empty_database(self, cookie: str | None = None):
-        self.db[cookie or "default"] = []
+        # Reading a session creates its entry, so removing it frees the memory
+        self.db.pop(cookie or "default", None)
+        self.indexes.pop(cookie or "default", None)
+        self.folder_chunks.pop(cookie or "default", None)
+        for key in [key for key in self.manifests if key[0] == (cookie or "default")]:
+            del self.manifests[key]
 
     def load_documents_from_folder(self, folder: PathLike, cookie: str | None = None):
-        documents = DirectoryLoader(str(folder), "*.txt").load()
-        self.db[cookie or "default"].extend(
-            document.page_content
-            for document in self.text_splitter.split_documents(documents)
+        session = cookie or "default"
+        manifest = self.manifests.setdefault(
+            (session, str(Path(folder).resolve())), FolderManifest()
         )
+        indexed = manifest.chunk_ids
+        # Text of the chunks loaded from folders, by ID
+        loaded_chunks = self.folder_chunks.setdefault(session, {})
+        for loaded in FolderLoader(self.text_splitter).changed_files(
+            folder, session, manifest
+        ):
+            for document in loaded.documents or []:
+                if document.id not in loaded_chunks:
+                    loaded_chunks[str(document.id)] = document.page_content
+                    self.db[session].append(document.page_content)
+        if stale := indexed - manifest.chunk_ids:
+            # One copy of each text, the same text may be uploaded elsewhere
+            removed = Counter(loaded_chunks.pop(id_) for id_ in stale)
+            chunks = []
+            for chunk in self.db[session]:
+                if removed[chunk]:
+                    removed[chunk] -= 1
+                else:
+                    chunks.append(chunk)
+            self.db[session] = chunks
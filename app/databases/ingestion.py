@@ -0,0 +1,144 @@
+"""Ingestion jobs and helpers to group text chunks into embedding batches."""
+
+import hashlib
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass, field
+
+from langchain_core.documents.base import Document
+
+# Cohere's embed endpoint accepts at most 96 texts per call
+DEFAULT_BATCH_SIZE = 96
+DEFAULT_BATCH_TOKENS = 8192
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used to bound the size of an embedding request."""
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def chunk_id(text: str, session: str, source: str | None = None) -> str:
+    """Deterministic ID of a chunk, so re-uploading a text maps to the same IDs.
+
+    Chunks of a ``source``, such as a folder, get IDs of their own, so that
+    deleting them never deletes the same text uploaded from elsewhere.
+    """
+    key = f"{session}\0{text}" if source is None else f"{session}\0{source}\0{text}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+@dataclass
+class IngestionJob:
+    """Chunks of a text being ingested for a session.
+
+    Chunks already stored are tracked by ID, so a job interrupted by the
+    embedding API limit can be resumed by only embedding the missing ones.
+    """
+
+    session: str
+    documents: list[Document]
+    stored: set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[str], session: str) -> "IngestionJob":
+        """Create a job, dropping chunks repeated within the text."""
+        documents: dict[str, Document] = {}
+        for chunk in chunks:
+            document_id = chunk_id(chunk, session)
+            if document_id not in documents:
+                documents[document_id] = Document(
+                    chunk, id=document_id, metadata={"session": session}
+                )
+        return cls(session=session, documents=list(documents.values()))
+
+    @property
+    def ids(self) -> list[str]:
+        return [str(document.id) for document in self.documents]
+
+    @property
+    def total(self) -> int:
+        return len(self.documents)
+
+    @property
+    def completed(self) -> int:
+        """Number of chunks stored so far, the cursor to resume the job from."""
+        return len(self.stored)
+
+    @property
+    def progress(self) -> float:
+        if not self.documents:
+            return 100.0
+        return self.completed / self.total * 100
+
+    def pending(self) -> list[Document]:
+        return [
+            document for document in self.documents if document.id not in self.stored
+        ]
+
+    def mark_stored(self, ids: Iterable[str]) -> None:
+        self.stored.update(ids)
+
+
+class DocumentBatcher:
+    """Group documents into batches bounded by count and estimated tokens.
+
+    A single document larger than ``max_batch_tokens`` is emitted on its own
+    batch rather than being dropped.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    ):
+        if max_batch_size < 1 or max_batch_tokens < 1:
+            raise ValueError("Batch size and batch tokens must be positive integers.")
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._batch: list[Document] = []
+        self._batch_tokens = 0
+
+    def add(self, document: Document) -> list[Document] | None:
+        """Add a document, returning the previous batch if it is full."""
+        full_batch = None
+        tokens = estimate_tokens(document.page_content)
+        if self._batch and (
+            len(self._batch) >= self.max_batch_size
+            or self._batch_tokens + tokens > self.max_batch_tokens
+        ):
+            full_batch = self.flush()
+        self._batch.append(document)
+        self._batch_tokens += tokens
+        return full_batch
+
+    def flush(self) -> list[Document] | None:
+        """Return the batch being filled, if any, and start a new one."""
+        batch, self._batch, self._batch_tokens = self._batch, [], 0
+        return batch or None
+
+
+def batch_documents(
+    documents: Iterable[Document],
+    max_batch_size: int = DEFAULT_BATCH_SIZE,
+    max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+) -> Iterator[list[Document]]:
+    batcher = DocumentBatcher(max_batch_size, max_batch_tokens)
+    for document in documents:
+        if (batch := batcher.add(document)) is not None:
+            yield batch
+    if (batch := batcher.flush()) is not None:
+        yield batch
+
+
+async def abatch_documents(
+    documents: AsyncIterable[Document],
+    max_batch_size: int = DEFAULT_BATCH_SIZE,
+    max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+) -> AsyncIterator[list[Document]]:
+    batcher = DocumentBatcher(max_batch_size, max_batch_tokens)
+    async for document in documents:
+        if (batch := batcher.add(document)) is not None:
+            yield batch
+    if (batch := batcher.flush()) is not None:
+        yield batch
@@ -0,0 +1,109 @@
+"""Incrementally maintained BM25 index of the chunks of a session."""
+
+import heapq
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable, Sequence
+
+# Words, keeping codes such as "ERR-4012" or "v2.1.0" whole
+TERM_PATTERN = re.compile(r"\w+(?:[-./:]\w+)*")
+TERM_SEPARATORS = re.compile(r"[-./:]")
+
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+# Rank constant of the reciprocal rank fusion, dampening the top ranks
+DEFAULT_RRF_K = 60
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased terms of a text, codes being indexed whole and by part."""
+    terms = []
+    for match in TERM_PATTERN.findall(text.lower()):
+        terms.append(match)
+        if TERM_SEPARATORS.search(match):
+            terms.extend(TERM_SEPARATORS.split(match))
+    return terms
+
+
+class BM25Index:
+    """Okapi BM25 ranking of chunks over an inverted index.
+
+    Postings are keyed by chunk ID, so re-adding a stored chunk is a no-op,
+    and adding or removing a chunk costs O(1) per term of the chunk. A query
+    only reads the postings of its own terms.
+    """
+
+    def __init__(self, k1: float = DEFAULT_K1, b: float = DEFAULT_B):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        self._terms: dict[str, tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, chunks: Iterable[tuple[str, str]]) -> None:
+        """Index ``(id, text)`` chunks stored in the database."""
+        for chunk_id, text in chunks:
+            if chunk_id in self._lengths:
+                continue
+            terms = tokenize(text)
+            frequencies = Counter(terms)
+            for term, frequency in frequencies.items():
+                self._postings.setdefault(term, {})[chunk_id] = frequency
+            self._lengths[chunk_id] = len(terms)
+            self._terms[chunk_id] = tuple(frequencies)
+            self._total_length += len(terms)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Forget chunks deleted from the database."""
+        for chunk_id in ids:
+            length = self._lengths.pop(chunk_id, None)
+            if length is None:
+                continue
+            self._total_length -= length
+            for term in self._terms.pop(chunk_id):
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, k: int = 4) -> list[str]:
+        """IDs of the ``k`` best matching chunks, best first.
+
+        Chunks sharing no term with the query are never returned.
+        """
+        if not self._lengths or k < 1:
+            return []
+        count = len(self._lengths)
+        average_length = self._total_length / count or 1.0
+        scores: Counter[str] = Counter()
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings.items():
+                norm = 1 - self.b + self.b * self._lengths[chunk_id] / average_length
+                scores[chunk_id] += (
+                    idf * frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+                )
+        best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [chunk_id for chunk_id, _ in best]
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[str]], k: int = DEFAULT_RRF_K
+) -> list[str]:
+    """Merge rankings of IDs, each ID scoring ``1 / (k + rank)`` per ranking.
+
+    Ties keep the order in which the IDs were first ranked.
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1 / (k + rank)
+    return sorted(scores, key=lambda item: -scores[item])
@@ -0,0 +1,181 @@
+"""Parallel and incremental loading of the text files of a folder."""
+
+import hashlib
+import json
+import logging
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from os import PathLike
+from pathlib import Path
+
+from langchain_core.documents.base import Document
+from langchain_text_splitters import TextSplitter
+
+from app.databases.ingestion import chunk_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERN = "*.txt"
+
+
+@dataclass
+class FileRecord:
+    mtime: float
+    size: int
+    hash: str
+    chunk_ids: list[str]
+
+
+@dataclass
+class LoadedFile:
+    """A file read from disk, with no documents if its content is unchanged."""
+
+    path: str
+    record: FileRecord
+    documents: list[Document] | None
+
+
+class FolderManifest:
+    """Files indexed from a folder, so that only the changed ones are re-indexed."""
+
+    def __init__(self, files: dict[str, FileRecord] | None = None):
+        self.files = files or {}
+
+    @classmethod
+    def load(cls, path: str | PathLike) -> "FolderManifest":
+        try:
+            content = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            return cls()
+        return cls({name: FileRecord(**record) for name, record in content.items()})
+
+    def save(self, path: str | PathLike) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        content = {name: asdict(record) for name, record in self.files.items()}
+        Path(path).write_text(json.dumps(content))
+
+    @property
+    def chunk_ids(self) -> set[str]:
+        return {id_ for record in self.files.values() for id_ in record.chunk_ids}
+
+
+def _bounded_map[T, R](
+    executor: ThreadPoolExecutor,
+    function: Callable[[T], R],
+    items: Iterable[T],
+    window: int,
+) -> Iterator[R]:
+    """``executor.map`` only running ``window`` items ahead, to bound the memory."""
+    pending: deque[Future[R]] = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class FolderLoader:
+    """Walk a folder tree and read, hash and split its files in a thread pool.
+
+    The manifest records the modification time, size, hash and chunk IDs of
+    every indexed file: files whose time and size did not change are not
+    read again, and files whose hash did not change are not split again.
+    """
+
+    def __init__(
+        self,
+        text_splitter: TextSplitter,
+        max_workers: int | None = None,
+        pattern: str = DEFAULT_PATTERN,
+    ):
+        self.text_splitter = text_splitter
+        self.max_workers = max_workers
+        self.pattern = pattern
+
+    def changed_files(
+        self, folder: str | PathLike, session: str, manifest: FolderManifest
+    ) -> Iterator[LoadedFile]:
+        """Yield the new and modified files, updating ``manifest`` on the way.
+
+        Files removed from the folder are dropped from the manifest, so the
+        chunk IDs found in the manifest before the load and not after it are
+        the ones to delete. Chunk IDs are scoped to the folder, so these are
+        never the IDs of chunks added from elsewhere.
+        """
+        root = Path(folder)
+        source = str(root.resolve())
+        found = {
+            path.relative_to(root).as_posix(): path
+            for path in sorted(root.rglob(self.pattern))
+            if path.is_file()
+        }
+        for name in manifest.files.keys() - found.keys():
+            del manifest.files[name]
+
+        def read(name: str) -> tuple[str, LoadedFile | None]:
+            try:
+                return name, self._read(found[name], name, session, source, manifest)
+            except UnicodeDecodeError:
+                logger.warning("Skipping %s: it is not a valid UTF-8 file", name)
+                return name, None
+            except FileNotFoundError:
+                logger.warning("Skipping %s: it was deleted while loading", name)
+                return name, None
+
+        to_read = (
+            name
+            for name, path in found.items()
+            if not _is_unchanged(path, manifest.files.get(name))
+        )
+        max_workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(max_workers) as executor:
+            for name, loaded in _bounded_map(executor, read, to_read, 2 * max_workers):
+                if loaded is None:
+                    manifest.files.pop(name, None)
+                    continue
+                manifest.files[name] = loaded.record
+                if loaded.documents is not None:
+                    yield loaded
+
+    def _read(
+        self,
+        path: Path,
+        name: str,
+        session: str,
+        source: str,
+        manifest: FolderManifest,
+    ) -> LoadedFile:
+        previous = manifest.files.get(name)
+        stat = path.stat()
+        content = path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        if previous is not None and previous.hash == digest:
+            record = FileRecord(stat.st_mtime, stat.st_size, digest, previous.chunk_ids)
+            return LoadedFile(name, record, documents=None)
+        text = content.decode()
+        documents = [
+            Document(
+                chunk,
+                id=chunk_id(chunk, session, source),
+                metadata={"session": session, "source": str(path)},
+            )
+            for chunk in self.text_splitter.split_text(text)
+        ]
+        chunk_ids = list(dict.fromkeys(str(document.id) for document in documents))
+        record = FileRecord(stat.st_mtime, stat.st_size, digest, chunk_ids)
+        return LoadedFile(name, record, documents)
+
+
+def _is_unchanged(path: Path, record: FileRecord | None) -> bool:
+    if record is None:
+        return False
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        # Deleted since listed, skipped when read
+        return False
+    return stat.st_mtime == record.mtime and stat.st_size == record.size
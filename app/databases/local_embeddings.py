@@ -0,0 +1,36 @@
+"""CPU-only embeddings needing no network, for offline deployments."""
+
+from langchain_core.embeddings import Embeddings
+
+from app.databases.local_index import HashingVectorizer, normalize_rows
+
+DEFAULT_BATCH_SIZE = 256
+
+
+class LocalEmbeddings(Embeddings):
+    """Deterministic embeddings of hashed words and character n-grams.
+
+    Vectors only depend on the text and the vectorizer settings, which are
+    part of ``model_name`` so cached embeddings of other settings are never
+    reused. Texts are vectorized in batches of ``batch_size`` rows.
+    """
+
+    def __init__(
+        self,
+        vectorizer: HashingVectorizer | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.batch_size = batch_size
+        ngram_sizes = "-".join(map(str, self.vectorizer.ngram_sizes))
+        self.model_name = f"local-hashing-{self.vectorizer.n_features}-{ngram_sizes}"
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start : start + self.batch_size]
+            vectors.extend(normalize_rows(self.vectorizer.transform(batch)).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,110 @@
+"""In-process retrieval over hashed n-gram vectors, backed by NumPy."""
+
+import re
+import zlib
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+DEFAULT_N_FEATURES = 1024
+DEFAULT_NGRAM_SIZES = (3, 4)
+INITIAL_CAPACITY = 64
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class HashingVectorizer:
+    """Map texts to fixed size vectors of hashed words and character n-grams.
+
+    Every lowercased word and every character n-gram of the padded word is
+    hashed with CRC32 into one of ``n_features`` buckets, so vectors are
+    stable across processes and need no vocabulary. Counts are dampened with
+    ``log1p`` so repeated terms do not dominate a chunk.
+    """
+
+    def __init__(
+        self,
+        n_features: int = DEFAULT_N_FEATURES,
+        ngram_sizes: tuple[int, ...] = DEFAULT_NGRAM_SIZES,
+    ):
+        if n_features < 1:
+            raise ValueError("n_features must be a positive integer.")
+        self.n_features = n_features
+        self.ngram_sizes = ngram_sizes
+
+    def _buckets(self, text: str) -> list[int]:
+        buckets = []
+        for word in WORD_PATTERN.findall(text.lower()):
+            buckets.append(zlib.crc32(word.encode()) % self.n_features)
+            padded = f" {word} ".encode()
+            for size in self.ngram_sizes:
+                buckets.extend(
+                    zlib.crc32(padded[start : start + size]) % self.n_features
+                    for start in range(len(padded) - size + 1)
+                )
+        return buckets
+
+    def transform(self, texts: Sequence[str]) -> npt.NDArray[np.float32]:
+        """Return one row of dampened term counts per text."""
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = np.bincount(self._buckets(text), minlength=self.n_features)
+        return np.log1p(matrix, out=matrix)
+
+
+def normalize_rows(matrix: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+
+class LocalIndex:
+    """TF-IDF ranking of chunks stored in a contiguous float32 matrix.
+
+    Rows hold the L2-normalized term vectors of the chunks and grow by
+    doubling the capacity. Document frequencies are maintained on every
+    add, and inverse document frequencies are applied to the query only, so
+    adding chunks never re-weights the stored rows. A query costs a single
+    matrix-vector product and an ``argpartition``.
+    """
+
+    def __init__(self, vectorizer: HashingVectorizer | None = None):
+        self.vectorizer = vectorizer or HashingVectorizer()
+        n_features = self.vectorizer.n_features
+        self._matrix = np.zeros((INITIAL_CAPACITY, n_features), dtype=np.float32)
+        self._document_frequencies = np.zeros(n_features, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, texts: Sequence[str]) -> None:
+        if not texts:
+            return
+        rows = self.vectorizer.transform(texts)
+        self._document_frequencies += np.count_nonzero(rows, axis=0)
+        end = self._size + len(texts)
+        if end > len(self._matrix):
+            capacity = max(end, 2 * len(self._matrix))
+            matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+            matrix[: self._size] = self._matrix[: self._size]
+            self._matrix = matrix
+        self._matrix[self._size : end] = normalize_rows(rows)
+        self._size = end
+
+    def search(self, query: str, k: int = 1) -> list[int]:
+        """Positions of the ``k`` best matching chunks, best first.
+
+        Chunks sharing no term with the query are never returned.
+        """
+        if not self._size or k < 1:
+            return []
+        idf = np.log((1 + self._size) / (1 + self._document_frequencies)) + 1
+        weighted_query = self.vectorizer.transform([query])[0] * idf.astype(np.float32)
+        scores = self._matrix[: self._size] @ weighted_query
+        if k < self._size:
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(self._size)
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [int(position) for position in ranked if scores[position] > 0]
@@ -0,0 +1,51 @@
+"""Per-session cache of the context retrieved for a question."""
+
+import itertools
+
+from app.cache import LRUCache
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase a question and collapse its spacing, keeping every symbol."""
+    return " ".join(question.lower().split())
+
+
+class RetrievalCache:
+    """Context retrieved per session and normalized question.
+
+    Entries of a session must be invalidated whenever its documents change.
+    As a retrieval may run while the documents change, callers read the
+    ``generation`` of the session before retrieving and pass it to ``set``,
+    which drops the context if the session was invalidated meanwhile.
+    """
+
+    def __init__(self, max_sessions: int = 1024, max_questions: int = 256):
+        self.max_questions = max_questions
+        self._sessions: LRUCache[str, LRUCache[str, str]] = LRUCache(max_sessions)
+        # Drawn from one counter, so that a generation is never reused
+        self._generations: LRUCache[str, int] = LRUCache(max_sessions)
+        self._counter = itertools.count(1)
+
+    def generation(self, session: str) -> int:
+        """Number changing every time the session is invalidated."""
+        return self._generations.get(session) or 0
+
+    def get(self, session: str, question: str) -> str | None:
+        questions = self._sessions.get(session)
+        if questions is None:
+            return None
+        return questions.get(normalize_question(question))
+
+    def set(self, session: str, question: str, context: str, generation: int) -> None:
+        """Cache a context retrieved from the given generation of the session."""
+        if self.generation(session) != generation:
+            return
+        questions = self._sessions.get(session)
+        if questions is None:
+            questions = LRUCache(self.max_questions)
+            self._sessions.set(session, questions)
+        questions.set(normalize_question(question), context)
+
+    def invalidate(self, session: str) -> None:
+        self._generations.set(session, next(self._counter))
+        self._sessions.pop(session)
@@ -0,0 +1,169 @@
+"""Process-wide scheduler pacing requests sent to the embedding API."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF = 30.0
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Rate and capacity must be positive numbers.")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Wait until ``tokens`` are available and consume them."""
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class IngestionScheduler:
+    """Bounded, rate limited and fair executor for embedding requests.
+
+    A single instance is meant to be shared by every session of the process:
+
+    - at most ``window`` operations run at the same time. The window grows by
+      one slot per window of successful operations and is halved every time
+      the API answers with a rate limit error (AIMD);
+    - operations are paced by a token bucket so bursts stay under the quota,
+      unless ``requests_per_minute`` is None;
+    - waiting operations are dispatched round-robin across sessions, so a
+      large upload cannot starve the other sessions.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        requests_per_minute: float | None = 100,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        retry_on: tuple[type[BaseException], ...] = (),
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be a positive integer.")
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retry_on = retry_on
+        self.bucket = (
+            TokenBucket(rate=requests_per_minute / 60, capacity=max_in_flight)
+            if requests_per_minute is not None
+            else None
+        )
+        self._window = float(max_in_flight)
+        self._in_flight = 0
+        self._waiters: OrderedDict[str, deque[asyncio.Future[None]]] = OrderedDict()
+
+    @property
+    def window(self) -> int:
+        """Current number of operations allowed to run concurrently."""
+        return max(1, int(self._window))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def submit[T](
+        self, operation: Callable[[], Awaitable[T]], session: str = "default"
+    ) -> T:
+        """Run ``operation`` once a slot is free, retrying on rate limit errors."""
+        await self._acquire_slot(session)
+        try:
+            attempt = 0
+            while True:
+                if self.bucket is not None:
+                    await self.bucket.acquire()
+                try:
+                    result = await operation()
+                except self.retry_on:
+                    self._on_rate_limited()
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = min(MAX_BACKOFF, self.backoff * 2**attempt)
+                    logger.warning(
+                        "Embedding API rate limited, retrying in %.1fs (window=%d)",
+                        delay,
+                        self.window,
+                    )
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                else:
+                    self._on_success()
+                    return result
+        finally:
+            self._release_slot()
+
+    def _on_success(self) -> None:
+        self._window = min(self.max_in_flight, self._window + 1 / self.window)
+        self._dispatch()
+
+    def _on_rate_limited(self) -> None:
+        self._window = max(1.0, self._window / 2)
+
+    async def _acquire_slot(self, session: str) -> None:
+        if not self._waiters and self._in_flight < self.window:
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(session, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():  # pragma: no cover
+                # The slot was granted right before the cancellation
+                self._release_slot()
+            else:
+                self._discard_waiter(session, waiter)
+            raise
+
+    def _discard_waiter(self, session: str, waiter: asyncio.Future[None]) -> None:
+        queue = self._waiters.get(session)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._waiters[session]
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._in_flight < self.window:
+            session, queue = self._waiters.popitem(last=False)
+            waiter = queue.popleft()
+            if queue:
+                # Move the session to the back of the line (round-robin)
+                self._waiters[session] = queue
+            if waiter.done():  # pragma: no cover - cancelled while waiting
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
@@ -0,0 +1,212 @@
+"""Stores of the sessions: in memory, SQLite and Redis."""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from os import PathLike, getenv
+from pathlib import Path
+
+from redis import Redis
+
+from app.ports.sessions import SessionStoreInterface
+
+# "memory" only works with a single worker process
+SESSION_STORE = getenv("SESSION_STORE", "memory")
+SESSION_STORE_PATH = getenv("SESSION_STORE_PATH", ".cache/sessions.sqlite3")
+SESSION_STORE_URL = getenv("SESSION_STORE_URL", "redis://localhost:6379/0")
+
+DEFAULT_REDIS_KEY = "rag-chatbot:sessions"
+
+
+def decode(reply: object) -> str | None:
+    """Text of a Redis reply, whether the client decodes the responses or not."""
+    if isinstance(reply, bytes):
+        return reply.decode()
+    return reply if isinstance(reply, str) else None
+
+
+class InMemorySessionStore(SessionStoreInterface):
+    """Sessions of the current process, ordered by the last time they were seen.
+
+    As the least recently seen sessions come first, finding the expired ones
+    never scans the active ones.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._last_seen: OrderedDict[str, float] = OrderedDict()
+        self._revisions: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get_last_seen(self, session: str) -> float | None:
+        return self._last_seen.get(session)
+
+    def set_last_seen(self, session: str, seen_at: float) -> None:
+        with self._lock:
+            self._last_seen[session] = seen_at
+            self._last_seen.move_to_end(session)
+
+    def pop_expired(self, before: float, limit: int) -> list[str]:
+        expired: list[str] = []
+        with self._lock:
+            while self._last_seen and len(expired) < limit:
+                session, seen_at = next(iter(self._last_seen.items()))
+                if seen_at >= before:
+                    break
+                del self._last_seen[session]
+                expired.append(session)
+        return expired
+
+    def count(self) -> int:
+        return len(self._last_seen)
+
+    def get_revision(self, session: str) -> str | None:
+        return self._revisions.get(session)
+
+    def swap_revision(self, session: str, revision: str | None) -> str | None:
+        with self._lock:
+            previous = self._revisions.pop(session, None)
+            if revision is not None:
+                self._revisions[session] = revision
+        return previous
+
+
+class SQLiteSessionStore(SessionStoreInterface):
+    """Sessions in a SQLite file shared by the worker processes of a host."""
+
+    def __init__(self, path: str | PathLike = ":memory:"):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if str(path) != ":memory:":
+            # Readers do not wait for the writers of the other processes
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_seen_at ON sessions (seen_at)"
+        )
+        # The previous revision is kept so that an upsert can return it
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS revisions ("
+            "session TEXT PRIMARY KEY, revision TEXT NOT NULL, previous TEXT)"
+        )
+        self._connection.commit()
+
+    def get_last_seen(self, session: str) -> float | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT seen_at FROM sessions WHERE session = ?", (session,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_last_seen(self, session: str, seen_at: float) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?)", (session, seen_at)
+            )
+
+    def pop_expired(self, before: float, limit: int) -> list[str]:
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                "DELETE FROM sessions WHERE session IN ("
+                "SELECT session FROM sessions WHERE seen_at < ? "
+                "ORDER BY seen_at LIMIT ?"
+                ") RETURNING session, seen_at",
+                (before, limit),
+            ).fetchall()
+        return [session for session, _ in sorted(rows, key=lambda row: row[1])]
+
+    def count(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM sessions"
+            ).fetchone()
+        return count
+
+    def get_revision(self, session: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT revision FROM revisions WHERE session = ?", (session,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def swap_revision(self, session: str, revision: str | None) -> str | None:
+        with self._lock, self._connection:
+            if revision is None:
+                row = self._connection.execute(
+                    "DELETE FROM revisions WHERE session = ? RETURNING revision",
+                    (session,),
+                ).fetchone()
+            else:
+                row = self._connection.execute(
+                    "INSERT INTO revisions VALUES (?, ?, NULL) "
+                    "ON CONFLICT (session) DO UPDATE SET "
+                    "previous = revision, revision = excluded.revision "
+                    "RETURNING previous",
+                    (session, revision),
+                ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class RedisSessionStore(SessionStoreInterface):
+    """Sessions in a sorted set of a Redis server, scored by last seen time.
+
+    Shared by every worker and replica. Expired sessions cannot be seen
+    again, so reading them and removing them in two commands is safe.
+    """
+
+    def __init__(self, client: Redis, key: str = DEFAULT_REDIS_KEY):
+        self.client = client
+        self.key = key
+
+    def _revision_key(self, session: str) -> str:
+        return f"{self.key}:revision:{session}"
+
+    def get_last_seen(self, session: str) -> float | None:
+        return self.client.zscore(self.key, session)
+
+    def set_last_seen(self, session: str, seen_at: float) -> None:
+        self.client.zadd(self.key, {session: seen_at})
+
+    def pop_expired(self, before: float, limit: int) -> list[str]:
+        reply = self.client.zrangebyscore(
+            self.key, "-inf", f"({before!r}", start=0, num=limit
+        )
+        expired = [session for member in reply if (session := decode(member))]
+        if expired:
+            self.client.zrem(self.key, *expired)
+        return expired
+
+    def count(self) -> int:
+        return self.client.zcard(self.key)
+
+    def get_revision(self, session: str) -> str | None:
+        return decode(self.client.get(self._revision_key(session)))
+
+    def swap_revision(self, session: str, revision: str | None) -> str | None:
+        if revision is None:
+            return decode(self.client.getdel(self._revision_key(session)))
+        return decode(self.client.set(self._revision_key(session), revision, get=True))
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def create_session_store(kind: str = SESSION_STORE) -> SessionStoreInterface:
+    if kind == "memory":
+        return InMemorySessionStore()
+    if kind == "sqlite":
+        return SQLiteSessionStore(SESSION_STORE_PATH)
+    if kind == "redis":
+        return RedisSessionStore(Redis.from_url(SESSION_STORE_URL))
+    raise ValueError(
+        f"Invalid SESSION_STORE: {kind}. Must be 'memory', 'sqlite' or 'redis'."
+    )
@@ -0,0 +1,51 @@
+"""Incremental splitting of text received in pieces."""
+
+from collections.abc import AsyncIterable, AsyncIterator
+
+
+class StreamingTextSplitter:
+    """Split text arriving in pieces without holding the whole text in memory.
+
+    Produces the same chunks as ``CharacterTextSplitter`` configured with the
+    same ``chunk_size`` and ``separator`` and no chunk overlap: the text is
+    cut on the separator and the pieces are greedily merged up to
+    ``chunk_size`` characters. Unlike ``CharacterTextSplitter``, a text
+    running longer than ``chunk_size`` without separator is cut every
+    ``chunk_size`` characters, so the buffered text stays bounded.
+    """
+
+    def __init__(self, chunk_size: int = 200, separator: str = "\n"):
+        if not separator:
+            raise ValueError("The separator must be a non-empty string.")
+        self.chunk_size = chunk_size
+        self.separator = separator
+
+    async def _splits(self, pieces: AsyncIterable[str]) -> AsyncIterator[str]:
+        buffer = ""
+        async for piece in pieces:
+            buffer += piece
+            *splits, buffer = buffer.split(self.separator)
+            for split in splits:
+                for start in range(0, len(split), self.chunk_size):
+                    yield split[start : start + self.chunk_size]
+            # The end of a separator may be in the next piece
+            while len(buffer) >= self.chunk_size + len(self.separator):
+                yield buffer[: self.chunk_size]
+                buffer = buffer[self.chunk_size :]
+        for start in range(0, len(buffer), self.chunk_size):
+            yield buffer[start : start + self.chunk_size]
+
+    async def split(self, pieces: AsyncIterable[str]) -> AsyncIterator[str]:
+        """Yield every chunk as soon as the text following it is received."""
+        current: list[str] = []
+        total = 0
+        async for split in self._splits(pieces):
+            separator_length = len(self.separator) if current else 0
+            if current and total + len(split) + separator_length > self.chunk_size:
+                if chunk := self.separator.join(current).strip():
+                    yield chunk
+                current, total, separator_length = [], 0, 0
+            current.append(split)
+            total += len(split) + separator_length
+        if chunk := self.separator.join(current).strip():
+            yield chunk
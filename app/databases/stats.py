@@ -0,0 +1,69 @@
+"""Incrementally maintained statistics of the vectors of a session."""
+
+from collections import Counter
+from collections.abc import Iterable
+
+from app.ports.database import VectorStatistics
+
+HISTOGRAM_BUCKET_SIZE = 50
+
+
+class SessionStatistics:
+    """Count, total and longest length of the chunks stored for a session.
+
+    Lengths are tracked by chunk ID so re-adding a stored chunk is a no-op,
+    and every update costs O(1) per chunk regardless of the corpus size.
+    """
+
+    def __init__(self):
+        self._lengths_by_id: dict[str, int] = {}
+        self._lengths: Counter[int] = Counter()
+        self.total_characters = 0
+        self.longest = 0
+
+    @property
+    def count(self) -> int:
+        return len(self._lengths_by_id)
+
+    def add(self, chunks: Iterable[tuple[str, str]]) -> None:
+        """Record ``(id, text)`` chunks stored in the database."""
+        for chunk_id, text in chunks:
+            if chunk_id in self._lengths_by_id:
+                continue
+            length = len(text)
+            self._lengths_by_id[chunk_id] = length
+            self._lengths[length] += 1
+            self.total_characters += length
+            self.longest = max(self.longest, length)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Forget chunks deleted from the database."""
+        for chunk_id in ids:
+            length = self._lengths_by_id.pop(chunk_id, None)
+            if length is None:
+                continue
+            self._lengths[length] -= 1
+            self.total_characters -= length
+            if not self._lengths[length]:
+                del self._lengths[length]
+                if length == self.longest:
+                    # Bounded by the number of distinct chunk lengths
+                    self.longest = max(self._lengths, default=0)
+
+    def histogram(self, bucket_size: int = HISTOGRAM_BUCKET_SIZE) -> dict[str, int]:
+        """Number of chunks per range of lengths, e.g. ``{"0-49": 3}``."""
+        buckets: Counter[int] = Counter()
+        for length, count in self._lengths.items():
+            buckets[length // bucket_size] += count
+        return {
+            f"{bucket * bucket_size}-{(bucket + 1) * bucket_size - 1}": buckets[bucket]
+            for bucket in sorted(buckets)
+        }
+
+    def summary(self) -> VectorStatistics:
+        return {
+            "number_of_vectors": self.count,
+            "longest_vector": self.longest,
+            "total_characters": self.total_characters,
+            "length_histogram": self.histogram(),
+        }
@@ -1,35 +1,88 @@
+import asyncio
 import logging
 import os
 from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from typing import TypedDict
 
+import httpx
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from nicegui.ui_run_with import run_with
 
 from app.agents import CohereAgent, FakeAgent
+from app.agents.info import AgentInfo, describe_agent
 from app.api.database import router as db_router
 from app.api.prompting import router as query_router
 from app.databases import ChromaDatabaseManager, FakeDatabaseManager
+from app.databases.chroma_database import ChromaSettings
+from app.databases.session_store import create_session_store
 from app.middleware import SessionCookieMiddleware
 from app.ports import AIAgentInterface, DatabaseManagerInterface
+from app.sessions import DEFAULT_SESSION_TTL, SessionRegistry
 from app.ui import setup_pages
+from app.ui.http_client import get_base_url
+from app.ui.services.api import (
+    DEFAULT_TIMEOUT,
+    ApiService,
+    HttpApiService,
+    InProcessApiService,
+    create_http_client,
+)
+from app.usecases.answer_cache import DEFAULT_MAX_SIZE, DEFAULT_TTL, AnswerCache
+from app.usecases.prefetch import DEFAULT_MIN_INTERVAL, ContextPrefetcher
+from app.usecases.sessions import (
+    DEFAULT_REAPER_BATCH_SIZE,
+    DEFAULT_REAPER_INTERVAL,
+    run_session_reaper,
+)
 
 logger = logging.getLogger("uvicorn")
 
+# "in-process" pages call the use cases directly, "http" pages call the API
+UI_API_TRANSPORT = os.getenv("UI_API_TRANSPORT", "in-process")
+UI_HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("UI_HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("UI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.getenv("UI_HTTP_KEEPALIVE_EXPIRY", "5")),
+)
+UI_HTTP_TIMEOUT = float(os.getenv("UI_HTTP_TIMEOUT", DEFAULT_TIMEOUT))
+
+SESSION_TTL = int(os.getenv("SESSION_TTL", DEFAULT_SESSION_TTL))
+SESSION_REAPER_INTERVAL = float(
+    os.getenv("SESSION_REAPER_INTERVAL", DEFAULT_REAPER_INTERVAL)
+)
+SESSION_REAPER_BATCH_SIZE = int(
+    os.getenv("SESSION_REAPER_BATCH_SIZE", DEFAULT_REAPER_BATCH_SIZE)
+)
+
 
 class State(TypedDict):
     db: DatabaseManagerInterface
     agent: AIAgentInterface
-    cookies: set[str]
+    agent_info: AgentInfo
+    answer_cache: AnswerCache
+    prefetcher: ContextPrefetcher
+    cookies: SessionRegistry
+    ui_api: ApiService
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[State]:
     _ = app
-    if not os.getenv("COHERE_API_KEY"):
+    # Shared by the workers, which also learn from it the documents changed
+    session_store = create_session_store()
+    if not os.getenv("COHERE_API_KEY") and os.getenv("EMBEDDING_PROVIDER") == "local":
+        logger.warning(
+            "COHERE_API_KEY is not set. "
+            "Using ChromaDatabase with local embeddings and FakeAgent."
+        )
+        db = ChromaDatabaseManager(
+            ChromaSettings(embedding_provider="local"), session_store=session_store
+        )
+        agent = FakeAgent()
+    elif not os.getenv("COHERE_API_KEY"):
         logger.warning(
             "COHERE_API_KEY is not set. "
             "Using FakeDatabase and FakeAgent for testing purposes."
@@ -38,10 +91,59 @@ async def lifespan(app: FastAPI) -> AsyncIterator[State]:
         db = FakeDatabaseManager()
         agent = FakeAgent()
     else:
-        db = ChromaDatabaseManager()
+        db = ChromaDatabaseManager(session_store=session_store)
         agent = CohereAgent()
 
-    yield {"db": db, "agent": agent, "cookies": set()}
+    await asyncio.to_thread(db.warm_up)
+
+    answer_cache = AnswerCache(
+        max_size=int(os.getenv("ANSWER_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE)),
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", DEFAULT_TTL)),
+    )
+
+    prefetcher = ContextPrefetcher(
+        min_interval=float(os.getenv("PREFETCH_MIN_INTERVAL", DEFAULT_MIN_INTERVAL)),
+        enabled=os.getenv("PREFETCH_CONTEXT", "true").lower() == "true",
+    )
+
+    # The agent does not change while the application runs
+    agent_info = describe_agent(agent, db)
+
+    ui_api: ApiService = (
+        HttpApiService(
+            create_http_client(get_base_url(), UI_HTTP_LIMITS, UI_HTTP_TIMEOUT)
+        )
+        if UI_API_TRANSPORT == "http"
+        else InProcessApiService(db, agent, answer_cache, agent_info, prefetcher)
+    )
+
+    # The database is only scanned when the store cannot know its sessions.
+    # Those found are given a full TTL, then their data is deleted unless
+    # their client comes back
+    sessions = SessionRegistry(session_store, ttl=SESSION_TTL)
+    await sessions.restore(db.get_sessions)
+    reaper = asyncio.create_task(
+        run_session_reaper(
+            db, sessions, SESSION_REAPER_INTERVAL, SESSION_REAPER_BATCH_SIZE
+        )
+    )
+
+    try:
+        yield {
+            "db": db,
+            "agent": agent,
+            "agent_info": agent_info,
+            "answer_cache": answer_cache,
+            "prefetcher": prefetcher,
+            "cookies": sessions,
+            "ui_api": ui_api,
+        }
+    finally:
+        reaper.cancel()
+        with suppress(asyncio.CancelledError):
+            await reaper
+        sessions.close()
+        await ui_api.aclose()
 
 
 app = FastAPI(title="AI RAG Assistant", lifespan=lifespan)
@@ -52,7 +154,7 @@ if analytics_id := os.getenv("ANALYTICS_ID"):
 
     app.add_middleware(Analytics, api_key=analytics_id)
 
-app.add_middleware(SessionCookieMiddleware, cookie_name="SESSION")
+app.add_middleware(SessionCookieMiddleware, cookie_name="SESSION", max_age=SESSION_TTL)
 
 # Include API routers
 app.include_router(db_router)
@@ -1,69 +1,90 @@
 import uuid
-from http.cookies import SimpleCookie
+from collections.abc import Iterable
 
 from starlette.datastructures import MutableHeaders
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.sessions import DEFAULT_SESSION_TTL, SessionRegistry
+
+# Scope key holding the session of the request, so it is parsed only once
+SESSION_SCOPE_KEY = "session_cookie"
+
+COOKIE_SEPARATORS = b"; \t"
+
+
+def find_cookie(headers: Iterable[tuple[bytes, bytes]], name: bytes) -> str | None:
+    """Value of the cookie ``name``, scanning the raw ``cookie`` headers.
+
+    Only the bytes of the value are copied, unlike ``SimpleCookie`` which
+    parses every cookie of the header.
+    """
+    for header, value in headers:
+        if header != b"cookie":
+            continue
+        start = value.find(name)
+        while start != -1:
+            end = start + len(name)
+            if (start == 0 or value[start - 1] in COOKIE_SEPARATORS) and value[
+                end : end + 1
+            ] == b"=":
+                stop = value.find(b";", end)
+                cookie = value[end + 1 : stop if stop != -1 else len(value)].strip()
+                return cookie.strip(b'"').decode("latin-1")
+            start = value.find(name, end)
+    return None
+
 
 class SessionCookieMiddleware:
-    def __init__(self, app: ASGIApp, cookie_name: str = "SESSION"):
+    def __init__(
+        self,
+        app: ASGIApp,
+        cookie_name: str = "SESSION",
+        max_age: int = DEFAULT_SESSION_TTL,
+    ):
         self.app = app
         self.cookie_name = cookie_name
+        self.max_age = max_age
+        self._name = cookie_name.encode("latin-1")
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
 
-        session_cookie = self._get_cookie_from_scope(scope)
-        cookies: set[str] = scope["state"].get("cookies", set())
-        valid_session = session_cookie and session_cookie in cookies
+        session_cookie = find_cookie(scope.get("headers", ()), self._name)
+        sessions: SessionRegistry = scope["state"]["cookies"]
 
-        if not valid_session:
-            new_session = str(uuid.uuid4())
-            cookies.add(new_session)
-            scope["state"]["cookies"] = cookies
-            self._set_cookie_in_scope(scope, new_session)
+        if session_cookie and await sessions.contains(session_cookie):
+            # Fast path: nothing to copy nor to add to the response
+            await sessions.add(session_cookie)  # Refreshes the last time it was seen
+            scope[SESSION_SCOPE_KEY] = session_cookie
+            await self.app(scope, receive, send)
+            return
+
+        new_session = str(uuid.uuid4())
+        await sessions.add(new_session)
+        scope[SESSION_SCOPE_KEY] = new_session
+        self._set_cookie_in_scope(scope, new_session)
+        set_cookie = (
+            f"{self.cookie_name}={new_session}; "
+            f"HttpOnly; Max-Age={self.max_age}; Path=/"
+        )
 
         async def send_wrapper(message: Message) -> None:
-            if message["type"] == "http.response.start" and not valid_session:
-                headers = MutableHeaders(scope=message)
-                cookie_value = self._get_cookie_from_scope(scope)
-                set_cookie = (
-                    f"{self.cookie_name}={cookie_value}; "
-                    f"HttpOnly; Max-Age={60 * 60 * 24 * 30}; Path=/"
-                )
-                headers.append("set-cookie", set_cookie)
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("set-cookie", set_cookie)
             await send(message)
 
         await self.app(scope, receive, send_wrapper)
 
-    def _get_cookie_from_scope(self, scope: Scope) -> str | None:
-        headers = dict(scope.get("headers", []))
-        cookie_header = headers.get(b"cookie", b"").decode()
-        if not cookie_header:
-            return None
-        cookie = SimpleCookie()
-        cookie.load(cookie_header)
-        if self.cookie_name in cookie:
-            return cookie[self.cookie_name].value
-        return None
-
     def _set_cookie_in_scope(self, scope: Scope, value: str) -> None:
-        headers = list(scope.get("headers", []))
-        cookie_header = None
-        cookie_index = None
-        for i, (name, val) in enumerate(headers):
+        """Add the new session to the ``cookie`` header seen by the app."""
+        headers = scope.setdefault("headers", [])
+        if not isinstance(headers, list):
+            headers = scope["headers"] = list(headers)
+        new_cookie_part = self._name + b"=" + value.encode("latin-1")
+        for index, (name, cookie_header) in enumerate(headers):
             if name == b"cookie":
-                cookie_header = val.decode()
-                cookie_index = i
-                break
-
-        new_cookie_part = f"{self.cookie_name}={value}"
-        if cookie_header and cookie_index is not None:
-            new_cookie_header = f"{cookie_header}; {new_cookie_part}"
-            headers[cookie_index] = (b"cookie", new_cookie_header.encode())
-        else:
-            headers.append((b"cookie", new_cookie_part.encode()))
-
-        scope["headers"] = headers
+                headers[index] = (b"cookie", cookie_header + b"; " + new_cookie_part)
+                return
+        headers.append((b"cookie", new_cookie_part))
@@ -1,4 +1,5 @@
 from app.ports.agent import AIAgentInterface
 from app.ports.database import DatabaseManagerInterface
+from app.ports.sessions import SessionStoreInterface
 
-__all__ = ["DatabaseManagerInterface", "AIAgentInterface"]
+__all__ = ["DatabaseManagerInterface", "AIAgentInterface", "SessionStoreInterface"]
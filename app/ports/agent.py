@@ -27,6 +27,7 @@ template: str = """
 
 class AIAgentInterface(ABC):
     prompt_template: str = template
+    model_name: str = ""
 
     @abstractmethod
     async def query_with_context(self, question: str, context: str) -> str:
@@ -1,21 +1,60 @@
 from abc import ABC, abstractmethod
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterable, Iterator
 from os import PathLike
+from typing import TypedDict
+
+
+class VectorStatistics(TypedDict):
+    number_of_vectors: int
+    longest_vector: int
+    total_characters: int
+    length_histogram: dict[str, int]
+
+
+DEFAULT_PAGE_SIZE = 100
 
 
 class DatabaseManagerInterface[DB](ABC):
     db: DB
+    # Model embedding the chunks, None when they are not embedded
+    embedding_model: str | None = None
+
+    def warm_up(self) -> None:
+        """Load the database in memory ahead of the first query."""
 
     @abstractmethod
     def get_chunks(self, cookie: str | None = None) -> list[str]:
         """Return all chunks stored in the database."""
 
+    @abstractmethod
+    def get_chunks_page(
+        self, offset: int, limit: int, cookie: str | None = None
+    ) -> list[str]:
+        """Return at most ``limit`` chunks, skipping the first ``offset`` ones."""
+
+    def iter_chunks(
+        self, cookie: str | None = None, page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Iterator[str]:
+        """Iterate over the chunks stored in the database one page at a time."""
+        offset = 0
+        while page := self.get_chunks_page(offset, page_size, cookie):
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += len(page)
+
     @abstractmethod
     def add_text_to_db(  # ty workaround
         self, text: str, cookie: str | None = None
     ) -> AsyncGenerator[float, None]:
         """Add text to the database, yielding progress percentage."""
 
+    @abstractmethod
+    def add_text_stream_to_db(  # ty workaround
+        self, pieces: AsyncIterable[str], cookie: str | None = None
+    ) -> AsyncGenerator[int, None]:
+        """Add text received in pieces, yielding the number of chunks stored."""
+
     @abstractmethod
     async def get_context(self, question: str, cookie: str | None = None) -> str:
         """Retrieve relevant context for a question."""
@@ -28,6 +67,14 @@ class DatabaseManagerInterface[DB](ABC):
     def get_length_of_longest_vector(self, cookie: str | None = None) -> int:
         """Return the length of the longest vector."""
 
+    @abstractmethod
+    def get_statistics(self, cookie: str | None = None) -> VectorStatistics:
+        """Return the statistics of the vectors in the database."""
+
+    @abstractmethod
+    def get_sessions(self) -> set[str]:
+        """Return the sessions having chunks stored in the database."""
+
     @abstractmethod
     def empty_database(self, cookie: str | None = None):
         """Clear all data from the database."""
@@ -12,6 +12,14 @@ class EmbeddingAPILimitError(Exception):
     status_code: int = 429
     content: object
 
-    def __init__(self, content: object = None, chunks_uploaded: int = 0):
+    def __init__(
+        self,
+        content: object = None,
+        chunks_uploaded: int = 0,
+        chunks_total: int | None = None,
+    ):
         self.content = content
+        # Chunks already stored: uploading the same text again resumes from there
         self.chunks_uploaded = chunks_uploaded
+        # None when the text was not split to the end, e.g. when streamed
+        self.chunks_total = chunks_total
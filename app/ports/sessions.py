@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+
+
+class SessionStoreInterface(ABC):
+    """Last time every session was seen, shared by the worker processes.
+
+    The store also keeps the revision of the documents of every session, a
+    random token replaced on every change, so that a worker can tell when
+    another one changed the documents it cached.
+    """
+
+    # Whether other processes see the sessions of the store
+    shared = True
+
+    @abstractmethod
+    def get_last_seen(self, session: str) -> float | None:
+        """Return the time the session was last seen, None if it is unknown."""
+
+    @abstractmethod
+    def set_last_seen(self, session: str, seen_at: float) -> None:
+        """Register a session, or update the time it was last seen."""
+
+    @abstractmethod
+    def pop_expired(self, before: float, limit: int) -> list[str]:
+        """Remove and return at most ``limit`` sessions last seen before ``before``."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Return the number of sessions stored."""
+
+    @abstractmethod
+    def get_revision(self, session: str) -> str | None:
+        """Return the revision of the documents of a session, None if unset."""
+
+    @abstractmethod
+    def swap_revision(self, session: str, revision: str | None) -> str | None:
+        """Replace the revision of a session, None removing it.
+
+        Returns the previous revision, read in the same atomic operation.
+        """
+
+    def close(self) -> None:
+        """Release the connection to the store."""
@@ -0,0 +1,103 @@
+"""Registry of the sessions issued to the clients."""
+
+import asyncio
+import time
+from collections.abc import Callable, Iterable
+
+from app.cache import LRUCache
+from app.ports.sessions import SessionStoreInterface
+
+DEFAULT_SESSION_TTL = 60 * 60 * 24 * 30
+# Seconds a worker trusts its own copy of the last time a session was seen
+DEFAULT_CACHE_TTL = 60.0
+DEFAULT_CACHE_SIZE = 10_000
+
+
+class SessionRegistry:
+    """Sessions and the last time they were seen, kept in a session store.
+
+    A session not seen for ``ttl`` seconds is expired: it is no longer
+    recognized, and it is handed out by ``pop_expired`` so that its data can
+    be deleted. Times are wall clock times, as the store may be shared by
+    several processes.
+
+    A small local cache serves the sessions seen recently without a round
+    trip to the store, and a session is written back at most once per
+    ``cache_ttl`` seconds. The store is only called in a worker thread, so
+    that its I/O never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        store: SessionStoreInterface,
+        ttl: float = DEFAULT_SESSION_TTL,
+        clock: Callable[[], float] = time.time,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+    ):
+        if ttl <= 0:
+            raise ValueError("ttl must be a positive number.")
+        self.ttl = ttl
+        self.store = store
+        self._clock = clock
+        self._cache_ttl = min(cache_ttl, ttl / 10)
+        self._last_seen: LRUCache[str, float] = LRUCache(DEFAULT_CACHE_SIZE)
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self.store.count)
+
+    async def contains(self, session: str) -> bool:
+        """Whether a session is registered and not expired."""
+        now = self._clock()
+        last_seen = self._last_seen.get(session)
+        if last_seen is None or now - last_seen > self._cache_ttl:
+            # Another worker may have seen the session since
+            last_seen = await asyncio.to_thread(self.store.get_last_seen, session)
+            if last_seen is None:
+                return False
+            self._last_seen.set(session, last_seen)
+        return now - last_seen <= self.ttl
+
+    async def add(self, session: str) -> None:
+        """Register a session, or mark it as seen now."""
+        now = self._clock()
+        last_seen = self._last_seen.get(session)
+        if last_seen is None or now - last_seen > self._cache_ttl:
+            # Cached first, so that concurrent requests write it back once
+            self._last_seen.set(session, now)
+            await asyncio.to_thread(self.store.set_last_seen, session, now)
+
+    def _register_unknown(self, sessions: Iterable[str], now: float) -> None:
+        for session in sessions:
+            if self.store.get_last_seen(session) is None:
+                self.store.set_last_seen(session, now)
+
+    async def update(self, sessions: Iterable[str]) -> None:
+        """Register the sessions not known by the store yet."""
+        await asyncio.to_thread(self._register_unknown, sessions, self._clock())
+
+    async def restore(self, load_sessions: Callable[[], Iterable[str]]) -> bool:
+        """Register the sessions of the database, unless the store kept them.
+
+        A shared store outlives the processes, so the database is only
+        scanned while the store is empty, e.g. on the first start. An
+        in-memory store loses the sessions with the previous process.
+
+        Returns:
+            Whether the database was scanned.
+        """
+        if self.store.shared and await self.count():
+            return False
+        await self.update(await asyncio.to_thread(load_sessions))
+        return True
+
+    async def pop_expired(self, limit: int) -> list[str]:
+        """Remove and return at most ``limit`` expired sessions, oldest first."""
+        expired = await asyncio.to_thread(
+            self.store.pop_expired, self._clock() - self.ttl, limit
+        )
+        for session in expired:
+            self._last_seen.pop(session)
+        return expired
+
+    def close(self) -> None:
+        self.store.close()
@@ -1,21 +1,41 @@
 """Chat UI components and handlers."""
 
+import asyncio
 import json
+import os
+from contextlib import suppress
 
-import httpx
-from httpx_sse import aconnect_sse
-from nicegui import ui
+from nicegui import events, ui
 from nicegui.elements.scroll_area import ScrollArea
 
-from app.ui.http_client import create_client
-from app.ui.services.chat import ChatService, Message
+from app.ui.http_client import get_api_service, get_session
+from app.ui.services.api import ApiServiceError
+from app.ui.services.chat import ChatService, Message, TokenBuffer
+
+# Messages rendered when the page opens, and per older page loaded on scroll
+HISTORY_PAGE_SIZE = 30
+# Distance to the top of the scroll area, in pixels, loading the older messages
+LOAD_OLDER_THRESHOLD = 50
+# Retrieve the context of the question while it is typed, ahead of the query
+SPECULATIVE_RETRIEVAL = os.getenv("UI_SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+# Seconds between two speculative retrievals while the user is typing
+SPECULATIVE_RETRIEVAL_INTERVAL = 1.0
+# Seconds between two renderings of the tokens of a streamed answer
+FLUSH_INTERVAL = 0.05
+# Appends to the text node rendered by Vue, so that setting the text of the
+# label at the end replaces the text instead of duplicating it
+APPEND_TEXT_JS = (
+    "{{const node = getHtmlElement({id}).firstChild;"
+    " if (node && node.nodeType === Node.TEXT_NODE) node.appendData({text});}}"
+)
 
 
 def add_message_to_ui(
     messages_area: ui.column,
     message: Message,
+    index: int | None = None,
 ) -> ui.label:
-    """Add a message bubble to the chat UI."""
+    """Add a message bubble to the chat UI, at ``index`` or at the end."""
     is_user = message.role == "user"
     alignment = "items-end" if is_user else "items-start"
     bg_color = "bg-blue-600 text-white" if is_user else "bg-gray-100 text-gray-800"
@@ -25,7 +45,7 @@ def add_message_to_ui(
     )
 
     with messages_area:
-        with ui.column().classes(f"w-full {alignment}"):
+        with ui.column().classes(f"w-full {alignment}") as bubble:
             with ui.row().classes(
                 "items-end gap-2 max-w-3xl" + (" flex-row-reverse" if is_user else "")
             ):
@@ -40,6 +60,8 @@ def add_message_to_ui(
                         f"px-4 py-2 rounded-2xl {bg_color} whitespace-pre-wrap"
                     )
                     ui.label(message.timestamp).classes("text-xs text-gray-400 px-2")
+    if index is not None:
+        bubble.move(target_index=index)
 
     return msg_label
 
@@ -73,27 +95,50 @@ async def stream_ai_response(
     question: str,
     response_label: ui.label,
     chat_container: ScrollArea,
+    flush_interval: float = FLUSH_INTERVAL,
 ) -> str:
-    """Stream AI response from the API and return the full response."""
-    full_response = ""
-    async with create_client() as client:
-        async with aconnect_sse(
-            client, "POST", "/query-stream", json=question
-        ) as event_source:
-            async for sse in event_source.aiter_sse():
-                try:
-                    chunk = json.loads(sse.data)
-                except json.JSONDecodeError:
-                    chunk = sse.data
-                full_response += chunk
-                response_label.set_text(full_response)
-                chat_container.scroll_to(percent=1.01)
-
+    """Stream AI response from the API and return the full response.
+
+    The tokens received are appended to the label every ``flush_interval``
+    seconds, sending only the new text to the browser; the label is set to
+    the full response once at the end.
+    """
+    buffer = TokenBuffer()
+
+    def render() -> None:
+        if delta := buffer.flush():
+            response_label.client.run_javascript(
+                APPEND_TEXT_JS.format(id=response_label.id, text=json.dumps(delta))
+            )
+            chat_container.scroll_to(percent=1.01)
+
+    async def render_periodically() -> None:
+        while True:
+            await asyncio.sleep(flush_interval)
+            render()
+
+    renderer = asyncio.create_task(render_periodically())
+    try:
+        async for chunk in get_api_service().query_stream(question, get_session()):
+            buffer.add(chunk)
+    finally:
+        renderer.cancel()
+        with suppress(asyncio.CancelledError):
+            await renderer
+
+    full_response = buffer.text
+    response_label.set_text(full_response)
+    chat_container.scroll_to(percent=1.01)
     return full_response
 
 
 class ChatHandler:
-    """Thin UI handler that delegates business logic to ChatService."""
+    """Thin UI handler that delegates business logic to ChatService.
+
+    Only the last page of the history is rendered when the page opens; older
+    pages are added above it when the chat is scrolled to the top, leaving
+    the rendered messages in place.
+    """
 
     def __init__(
         self,
@@ -109,12 +154,50 @@ class ChatHandler:
         self.input_field = input_field
         self.send_btn = send_btn
         self.is_loading = False
+        # Stored messages rendered, counted from the end of the history
+        self.rendered = 0
+        self.has_older = False
+        chat_container.on_scroll(self.load_older_messages)
+        if SPECULATIVE_RETRIEVAL:
+            input_field.on(
+                "update:model-value",
+                self.prefetch_context,
+                throttle=SPECULATIVE_RETRIEVAL_INTERVAL,
+                leading_events=False,
+            )
 
     def load_chat_history(self):
-        """Load and display chat history from storage."""
+        """Display the last page of the chat history from storage."""
         self.messages_area.clear()
-        for message in self.service.get_or_create_history():
+        messages, self.has_older = self.service.get_history_page(HISTORY_PAGE_SIZE)
+        if not messages and not self.has_older:
+            messages = self.service.get_or_create_history()
+        for message in messages:
             add_message_to_ui(self.messages_area, message)
+        self.rendered = len(messages)
+        self.chat_container.scroll_to(percent=1.1)
+
+    def load_older_messages(self, e: events.ScrollEventArguments):
+        """Render the previous page of the history above the rendered ones."""
+        if not self.has_older or e.vertical_position > LOAD_OLDER_THRESHOLD:
+            return
+        messages, self.has_older = self.service.get_history_page(
+            HISTORY_PAGE_SIZE, skip=self.rendered
+        )
+        for index, message in enumerate(messages):
+            add_message_to_ui(self.messages_area, message, index=index)
+        self.rendered += len(messages)
+        # Keep the messages that were on screen in view
+        self.chat_container.scroll_to(percent=len(messages) / self.rendered)
+
+    async def prefetch_context(self):
+        """Start retrieving the context of the question being typed."""
+        question = self.input_field.value.strip()
+        if not question or self.is_loading:
+            return
+        # Best effort: the query retrieves the context itself if this fails
+        with suppress(ApiServiceError):
+            await get_api_service().prefetch_context(question, get_session())
 
     async def send_message(self):
         """Send user message and get AI response."""
@@ -129,6 +212,7 @@ class ChatHandler:
         # Add user message (service handles storage)
         user_message = self.service.add_user_message(question)
         add_message_to_ui(self.messages_area, user_message)
+        self.rendered += 1
 
         # Create placeholder for AI response
         ai_timestamp = self.service.create_pending_timestamp()
@@ -145,8 +229,9 @@ class ChatHandler:
             )
             # Save AI response (service handles storage)
             self.service.add_assistant_message(full_response, ai_timestamp)
+            self.rendered += 1
 
-        except httpx.HTTPError as e:
+        except ApiServiceError as e:
             response_label.set_text(f"Error: {e!s}")
             ui.notify(f"Error: {e!s}", type="negative")
 
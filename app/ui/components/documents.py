@@ -3,13 +3,13 @@
 from collections.abc import Callable
 from datetime import datetime
 
-import httpx
 from nicegui import ui
 from nicegui.elements.upload import Upload
 from nicegui.events import UploadEventArguments
 
-from app.ui.http_client import create_client
+from app.ui.http_client import get_api_service, get_session
 from app.ui.services.activity import Activity, ActivityService
+from app.ui.services.api import ApiServiceError
 from app.ui.utils import format_time
 
 
@@ -38,10 +38,7 @@ class StatsHandler:
     async def refresh_stats(self, show_toast: bool = False):
         """Refresh database statistics."""
         try:
-            async with create_client() as client:
-                response = await client.get("/get-vectors-data")
-                response.raise_for_status()
-                data = response.json()
+            data = await get_api_service().get_statistics(get_session())
 
             num_vectors = data.get("number_of_vectors", 0)
             longest = data.get("longest_vector", 0)
@@ -55,7 +52,7 @@ class StatsHandler:
             if show_toast:
                 ui.notify("Statistics refreshed", type="info")
 
-        except httpx.HTTPError as ex:
+        except ApiServiceError as ex:
             ui.notify(f"Failed to load stats: {ex!s}", type="negative")
 
 
@@ -138,7 +135,7 @@ class UploadHandler:
 
         try:
             await self._process_upload(filename, content)
-        except httpx.HTTPError as ex:
+        except ApiServiceError as ex:
             ui.notify(f"Upload failed: {ex!s}", type="negative")
             self.upload_status.set_text(f"Failed: {filename}")
         finally:
@@ -146,28 +143,28 @@ class UploadHandler:
             self.upload_component.reset()
 
     async def _process_upload(self, filename: str, content: str):
-        """Process the file upload via API."""
-        async with create_client() as client:
-            async with client.stream(
-                "POST",
-                "/add-document",
-                files={"file": (filename, content, "text/plain")},
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    progress_text = line.strip()
-                    if progress_text == "API_LIMIT_EXCEEDED":
-                        ui.notify(
-                            "API limit exceeded. Please try again later.",
-                            type="warning",
-                        )
-                        return
-                    try:
-                        pct = int(float(progress_text))
-                        self.progress_bar.set_value(pct / 100)
-                        self.upload_status.set_text(f"Processing {filename}: {pct}%")
-                    except ValueError:
-                        pass
+        """Process the file upload via the API service."""
+        async for line in get_api_service().add_document(
+            filename, content, get_session()
+        ):
+            progress_text = line.strip()
+            if progress_text.startswith("API_LIMIT_EXCEEDED"):
+                _, _, stored = progress_text.partition(":")
+                ui.notify(
+                    f"API limit exceeded after {stored} chunks. "
+                    "Upload the same file later to resume.",
+                    type="warning",
+                )
+                self.upload_status.set_text(
+                    f"Partially uploaded: {filename} ({stored} chunks)"
+                )
+                return
+            try:
+                pct = int(float(progress_text))
+                self.progress_bar.set_value(pct / 100)
+                self.upload_status.set_text(f"Processing {filename}: {pct}%")
+            except ValueError:
+                pass
 
         # Success
         self.progress_bar.set_value(1)
@@ -190,13 +187,11 @@ class DatabaseActionsHandler:
     async def empty_database(self):
         """Empty the database for the current session."""
         try:
-            async with create_client() as client:
-                response = await client.delete("/empty-database")
-                response.raise_for_status()
+            await get_api_service().empty_database(get_session())
 
             ui.notify("Database emptied successfully", type="positive")
             self.activity_handler.add_activity("Emptied database")
             await self.stats_handler.refresh_stats()
 
-        except httpx.HTTPError as ex:
+        except ApiServiceError as ex:
             ui.notify(f"Failed to empty database: {ex!s}", type="negative")
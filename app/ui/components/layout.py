@@ -5,11 +5,12 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Literal
 
-import httpx
 from loguru import logger
 from nicegui import ui
 
-from app.ui.http_client import create_client
+from app.agents.info import AgentInfo
+from app.ui.http_client import get_api_service
+from app.ui.services.api import ApiServiceError
 
 
 def get_qr_code_path() -> Path | None:
@@ -29,16 +30,14 @@ def get_qr_code_path() -> Path | None:
     return None
 
 
-async def get_agent_info() -> dict:
-    """Fetch agent info from the API."""
+async def get_agent_info() -> AgentInfo:
+    """Fetch agent info from the API service."""
     try:
-        async with create_client() as client:
-            response = await client.get("/agent-info")
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPError:
+        return await get_api_service().get_agent_info()
+    except ApiServiceError:
         # Default to production settings if API call fails
         return {
+            "is_fake": False,
             "icon": "smart_toy",
             "label": "RAG Chatbot",
             "embedding_model": "Cohere",
@@ -1,36 +1,31 @@
-"""Shared HTTP client utilities for NiceGUI pages."""
+"""Shared access to the backend for NiceGUI pages."""
 
 import os
 
-import httpx
 from nicegui import context
 
+from app.middleware import SESSION_SCOPE_KEY
+from app.ui.services.api import ApiService
+
 
 def get_base_url() -> str:
     port = os.getenv("PORT", "8000")
     return f"http://127.0.0.1:{port}"
 
 
-def get_session_cookie() -> dict[str, str]:
-    """Extract the SESSION cookie from the current request context."""
+def get_session() -> str:
+    """Return the session of the current page, set by the session middleware."""
     request = context.client.request
-    session_cookie = request.cookies.get("SESSION")
-    if session_cookie:
-        return {"SESSION": session_cookie}
-    return {}
-
+    if session := request.scope.get(SESSION_SCOPE_KEY):
+        return session
+    return request.cookies.get("SESSION", "default")
 
-def create_client() -> httpx.AsyncClient:
-    """Create an httpx AsyncClient configured with the base URL and session cookie.
 
-    Forwards the SESSION cookie from the browser request to maintain session
-    consistency with the API endpoints.
+def get_api_service() -> ApiService:
+    """Return the backend service created by the application lifespan.
 
     Usage:
-        async with create_client() as client:
-            response = await client.get("/endpoint")
+        async for token in get_api_service().query_stream(question, get_session()):
+            ...
     """
-    return httpx.AsyncClient(
-        base_url=get_base_url(),
-        cookies=get_session_cookie(),
-    )
+    return context.client.request.state.ui_api
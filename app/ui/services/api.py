@@ -0,0 +1,245 @@
+"""API service - the operations of the backend used by the UI pages."""
+
+import asyncio
+import json
+import re
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import httpx
+from httpx_sse import aconnect_sse
+
+from app.agents.info import AgentInfo, describe_agent
+from app.api.prompting import TIMING_EVENT
+from app.ports import AIAgentInterface, DatabaseManagerInterface
+from app.ports.database import VectorStatistics
+from app.usecases import add_content_into_db, stream_answer
+from app.usecases.answer_cache import AnswerCache
+from app.usecases.prefetch import ContextPrefetcher
+
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=5.0
+)
+DEFAULT_TIMEOUT = 5.0
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class ApiServiceError(Exception):
+    """Raised when the backend cannot complete an operation."""
+
+
+class ApiService(ABC):
+    """Backend operations on behalf of the session of a page."""
+
+    @abstractmethod
+    async def get_statistics(self, session: str) -> VectorStatistics:
+        """Return the statistics of the vectors of the session."""
+
+    @abstractmethod
+    async def get_agent_info(self) -> AgentInfo:
+        """Return how the agent is presented to the users."""
+
+    @abstractmethod
+    def add_document(  # ty workaround
+        self, filename: str, content: str, session: str
+    ) -> AsyncIterator[str]:
+        """Add a document, yielding the progress lines of the ingestion."""
+
+    @abstractmethod
+    def query_stream(  # ty workaround
+        self, question: str, session: str
+    ) -> AsyncIterator[str]:
+        """Answer a question, yielding the tokens of the answer."""
+
+    @abstractmethod
+    async def prefetch_context(self, question: str, session: str) -> None:
+        """Start retrieving the context of a question about to be asked."""
+
+    @abstractmethod
+    async def empty_database(self, session: str) -> None:
+        """Delete the documents of the session."""
+
+    async def aclose(self) -> None:
+        """Release the resources of the service."""
+
+
+class InProcessApiService(ApiService):
+    """Call the use cases directly, for pages served by the API process."""
+
+    def __init__(
+        self,
+        db: DatabaseManagerInterface,
+        agent: AIAgentInterface,
+        answer_cache: AnswerCache | None = None,
+        agent_info: AgentInfo | None = None,
+        prefetcher: ContextPrefetcher | None = None,
+    ):
+        self.db = db
+        self.agent = agent
+        self.answer_cache = answer_cache
+        self.agent_info = agent_info or describe_agent(agent, db)
+        self.prefetcher = prefetcher or ContextPrefetcher()
+
+    async def get_statistics(self, session: str) -> VectorStatistics:
+        # The database may call the session store, which must not block the loop
+        return await asyncio.to_thread(self.db.get_statistics, session)
+
+    async def get_agent_info(self) -> AgentInfo:
+        return self.agent_info
+
+    async def add_document(
+        self, filename: str, content: str, session: str
+    ) -> AsyncIterator[str]:
+        _ = filename
+        async for line in add_content_into_db(self.db, content, session):
+            yield line
+
+    async def query_stream(self, question: str, session: str) -> AsyncIterator[str]:
+        context = self.prefetcher.retrieve(self.db, question, session)
+        async for token in stream_answer(
+            self.agent, question, context, self.answer_cache
+        ):
+            if isinstance(token, str):
+                yield token
+
+    async def prefetch_context(self, question: str, session: str) -> None:
+        self.prefetcher.prefetch(self.db, question, session)
+
+    async def empty_database(self, session: str) -> None:
+        await asyncio.to_thread(self.db.empty_database, session)
+
+
+class HttpApiService(ApiService):
+    """Call the HTTP API, for pages served apart from the API.
+
+    Every page shares the same client, so connections are kept alive and
+    reused; the session is sent in the cookie header of each request. The
+    agent info is cached as told by its ``Cache-Control`` header, then
+    revalidated with its ETag.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self._clock = clock
+        # Descriptor, ETag and expiry time of the cached agent info
+        self._agent_info: tuple[AgentInfo, str | None, float] | None = None
+
+    @staticmethod
+    def _session_headers(session: str) -> dict[str, str]:
+        return {"Cookie": f"SESSION={session}"}
+
+    async def get_statistics(self, session: str) -> VectorStatistics:
+        try:
+            response = await self.client.get(
+                "/get-vectors-data", headers=self._session_headers(session)
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as err:
+            raise ApiServiceError(str(err)) from err
+
+    async def get_agent_info(self) -> AgentInfo:
+        now = self._clock()
+        cached, etag, expires_at = self._agent_info or (None, None, 0.0)
+        if cached is not None and now < expires_at:
+            return cached
+        headers = {"If-None-Match": etag} if cached is not None and etag else {}
+        try:
+            response = await self.client.get("/agent-info", headers=headers)
+            if cached is None or response.status_code != httpx.codes.NOT_MODIFIED:
+                response.raise_for_status()
+                cached = response.json()
+        except httpx.HTTPError as err:
+            raise ApiServiceError(str(err)) from err
+        max_age = MAX_AGE_PATTERN.search(response.headers.get("cache-control", ""))
+        self._agent_info = (
+            cached,
+            response.headers.get("etag", etag),
+            now + (int(max_age.group(1)) if max_age else 0),
+        )
+        return cached
+
+    async def add_document(
+        self, filename: str, content: str, session: str
+    ) -> AsyncIterator[str]:
+        try:
+            async with self.client.stream(
+                "POST",
+                "/add-document",
+                files={"file": (filename, content, "text/plain")},
+                headers=self._session_headers(session),
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    yield line
+        except httpx.HTTPError as err:
+            raise ApiServiceError(str(err)) from err
+
+    async def query_stream(self, question: str, session: str) -> AsyncIterator[str]:
+        try:
+            async with aconnect_sse(
+                self.client,
+                "POST",
+                "/query-stream",
+                json=question,
+                headers=self._session_headers(session),
+            ) as event_source:
+                async for sse in event_source.aiter_sse():
+                    if sse.event == TIMING_EVENT:
+                        continue
+                    try:
+                        yield json.loads(sse.data)
+                    except json.JSONDecodeError:
+                        yield sse.data
+        except httpx.HTTPError as err:
+            raise ApiServiceError(str(err)) from err
+
+    async def prefetch_context(self, question: str, session: str) -> None:
+        try:
+            response = await self.client.post(
+                "/prefetch-context",
+                json=question,
+                headers=self._session_headers(session),
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as err:
+            raise ApiServiceError(str(err)) from err
+
+    async def empty_database(self, session: str) -> None:
+        try:
+            response = await self.client.delete(
+                "/empty-database", headers=self._session_headers(session)
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as err:
+            raise ApiServiceError(str(err)) from err
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def create_http_client(
+    base_url: str,
+    limits: httpx.Limits = DEFAULT_LIMITS,
+    timeout: float = DEFAULT_TIMEOUT,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    """Client pooling the connections to the API for the lifetime of the app.
+
+    Cookies set by the responses are never stored, so sessions cannot leak
+    between pages.
+    """
+    return httpx.AsyncClient(
+        base_url=base_url,
+        limits=limits,
+        timeout=timeout,
+        cookies=CookieJar(DefaultCookiePolicy(allowed_domains=[])),
+        transport=transport,
+    )
@@ -1,6 +1,7 @@
 """Chat service - pure business logic for chat history management."""
 
-from collections.abc import Callable, MutableMapping
+import os
+from collections.abc import Callable, Iterator, MutableMapping
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
@@ -13,6 +14,11 @@ WELCOME_MESSAGE = (
     "How can I help you today?"
 )
 
+# Messages kept in the history, 0 keeping the whole history
+MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "0")) or None
+# Smallest window keeping a message after trimming
+MIN_MESSAGES = 2
+
 
 @dataclass
 class Message:
@@ -36,19 +42,35 @@ class Message:
         )
 
 
+# Folds the messages dropped from the history into a summary
+Summarizer = Callable[[list[Message]], str]
+
+
 class ChatService:
     """Pure business logic for chat history management.
 
     This service handles all chat-related logic without any UI dependencies,
     making it easily testable.
+
+    The history is stored as an append-only list of message dicts: adding a
+    message appends one dict, and messages are turned into ``Message`` objects
+    only when iterated. The whole history is kept unless ``max_messages`` is
+    set: once the history outgrows it, its oldest messages are dropped in one
+    batch, down to three quarters of the window, and folded into a summary by
+    the optional ``summarizer``. Without a summarizer, the summary tells how
+    many messages were dropped.
     """
 
     STORAGE_KEY = "chat_history"
+    SUMMARY_KEY = "chat_summary"
+    DROPPED_KEY = "chat_dropped"
 
     def __init__(
         self,
         storage: MutableMapping[str, Any],
         time_provider: Callable | None = None,
+        max_messages: int | None = MAX_MESSAGES,
+        summarizer: Summarizer | None = None,
     ):
         """Initialize the chat service.
 
@@ -56,22 +78,92 @@ class ChatService:
             storage: Storage backend for persisting chat history.
             time_provider: Optional callable that returns current datetime.
                           Defaults to datetime.now. Useful for testing.
+            max_messages: Maximum number of messages to keep, None to keep
+                         them all.
+            summarizer: Optional callable folding the dropped messages, preceded
+                       by the previous summary if any, into a new summary.
         """
+        if max_messages is not None and max_messages < MIN_MESSAGES:
+            raise ValueError(f"max_messages must be at least {MIN_MESSAGES}.")
         self.storage = storage
         self._time_provider = time_provider or datetime.now
+        self._max_messages = max_messages
+        self._summarizer = summarizer
 
     def _get_timestamp(self) -> str:
         """Get formatted current timestamp."""
         return format_time(self._time_provider())
 
+    def _raw_history(self) -> list[dict[str, Any]]:
+        """Stored message dicts, created empty if missing."""
+        history = self.storage.get(self.STORAGE_KEY)
+        if history is None:
+            self.storage[self.STORAGE_KEY] = []
+            # Observable storages wrap the list, so read it back
+            history = self.storage[self.STORAGE_KEY]
+        return history
+
+    def iter_history(self) -> Iterator[Message]:
+        """Iterate over the history, deserializing one message at a time."""
+        summary = self.storage.get(self.SUMMARY_KEY)
+        if summary:
+            yield Message.from_dict(summary)
+        for msg in self.storage.get(self.STORAGE_KEY, []):
+            yield Message.from_dict(msg)
+
     def get_history(self) -> list[Message]:
         """Get chat history as list of Message objects."""
-        raw_history = self.storage.get(self.STORAGE_KEY, [])
-        return [Message.from_dict(msg) for msg in raw_history]
+        return list(self.iter_history())
+
+    def get_history_page(self, limit: int, skip: int = 0) -> tuple[list[Message], bool]:
+        """Get the ``limit`` messages preceding the last ``skip`` ones.
 
-    def _save_history(self, messages: list[Message]) -> None:
-        """Save messages to storage."""
-        self.storage[self.STORAGE_KEY] = [msg.to_dict() for msg in messages]
+        Pages are counted from the end of the history, so they stay valid
+        when messages are appended or the oldest ones are trimmed. Only the
+        messages of the page are deserialized.
+
+        Returns:
+            The messages of the page, oldest first, and whether older
+            messages remain.
+        """
+        history = self.storage.get(self.STORAGE_KEY, [])
+        summary = self.storage.get(self.SUMMARY_KEY)
+        offset = 1 if summary else 0
+        end = max(len(history) + offset - skip, 0)
+        start = max(end - limit, 0)
+        messages = [
+            Message.from_dict(msg)
+            for msg in history[max(start - offset, 0) : max(end - offset, 0)]
+        ]
+        if summary and start == 0 and end > 0:
+            messages.insert(0, Message.from_dict(summary))
+        return messages, start > 0
+
+    def _append(self, message: Message) -> Message:
+        """Append a message to the stored history, trimming it if too long."""
+        history = self._raw_history()
+        history.append(message.to_dict())
+        if self._max_messages is not None and len(history) > self._max_messages:
+            self._trim(history, self._max_messages)
+        return message
+
+    def _trim(self, history: list[dict[str, Any]], max_messages: int) -> None:
+        """Drop the oldest messages, folding them into the summary."""
+        dropped = len(history) - max_messages * 3 // 4
+        messages = [Message.from_dict(msg) for msg in history[:dropped]]
+        if self._summarizer is not None:
+            previous = self.storage.get(self.SUMMARY_KEY)
+            if previous:
+                messages.insert(0, Message.from_dict(previous))
+            content = self._summarizer(messages)
+        else:
+            total = self.storage.get(self.DROPPED_KEY, 0) + dropped
+            self.storage[self.DROPPED_KEY] = total
+            content = f"{total} older messages were removed from this conversation."
+        self.storage[self.SUMMARY_KEY] = Message(
+            role="summary", content=content, timestamp=messages[-1].timestamp
+        ).to_dict()
+        del history[:dropped]
 
     def get_or_create_history(self) -> list[Message]:
         """Get existing history or create with welcome message.
@@ -81,13 +173,15 @@ class ChatService:
         """
         history = self.get_history()
         if not history:
-            welcome = Message(
-                role="assistant",
-                content=WELCOME_MESSAGE,
-                timestamp=self._get_timestamp(),
-            )
-            self._save_history([welcome])
-            return [welcome]
+            return [
+                self._append(
+                    Message(
+                        role="assistant",
+                        content=WELCOME_MESSAGE,
+                        timestamp=self._get_timestamp(),
+                    )
+                )
+            ]
         return history
 
     def add_user_message(self, content: str) -> Message:
@@ -99,15 +193,9 @@ class ChatService:
         Returns:
             The created Message object.
         """
-        message = Message(
-            role="user",
-            content=content,
-            timestamp=self._get_timestamp(),
+        return self._append(
+            Message(role="user", content=content, timestamp=self._get_timestamp())
         )
-        history = self.get_history()
-        history.append(message)
-        self._save_history(history)
-        return message
 
     def add_assistant_message(
         self, content: str, timestamp: str | None = None
@@ -121,15 +209,13 @@ class ChatService:
         Returns:
             The created Message object.
         """
-        message = Message(
-            role="assistant",
-            content=content,
-            timestamp=timestamp or self._get_timestamp(),
+        return self._append(
+            Message(
+                role="assistant",
+                content=content,
+                timestamp=timestamp or self._get_timestamp(),
+            )
         )
-        history = self.get_history()
-        history.append(message)
-        self._save_history(history)
-        return message
 
     def clear_history(self) -> list[Message]:
         """Clear chat history and return fresh history with welcome message.
@@ -138,6 +224,8 @@ class ChatService:
             New history with welcome message.
         """
         self.storage[self.STORAGE_KEY] = []
+        self.storage.pop(self.SUMMARY_KEY, None)
+        self.storage.pop(self.DROPPED_KEY, None)
         return self.get_or_create_history()
 
     def create_pending_timestamp(self) -> str:
@@ -147,3 +235,31 @@ class ChatService:
         that will be filled in later via streaming.
         """
         return self._get_timestamp()
+
+
+class TokenBuffer:
+    """Tokens of an answer being streamed, rendered by batches.
+
+    Tokens are appended to a list and joined once per flush, so the text is
+    built in linear time. Each flush returns only the text added since the
+    previous one.
+    """
+
+    def __init__(self):
+        self._tokens: list[str] = []
+        self._flushed = 0
+
+    def add(self, token: str) -> None:
+        """Buffer a token until the next flush."""
+        self._tokens.append(token)
+
+    def flush(self) -> str:
+        """Return the text buffered since the previous flush."""
+        delta = "".join(self._tokens[self._flushed :])
+        self._flushed = len(self._tokens)
+        return delta
+
+    @property
+    def text(self) -> str:
+        """The whole text received so far."""
+        return "".join(self._tokens)
@@ -1,7 +1,25 @@
-from collections.abc import AsyncIterator
+import codecs
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
 
 from app.ports import AIAgentInterface, DatabaseManagerInterface
 from app.ports.errors import EmbeddingAPILimitError, TooManyRequestsError
+from app.usecases.answer_cache import AnswerCache, split_into_tokens
+
+RETRIEVAL_STAGE = "retrieval"
+FIRST_TOKEN_STAGE = "first_token"
+
+
+def api_limit_exceeded(err: EmbeddingAPILimitError) -> str:
+    """Signal of the API limit, with the number of chunks stored so far out of
+    the total, or alone when the total is unknown.
+
+    The frontend looks for this specific string.
+    """
+    if err.chunks_total is None:
+        return f"API_LIMIT_EXCEEDED:{err.chunks_uploaded}\n"
+    return f"API_LIMIT_EXCEEDED:{err.chunks_uploaded}/{err.chunks_total}\n"
 
 
 async def add_content_into_db(
@@ -10,10 +28,47 @@ async def add_content_into_db(
     try:
         async for percentage in db.add_text_to_db(content, cookie):
             yield f"{percentage}\n"
-    except EmbeddingAPILimitError:
-        # Return a special signal to indicate API limit reached
-        # The frontend should look for this specific string
-        yield "API_LIMIT_EXCEEDED\n"
+    except EmbeddingAPILimitError as err:
+        yield api_limit_exceeded(err)
+
+
+async def decode_utf8(blocks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode UTF-8 blocks, even when a character spans two of them."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for block in blocks:
+        if text := decoder.decode(block):
+            yield text
+    # Raises on a truncated character at the end of the input
+    decoder.decode(b"", final=True)
+
+
+async def add_stream_into_db(
+    db: DatabaseManagerInterface,
+    blocks: AsyncIterable[bytes],
+    size: int | None = None,
+    cookie: str | None = None,
+) -> AsyncIterator[str]:
+    """Ingest an UTF-8 file read block by block, yielding the percentage read.
+
+    Reading waits for the embedding of the previous chunks, so the share of
+    the file read is a close estimate of the share stored.
+    """
+    read = 0
+
+    async def count_bytes() -> AsyncIterator[bytes]:
+        nonlocal read
+        async for block in blocks:
+            read += len(block)
+            yield block
+
+    try:
+        async for _ in db.add_text_stream_to_db(decode_utf8(count_bytes()), cookie):
+            if size and read < size:
+                yield f"{read / size * 100}\n"
+    except EmbeddingAPILimitError as err:
+        yield api_limit_exceeded(err)
+    else:
+        yield f"{100.0}\n"
 
 
 async def query_agent(
@@ -21,25 +76,61 @@ async def query_agent(
     ai_agent: AIAgentInterface,
     question: str,
     cookie: str | None = None,
+    answer_cache: AnswerCache | None = None,
 ) -> str:
     try:
         context = await db.get_context(question, cookie)
+        if answer_cache is not None:
+            if (answer := answer_cache.get(ai_agent, question, context)) is not None:
+                return answer
         answer = await ai_agent.query_with_context(question, context)
+        if answer_cache is not None:
+            answer_cache.set(ai_agent, question, context, answer)
         return answer
     except TooManyRequestsError:  # pragma: no cover
         return "API key limit exceeded. Please try again later."
 
 
-async def query_agent_with_stream_response(
-    db: DatabaseManagerInterface,
+@dataclass(frozen=True)
+class Timing:
+    """Seconds elapsed since the query started when it reached a stage."""
+
+    stage: str
+    elapsed: float
+
+
+async def stream_answer(
     ai_agent: AIAgentInterface,
     question: str,
-    cookie: str | None = None,
-) -> AsyncIterator[str]:
+    context: Awaitable[str],
+    answer_cache: AnswerCache | None = None,
+    clock: Callable[[], float] = time.perf_counter,
+) -> AsyncIterator[str | Timing]:
+    """Stream the answer to a question, with the timing of its stages.
+
+    The retrieval of the context is awaited rather than started, so that it
+    may already be running, e.g. prefetched. A ``Timing`` is yielded when
+    the context is retrieved, then before the first token.
+    """
+    start = clock()
     try:
-        context = await db.get_context(question, cookie)
-        async for chunk in ai_agent.get_stream_response(question, context):
+        retrieved = await context
+        yield Timing(RETRIEVAL_STAGE, clock() - start)
+        if answer_cache is not None:
+            if (answer := answer_cache.get(ai_agent, question, retrieved)) is not None:
+                # Replay the cached answer as a token stream
+                yield Timing(FIRST_TOKEN_STAGE, clock() - start)
+                for token in split_into_tokens(answer):
+                    yield token
+                return
+        chunks = []
+        async for chunk in ai_agent.get_stream_response(question, retrieved):
+            if not chunks:
+                yield Timing(FIRST_TOKEN_STAGE, clock() - start)
+            chunks.append(chunk)
             yield chunk
+        if answer_cache is not None:
+            answer_cache.set(ai_agent, question, retrieved, "".join(chunks))
     except TooManyRequestsError:  # pragma: no cover
         for token in "API key limit exceeded. Please try again later.".split(" "):
             yield token
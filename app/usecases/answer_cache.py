@@ -0,0 +1,58 @@
+"""Cache of the answers given by the agent for a question and its context."""
+
+import hashlib
+import re
+import time
+from collections.abc import Callable
+
+from app.cache import LRUCache
+from app.ports import AIAgentInterface
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 60 * 60
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def split_into_tokens(answer: str) -> list[str]:
+    """Split an answer into words keeping their trailing whitespace."""
+    return [token for token in re.split(r"(?<=\s)(?=\S)", answer) if token]
+
+
+class AnswerCache:
+    """Answers keyed by agent model, prompt template, question and context.
+
+    Any change of the retrieved context (e.g. a new document) or of the
+    prompt produces a new key, so stale answers are never replayed.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._answers: LRUCache[str, str] = LRUCache(max_size, ttl=ttl, clock=clock)
+
+    @staticmethod
+    def key(agent: AIAgentInterface, question: str, context: str) -> str:
+        return _digest(
+            "\0".join(
+                (
+                    agent.model_name,
+                    _digest(agent.prompt_template),
+                    question,
+                    _digest(context),
+                )
+            )
+        )
+
+    def get(self, agent: AIAgentInterface, question: str, context: str) -> str | None:
+        return self._answers.get(self.key(agent, question, context))
+
+    def set(
+        self, agent: AIAgentInterface, question: str, context: str, answer: str
+    ) -> None:
+        self._answers.set(self.key(agent, question, context), answer)
@@ -0,0 +1,92 @@
+"""Retrieval of the context of the questions ahead of the queries."""
+
+import asyncio
+import time
+from collections.abc import Callable
+
+from app.cache import LRUCache
+from app.ports import DatabaseManagerInterface
+
+DEFAULT_MAX_SIZE = 1024
+# Seconds a prefetched context may wait for its query, so that documents
+# added in between are not missed for long
+DEFAULT_TTL = 30.0
+# Seconds between two retrievals prefetched by a session, so that a client
+# cannot trigger embedding calls at will
+DEFAULT_MIN_INTERVAL = 1.0
+
+
+class ContextPrefetcher:
+    """Retrievals started speculatively, e.g. while a question is typed.
+
+    A retrieval is keyed by session and question and handed out once, to the
+    query of the same question; a query not prefetched starts its own.
+
+    Prefetching is a hint: it is ignored when disabled, and when the session
+    already prefetched a retrieval less than ``min_interval`` seconds ago.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        enabled: bool = True,
+    ):
+        self.min_interval = min_interval
+        self.enabled = enabled
+        self._clock = clock
+        self._retrievals: LRUCache[tuple[str, str], asyncio.Task[str]] = LRUCache(
+            max_size, ttl=ttl, clock=clock
+        )
+        self._last_prefetch: LRUCache[str, float] = LRUCache(max_size)
+        # The event loop only keeps weak references to the tasks
+        self._running: set[asyncio.Task[str]] = set()
+
+    def _start(
+        self, db: DatabaseManagerInterface, question: str, cookie: str | None
+    ) -> asyncio.Task[str]:
+        task = asyncio.create_task(db.get_context(question, cookie))
+        self._running.add(task)
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task: asyncio.Task[str]) -> None:
+        self._running.discard(task)
+        if not task.cancelled():
+            # Retrieved here, so that a retrieval never used logs no error
+            task.exception()
+
+    @staticmethod
+    def _failed(task: asyncio.Task[str]) -> bool:
+        return task.done() and (task.cancelled() or task.exception() is not None)
+
+    def prefetch(
+        self, db: DatabaseManagerInterface, question: str, cookie: str | None = None
+    ) -> None:
+        """Start retrieving the context of a question, unless already started."""
+        if not self.enabled:
+            return
+        session = cookie or "default"
+        key = (session, question)
+        task = self._retrievals.get(key)
+        if task is not None and not self._failed(task):
+            return
+        now = self._clock()
+        last_prefetch = self._last_prefetch.get(session)
+        if last_prefetch is not None and now - last_prefetch < self.min_interval:
+            return
+        self._last_prefetch.set(session, now)
+        self._retrievals.set(key, self._start(db, question, cookie))
+
+    def retrieve(
+        self, db: DatabaseManagerInterface, question: str, cookie: str | None = None
+    ) -> asyncio.Task[str]:
+        """The retrieval of the context of a question, prefetched or started now."""
+        key = (cookie or "default", question)
+        task = self._retrievals.get(key)
+        self._retrievals.pop(key)
+        if task is None or self._failed(task):
+            return self._start(db, question, cookie)
+        return task
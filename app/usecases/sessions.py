@@ -0,0 +1,51 @@
+"""Deletion of the data of the sessions that expired."""
+
+import asyncio
+import logging
+
+from app.ports import DatabaseManagerInterface
+from app.sessions import SessionRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REAPER_INTERVAL = 60 * 60
+DEFAULT_REAPER_BATCH_SIZE = 100
+
+
+def _empty_sessions(db: DatabaseManagerInterface, sessions: list[str]) -> None:
+    for session in sessions:
+        try:
+            db.empty_database(session)
+        except Exception:
+            logger.exception("Failed to delete the data of session %s", session)
+
+
+async def reap_expired_sessions(
+    db: DatabaseManagerInterface,
+    registry: SessionRegistry,
+    batch_size: int = DEFAULT_REAPER_BATCH_SIZE,
+) -> int:
+    """Delete the chunks, caches and statistics of the expired sessions.
+
+    Sessions are deleted ``batch_size`` at a time in a worker thread, giving
+    the event loop back between batches. Returns the number of sessions
+    deleted.
+    """
+    reaped = 0
+    while sessions := await registry.pop_expired(batch_size):
+        await asyncio.to_thread(_empty_sessions, db, sessions)
+        reaped += len(sessions)
+    return reaped
+
+
+async def run_session_reaper(
+    db: DatabaseManagerInterface,
+    registry: SessionRegistry,
+    interval: float = DEFAULT_REAPER_INTERVAL,
+    batch_size: int = DEFAULT_REAPER_BATCH_SIZE,
+) -> None:
+    """Reap the expired sessions every ``interval`` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        if reaped := await reap_expired_sessions(db, registry, batch_size):
+            logger.info("Deleted the data of %d expired sessions", reaped)
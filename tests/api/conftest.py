@@ -6,14 +6,20 @@ from fastapi.testclient import TestClient
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.agents import FakeAgent
+from app.agents.info import describe_agent
 from app.api.database import router as database_router
 from app.api.dependencies import (
     get_agent_from_state,
+    get_agent_info_from_state,
+    get_answer_cache_from_state,
     get_cookie_session,
     get_db_from_state,
+    get_prefetcher_from_state,
 )
 from app.api.prompting import router as prompting_router
 from app.databases import FakeDatabaseManager
+from app.usecases.answer_cache import AnswerCache
+from app.usecases.prefetch import ContextPrefetcher
 
 TEST_SECRET = "test-secret"
 
@@ -28,6 +34,12 @@ def app_with_mocks(
 
     app.dependency_overrides[get_db_from_state] = lambda: fake_database_manager
     app.dependency_overrides[get_agent_from_state] = lambda: fake_agent
+    agent_info = describe_agent(fake_agent, fake_database_manager)
+    app.dependency_overrides[get_agent_info_from_state] = lambda: agent_info
+    answer_cache = AnswerCache()
+    app.dependency_overrides[get_answer_cache_from_state] = lambda: answer_cache
+    prefetcher = ContextPrefetcher()
+    app.dependency_overrides[get_prefetcher_from_state] = lambda: prefetcher
 
     app.add_middleware(SessionMiddleware, secret_key=TEST_SECRET)
 
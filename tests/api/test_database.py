@@ -1,7 +1,11 @@
 import io
+import json
 
+import pytest
 from fastapi.testclient import TestClient
 
+from app.agents.info import describe_agent
+from app.api import database
 from app.databases import FakeDatabaseManager
 
 
@@ -69,7 +73,46 @@ class TestAddDocumentEndpoint:
         assert "cannot be uploaded" in detail
         assert "position 0: invalid start byte" in detail
 
-    def test_add_document_rejects_file_exceeding_size_limit(self, client: TestClient):
+    def test_add_document_rejects_invalid_encoding_after_first_block(
+        self,
+        client: TestClient,
+        fake_database_manager: FakeDatabaseManager,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setattr(database, "UPLOAD_BLOCK_SIZE", 4)
+        file = io.BytesIO(b"valid line\n\x80")
+
+        response = client.post(
+            "/add-document",
+            files={"file": ("test.txt", file, "text/plain")},
+        )
+
+        assert response.status_code == 406
+        assert fake_database_manager.get_number_of_vectors() == 0
+
+    def test_add_document_stores_content_read_in_blocks(
+        self,
+        client: TestClient,
+        fake_database_manager: FakeDatabaseManager,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setattr(database, "UPLOAD_BLOCK_SIZE", 3)
+        file_content = "première ligne\nseconde ligne ☕"
+
+        response = client.post(
+            "/add-document",
+            files={
+                "file": ("test.txt", io.BytesIO(file_content.encode()), "text/plain")
+            },
+        )
+
+        assert response.text.splitlines()[-1] == "100.0"
+        assert fake_database_manager.get_chunks() == [file_content]
+
+    def test_add_document_rejects_file_exceeding_size_limit(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        monkeypatch.setattr(database, "MAX_FILE_SIZE", 1024 * 1024)
         file_content = b"x" * (1024 * 1024 + 1)  # 1 MB + 1 byte
         file = io.BytesIO(file_content)
 
@@ -79,7 +122,7 @@ class TestAddDocumentEndpoint:
         )
 
         assert response.status_code == 413
-        assert "File too large" in response.json()["detail"]
+        assert response.json()["detail"] == "File too large. Maximum size is 1 MB"
 
     def test_add_document_stores_content_in_database(
         self, client: TestClient, fake_database_manager: FakeDatabaseManager
@@ -124,6 +167,8 @@ class TestGetVectorsDataEndpoint:
         data = response.json()
         assert data["number_of_vectors"] == 1
         assert data["longest_vector"] == 47
+        assert data["total_characters"] == 47
+        assert data["length_histogram"] == {"0-49": 1}
 
     def test_get_vectors_data_isolates_sessions(
         self, client: TestClient, fake_database_manager: FakeDatabaseManager
@@ -138,6 +183,43 @@ class TestGetVectorsDataEndpoint:
         assert data["number_of_vectors"] == 0
 
 
+class TestChunksEndpoints:
+    def test_get_chunks_page_returns_cursor_of_next_page(
+        self, client: TestClient, fake_database_manager: FakeDatabaseManager
+    ):
+        cookie_session = client.get("/cookie").json()
+        fake_database_manager.db[cookie_session] = ["a", "b", "c"]
+
+        first_page = client.get("/chunks", params={"limit": 2}).json()
+        second_page = client.get(
+            "/chunks", params={"limit": 2, "cursor": first_page["next_cursor"]}
+        ).json()
+
+        assert first_page == {"chunks": ["a", "b"], "next_cursor": 2}
+        assert second_page == {"chunks": ["c"], "next_cursor": None}
+
+    def test_get_chunks_page_rejects_invalid_limit(self, client: TestClient):
+        response = client.get("/chunks", params={"limit": 0})
+
+        assert response.status_code == 422
+
+    def test_stream_chunks_returns_json_lines(
+        self, client: TestClient, fake_database_manager: FakeDatabaseManager
+    ):
+        cookie_session = client.get("/cookie").json()
+        fake_database_manager.db[cookie_session] = ["first chunk", "second\nchunk"]
+        fake_database_manager.db["other-session"] = ["other session content"]
+
+        response = client.get("/chunks/stream")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/jsonl"
+        assert [json.loads(line) for line in response.text.splitlines()] == [
+            {"chunk": "first chunk"},
+            {"chunk": "second\nchunk"},
+        ]
+
+
 class TestEmptyDatabaseEndpoint:
     def test_empty_database_returns_success_message(self, client: TestClient):
         response = client.delete("/empty-database")
@@ -161,7 +243,8 @@ class TestEmptyDatabaseEndpoint:
 
         cookie, chunks = fake_database_manager.db.popitem()
 
-        assert len(chunks) == 3
+        # Lines longer than a chunk are cut
+        assert len(chunks) == 4
 
         response = client.delete("/empty-database")
 
@@ -193,3 +276,43 @@ class TestGetAgentInfoEndpoint:
         assert data["icon"] == "pets"
         assert data["label"] == "RAG Parrot"
         assert data["embedding_model"] == "No Embedding Model"
+
+    def test_describe_agent_reports_the_embedding_model_of_the_database(
+        self, fake_agent, fake_database_manager
+    ):
+        """Test that the embedding model is read from the configured database."""
+        fake_database_manager.embedding_model = "local-hashing-4096-3"
+
+        info = describe_agent(fake_agent, fake_database_manager)
+
+        assert info["embedding_model"] == "local-hashing-4096-3"
+
+    def test_get_agent_info_is_cacheable(self, client: TestClient):
+        """Test that /agent-info sends an ETag and a Cache-Control header."""
+        response = client.get("/agent-info")
+
+        assert response.headers["etag"].startswith('"')
+        assert "max-age" in response.headers["cache-control"]
+
+    @pytest.mark.parametrize("if_none_match", ["{etag}", 'W/{etag}, "other"', "*"])
+    def test_get_agent_info_returns_not_modified_for_known_etag(
+        self, client: TestClient, if_none_match: str
+    ):
+        """Test that /agent-info answers 304 when the client has the descriptor."""
+        etag = client.get("/agent-info").headers["etag"]
+
+        response = client.get(
+            "/agent-info", headers={"If-None-Match": if_none_match.format(etag=etag)}
+        )
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    def test_get_agent_info_returns_descriptor_for_unknown_etag(
+        self, client: TestClient
+    ):
+        response = client.get("/agent-info", headers={"If-None-Match": '"stale"'})
+
+        assert response.status_code == 200
+        assert response.json()["label"] == "RAG Parrot"
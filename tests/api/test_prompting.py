@@ -1,7 +1,25 @@
 import io
+import json
+from typing import Any
+from unittest.mock import patch
 
 from fastapi.testclient import TestClient
 
+from app.agents import FakeAgent
+from app.databases import FakeDatabaseManager
+
+
+def parse_events(stream: str) -> list[tuple[str | None, Any]]:
+    """Type and decoded data of the events of a server-sent event stream."""
+    events = []
+    for block in stream.split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "data" in fields:
+            events.append((fields.get("event"), json.loads(fields["data"])))
+    return events
+
 
 def test_query_endpoint_returns_response(client: TestClient):
     response = client.post(
@@ -59,3 +77,59 @@ def test_query_endpoint_uses_document_context(client: TestClient):
     assert "What is the return policy?" in response.text
     assert "With the following context" in response.text
     assert "return policy allows returns within 30 days" in response.text
+
+
+def test_query_stream_endpoint_replays_cached_answer(client: TestClient):
+    def ask() -> str:
+        response = client.post(
+            "/query-stream",
+            content='"What is the return policy?"',
+            headers={"Content-Type": "application/json"},
+        )
+        return "".join(
+            token for event, token in parse_events(response.text) if event is None
+        )
+
+    first = ask()
+
+    with patch.object(FakeAgent, "get_stream_response") as get_stream_response:
+        second = ask()
+
+    get_stream_response.assert_not_called()
+    assert second == first
+
+
+def test_query_stream_endpoint_sends_timing_events(client: TestClient):
+    response = client.post(
+        "/query-stream",
+        content='"What is the return policy?"',
+        headers={"Content-Type": "application/json"},
+    )
+
+    events = parse_events(response.text)
+    timings = [data for event, data in events if event == "timing"]
+
+    assert [timing["stage"] for timing in timings] == ["retrieval", "first_token"]
+    assert all(timing["elapsed_ms"] >= 0 for timing in timings)
+    assert events[:2] == [("timing", timings[0]), ("timing", timings[1])]
+    assert events[2] == (None, "You ")
+
+
+def test_prefetch_context_endpoint_starts_retrieval(client: TestClient):
+    with patch.object(
+        FakeDatabaseManager, "get_context", autospec=True, return_value="context"
+    ) as get_context:
+        prefetch = client.post(
+            "/prefetch-context",
+            content='"What is the return policy?"',
+            headers={"Content-Type": "application/json"},
+        )
+        client.post(
+            "/query-stream",
+            content='"What is the return policy?"',
+            headers={"Content-Type": "application/json"},
+        )
+
+    assert prefetch.status_code == 202
+    assert prefetch.content == b""
+    get_context.assert_called_once()
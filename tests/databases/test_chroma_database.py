@@ -0,0 +1,328 @@
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+
+import chromadb
+import pytest
+from cohere.errors import TooManyRequestsError as CohereTooManyRequestsError
+
+from app.databases import chroma_database
+from app.databases.chroma_database import ChromaDatabaseManager, ChromaSettings
+from app.databases.embedding_cache import EmbeddingStore
+from app.databases.scheduler import IngestionScheduler
+from app.databases.session_store import SQLiteSessionStore
+from app.ports.errors import EmbeddingAPILimitError
+
+type ManagerFactory = Callable[..., ChromaDatabaseManager]
+
+
+@pytest.fixture
+def session() -> str:
+    # The ephemeral database is shared by the tests of the process
+    return f"session-{uuid.uuid4().hex}"
+
+
+@pytest.fixture
+def create_manager(tmp_path, monkeypatch) -> Iterator[ManagerFactory]:
+    monkeypatch.setattr(chroma_database, "client", chromadb.EphemeralClient())
+    embedding_stores: list[EmbeddingStore] = []
+
+    def create(**kwargs) -> ChromaDatabaseManager:
+        embedding_stores.append(EmbeddingStore())
+        return ChromaDatabaseManager(
+            ChromaSettings(
+                batch_size=2,
+                embedding_provider="local",
+                manifest_directory=tmp_path / "manifests",
+            ),
+            scheduler=IngestionScheduler(requests_per_minute=None),
+            embedding_store=embedding_stores[-1],
+            **kwargs,
+        )
+
+    yield create
+    for store in embedding_stores:
+        store.close()
+
+
+class FlakyScheduler(IngestionScheduler):
+    """Scheduler running one operation at a time, failing after ``successes``."""
+
+    def __init__(self, successes: int, error: Exception | None = None):
+        super().__init__(max_in_flight=1, requests_per_minute=None)
+        self.successes = successes
+        self.error = error or ConnectionError("connection lost")
+
+    async def submit[T](
+        self, operation: Callable[[], Awaitable[T]], session: str = "default"
+    ) -> T:
+        async def run() -> T:
+            if not self.successes:
+                raise self.error
+            self.successes -= 1
+            return await operation()
+
+        return await super().submit(run, session)
+
+
+async def add_text(manager: ChromaDatabaseManager, text: str, session: str) -> None:
+    async for _ in manager.add_text_to_db(text, session):
+        pass
+
+
+async def test_caches__follow_the_changes_of_another_worker(
+    create_manager: ManagerFactory, session, tmp_path
+):
+    path = tmp_path / "sessions.sqlite3"
+    store, other_store = SQLiteSessionStore(path), SQLiteSessionStore(path)
+    worker = create_manager(session_store=store)
+    other_worker = create_manager(session_store=other_store)
+    await add_text(worker, "The shop opens at 9 am.", session)
+    assert other_worker.get_number_of_vectors(session) == 1
+    assert "9 am" in await other_worker.get_context("When does it open?", session)
+
+    await add_text(worker, "Refunds take 14 days.\nERR-4012 means a bad card.", session)
+
+    assert other_worker.get_number_of_vectors(session) == 2
+    assert "ERR-4012" in await other_worker.get_context("ERR-4012", session)
+
+    worker.empty_database(session)
+
+    assert other_worker.get_number_of_vectors(session) == 0
+    assert "no context" in await other_worker.get_context("ERR-4012", session)
+    store.close()
+    other_store.close()
+
+
+async def test_collection_per_session__follows_the_drops_of_another_worker(
+    create_manager: ManagerFactory, session, tmp_path
+):
+    path = tmp_path / "sessions.sqlite3"
+    store, other_store = SQLiteSessionStore(path), SQLiteSessionStore(path)
+    worker = create_manager(session_store=store)
+    other_worker = create_manager(session_store=other_store)
+    worker.collection_per_session = other_worker.collection_per_session = True
+    await add_text(worker, "The shop opens at 9 am.", session)
+    assert other_worker.get_chunks(session) == ["The shop opens at 9 am."]
+
+    # Written through a handle of the dropped collection
+    worker.empty_database(session)
+    await add_text(other_worker, "Refunds take 14 days.", session)
+    assert worker.get_chunks(session) == ["Refunds take 14 days."]
+
+    # Read through a handle of the dropped collection
+    worker.empty_database(session)
+    assert other_worker.get_chunks(session) == []
+    assert other_worker.get_chunks_page(0, 10, session) == []
+    assert other_worker.get_number_of_vectors(session) == 0
+    assert "no context" in await other_worker.get_context("Refunds", session)
+    other_worker.empty_database(session)
+    store.close()
+    other_store.close()
+
+
+async def test_collection_per_session__reopens_a_dropped_collection_on_search(
+    create_manager: ManagerFactory, session
+):
+    worker, other_worker = create_manager(), create_manager()
+    worker.collection_per_session = other_worker.collection_per_session = True
+    await add_text(worker, "The shop opens at 9 am.", session)
+    assert "9 am" in await other_worker.get_context("When does it open?", session)
+
+    worker.empty_database(session)
+
+    assert "no context" in await other_worker.get_context("Opening hours", session)
+
+
+async def test_load_documents_from_folder__keeps_chunks_added_from_elsewhere(
+    create_manager: ManagerFactory, session, tmp_path
+):
+    manager = create_manager()
+    folder = tmp_path / "folder"
+    folder.mkdir()
+    (folder / "a.txt").write_text("Shared line.")
+    (folder / "b.txt").write_text("Folder line.")
+    await add_text(manager, "Shared line.", session)
+    manager.load_documents_from_folder(folder, session)
+    assert manager.get_number_of_vectors(session) == 3
+
+    (folder / "a.txt").unlink()
+    (folder / "b.txt").unlink()
+    manager.load_documents_from_folder(folder, session)
+
+    assert manager.get_chunks(session) == ["Shared line."]
+    assert manager.get_number_of_vectors(session) == 1
+
+
+async def test_add_text_to_db__resumes_an_interrupted_upload(
+    create_manager: ManagerFactory, session
+):
+    manager = create_manager()
+    # One chunk per line, as two lines exceed the chunk size
+    lines = [f"Line {index}: " + "word " * 25 for index in range(10)]
+    manager.scheduler = FlakyScheduler(successes=1)
+    with pytest.raises(ConnectionError):
+        await add_text(manager, "\n".join(lines), session)
+    assert manager.get_number_of_vectors(session) == 2
+
+    manager.scheduler = IngestionScheduler(requests_per_minute=None)
+    progress = [
+        percentage
+        async for percentage in manager.add_text_to_db("\n".join(lines), session)
+    ]
+
+    assert progress[0] == 20.0
+    assert progress[-1] == 100.0
+    assert sorted(manager.get_chunks(session)) == sorted(line.strip() for line in lines)
+    assert manager.get_number_of_vectors(session) == 10
+
+
+async def test_add_text_stream_to_db__resumes_an_interrupted_upload(
+    create_manager: ManagerFactory, session
+):
+    manager = create_manager()
+    text = "\n".join(f"Line {index}: " + "word " * 25 for index in range(10))
+
+    async def pieces() -> AsyncIterator[str]:
+        for start in range(0, len(text), 64):
+            yield text[start : start + 64]
+
+    manager.scheduler = FlakyScheduler(
+        successes=2, error=CohereTooManyRequestsError(body="rate limited")
+    )
+    with pytest.raises(EmbeddingAPILimitError) as raised:
+        async for _ in manager.add_text_stream_to_db(pieces(), session):
+            pass
+    assert raised.value.chunks_uploaded == 4
+    assert raised.value.chunks_total is None
+
+    # Only the three batches not stored yet are embedded
+    manager.scheduler = FlakyScheduler(successes=3)
+    stored = [count async for count in manager.add_text_stream_to_db(pieces(), session)]
+
+    assert stored[-1] == 10
+    assert sorted(manager.get_chunks(session)) == sorted(
+        line.strip() for line in text.split("\n")
+    )
+    assert manager.get_number_of_vectors(session) == 10
+
+
+async def test_statistics__match_a_full_scan_after_every_change(
+    create_manager: ManagerFactory, session, tmp_path
+):
+    manager = create_manager()
+    assert manager.get_statistics(session)["number_of_vectors"] == 0
+    folder = tmp_path / "folder"
+    folder.mkdir()
+    (folder / "a.txt").write_text("Apples are red.\n" + "A long line. " * 20)
+    (folder / "b.txt").write_text("Bananas are yellow.")
+
+    await add_text(manager, "Cherries are dark.\n" + "word " * 50, session)
+    assert manager.get_statistics(session) == create_manager().get_statistics(session)
+
+    manager.load_documents_from_folder(folder, session)
+    assert manager.get_statistics(session) == create_manager().get_statistics(session)
+
+    (folder / "a.txt").unlink()
+    manager.load_documents_from_folder(folder, session)
+    assert manager.get_statistics(session) == create_manager().get_statistics(session)
+    assert manager.get_number_of_vectors(session) == 3
+
+    manager.empty_database(session)
+    assert manager.get_statistics(session) == create_manager().get_statistics(session)
+    assert manager.get_number_of_vectors(session) == 0
+
+
+async def test_collection_per_session__isolates_the_sessions(
+    create_manager: ManagerFactory, session
+):
+    manager = create_manager()
+    manager.collection_per_session = True
+    other_session = f"{session}-other"
+    await add_text(manager, "The shop opens at 9 am.", session)
+    await add_text(manager, "Refunds take 14 days.", other_session)
+
+    assert manager.get_chunks(session) == ["The shop opens at 9 am."]
+    assert manager.get_chunks(other_session) == ["Refunds take 14 days."]
+    assert "Refunds" not in await manager.get_context("Refunds", session)
+    assert {session, other_session} <= manager.get_sessions()
+
+    manager.empty_database(session)
+
+    assert manager.get_number_of_vectors(session) == 0
+    assert manager.get_chunks(other_session) == ["Refunds take 14 days."]
+    assert session not in manager.get_sessions()
+
+
+async def test_collection_per_session__empty_database_forgets_the_session(
+    create_manager: ManagerFactory, session, tmp_path
+):
+    manager = create_manager()
+    manager.collection_per_session = True
+    folder = tmp_path / "folder"
+    folder.mkdir()
+    (folder / "a.txt").write_text("ERR-4012 means a bad card.")
+    manager.load_documents_from_folder(folder, session)
+    assert "ERR-4012" in await manager.get_context("ERR-4012", session)
+    assert manager.get_number_of_vectors(session) == 1
+
+    manager.empty_database(session)
+
+    assert session not in manager.statistics
+    assert manager.lexical_indexes.get(session) is None
+    assert manager.retrieval_cache.get(session, "ERR-4012") is None
+    assert not any((tmp_path / "manifests").iterdir())
+    assert manager.get_chunks(session) == []
+    # The folder is loaded again, as its manifest is gone
+    manager.load_documents_from_folder(folder, session)
+    assert manager.get_number_of_vectors(session) == 1
+
+
+async def test_hybrid_search__lifts_an_exact_keyword_match(
+    create_manager: ManagerFactory, session
+):
+    manager = create_manager()
+    answer = "ERR-4012 is raised when the card issuer refuses the charge."
+    # Close to the question on hashed character n-grams, but sharing no word
+    distractors = [
+        "Errors and their codes: whatever the meaning, it doesn't matter.",
+        "Coded errors, meanings and whatnot are documented online.",
+        "Meaningful errors coding: whatever errors occur are decoded.",
+        "Decoding errors: the meaning of codes and whatever they meant.",
+        "Errors coding meanings, whatever it doesn't, is explained.",
+        "Meanings of coded errors in whatever shape they come.",
+        "Errors with codes, their meanings and whatnots.",
+    ]
+    for text in [answer, *distractors]:
+        await add_text(manager, text, session)
+    question = "What does error code ERR-4012 mean?"
+    vector_hits = await manager.db.asimilarity_search(
+        question, k=manager.top_k, filter={"session": session}
+    )
+    assert answer not in [doc.page_content for doc in vector_hits]
+
+    chunks = await manager._hybrid_search(manager.db, question, session)
+
+    assert answer in chunks[:3]
+
+
+async def test_caches__are_bounded_by_their_chunks(
+    create_manager: ManagerFactory, session, monkeypatch
+):
+    monkeypatch.setattr(chroma_database, "LEXICAL_INDEX_MAX_CHUNKS", 3)
+    monkeypatch.setattr(chroma_database, "STATISTICS_MAX_CHUNKS", 5)
+    manager = create_manager()
+    large_session = f"{session}-large"
+    await add_text(manager, "ERR-4012 means a bad card.", session)
+    for index in range(4):
+        await add_text(manager, f"ERR-{index} is documented.", large_session)
+
+    assert "ERR-4012" in await manager.get_context("ERR-4012", session)
+    # Searched by vectors only, as its index would exceed the budget
+    assert "ERR-2" in await manager.get_context("ERR-2", large_session)
+
+    assert session in manager.lexical_indexes
+    assert large_session not in manager.lexical_indexes
+    assert manager.get_number_of_vectors(session) == 1
+    assert manager.get_number_of_vectors(large_session) == 4
+    assert session not in manager.statistics
+    assert manager.statistics.total_weight == 5
@@ -0,0 +1,137 @@
+from collections.abc import Iterator
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.databases.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingStore,
+    cache_key,
+    normalize_text,
+)
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    embedded: list[str] = []
+    queries: list[str] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.embedded = [*self.embedded, *texts]
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        self.queries = [*self.queries, text]
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def upstream() -> CountingEmbeddings:
+    return CountingEmbeddings(size=8)
+
+
+@pytest.fixture
+def store() -> Iterator[EmbeddingStore]:
+    store = EmbeddingStore()
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def cached_embeddings(upstream, store) -> CachedEmbeddings:
+    return CachedEmbeddings(upstream, model_name="model", store=store)
+
+
+def test_normalize_text__collapses_whitespace():
+    assert normalize_text("  Hello \n\t world ") == "Hello world"
+
+
+def test_cache_key__depends_on_model_and_normalized_text():
+    assert cache_key("model", "Hello  world") == cache_key("model", "Hello world")
+    assert cache_key("model", "Hello world") != cache_key("other", "Hello world")
+
+
+def test_cached_embeddings__only_embeds_missing_texts(cached_embeddings, upstream):
+    first = cached_embeddings.embed_documents(["a", "b"])
+    second = cached_embeddings.embed_documents(["b", "c", "a"])
+
+    assert upstream.embedded == ["a", "b", "c"]
+    assert second[0] == pytest.approx(first[1])
+    assert second[2] == pytest.approx(first[0])
+    assert cached_embeddings.hits == 2
+    assert cached_embeddings.misses == 3
+
+
+def test_cached_embeddings__embeds_repeated_texts_once(cached_embeddings, upstream):
+    vectors = cached_embeddings.embed_documents(["a", "a"])
+
+    assert upstream.embedded == ["a"]
+    assert vectors[0] == vectors[1]
+
+
+async def test_cached_embeddings__async_path_uses_the_cache(
+    cached_embeddings, upstream
+):
+    await cached_embeddings.aembed_documents(["a"])
+    await cached_embeddings.aembed_documents(["a"])
+
+    assert upstream.embedded == ["a"]
+    assert cached_embeddings.hits == 1
+
+
+def test_cached_embeddings__contains_all(cached_embeddings):
+    cached_embeddings.embed_documents(["a"])
+
+    assert cached_embeddings.contains_all(["a", "a"])
+    assert not cached_embeddings.contains_all(["a", "b"])
+    assert cached_embeddings.contains_all([])
+
+
+async def test_cached_embeddings__keeps_queries_out_of_the_document_store(
+    cached_embeddings,
+):
+    expected = DeterministicFakeEmbedding(size=8).embed_query("question")
+
+    assert cached_embeddings.embed_query("question") == expected
+    assert await cached_embeddings.aembed_query("question") == expected
+    assert len(cached_embeddings.store) == 0
+
+
+async def test_cached_embeddings__embeds_repeated_questions_once(
+    cached_embeddings, upstream
+):
+    first = await cached_embeddings.aembed_query("What is the return policy?")
+    second = await cached_embeddings.aembed_query("What is the  return policy?")
+    third = cached_embeddings.embed_query("What is the return policy?")
+
+    assert first == second == third
+    assert upstream.queries == ["What is the return policy?"]
+    assert cached_embeddings.hits == 2
+    assert cached_embeddings.misses == 1
+
+
+def test_embedding_store__evicts_least_recently_used_entries():
+    store = EmbeddingStore(max_entries=2)
+    store.set_many({"a": [1.0]})
+    store.set_many({"b": [2.0]})
+    store.get_many(["a"])
+
+    store.set_many({"c": [3.0]})
+
+    assert len(store) == 2
+    assert store.get_many(["a", "b", "c"]) == {"a": [1.0], "c": [3.0]}
+    store.close()
+
+
+def test_embedding_store__returns_nothing_for_no_keys(store):
+    assert store.get_many([]) == {}
+
+
+def test_embedding_store__persists_on_disk(tmp_path):
+    path = tmp_path / "cache" / "embeddings.sqlite3"
+    store = EmbeddingStore(path)
+    store.set_many({"a": [0.5, 0.25]})
+    store.close()
+
+    reopened = EmbeddingStore(path)
+    assert reopened.get_many(["a"]) == {"a": [0.5, 0.25]}
+    reopened.close()
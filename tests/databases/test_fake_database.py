@@ -12,3 +12,88 @@ async def test_fake_database__can_return_context(fake_database_manager):
 
     context = await fake_database_manager.get_context("What is the tracking method?")
     assert "Tracking provided via email." in context
+
+
+async def test_fake_database__returns_length_of_longest_vector(fake_database_manager):
+    async for _ in fake_database_manager.add_text_to_db("short\n" + "x" * 150):
+        pass
+
+    assert fake_database_manager.get_length_of_longest_vector() == 156
+
+
+def test_fake_database__returns_page_of_chunks(fake_database_manager):
+    fake_database_manager.db["default"] = ["a", "b", "c"]
+
+    assert fake_database_manager.get_chunks_page(1, 5) == ["b", "c"]
+    assert fake_database_manager.get_chunks_page(3, 5) == []
+
+
+def test_fake_database__iterates_chunks_page_by_page(fake_database_manager):
+    fake_database_manager.db["default"] = [str(index) for index in range(7)]
+
+    assert list(fake_database_manager.iter_chunks(page_size=3)) == [
+        str(index) for index in range(7)
+    ]
+    assert list(fake_database_manager.iter_chunks(page_size=7)) == [
+        str(index) for index in range(7)
+    ]
+    assert list(fake_database_manager.iter_chunks("empty")) == []
+
+
+async def test_fake_database__adds_text_stream_chunk_by_chunk(fake_database_manager):
+    async def pieces():
+        yield "first line\nsec"
+        yield "ond line"
+
+    stored = [
+        count async for count in fake_database_manager.add_text_stream_to_db(pieces())
+    ]
+
+    assert stored == [1]
+    assert fake_database_manager.get_chunks() == ["first line\nsecond line"]
+
+
+def test_fake_database__reindexes_only_changed_files_of_folder(
+    fake_database_manager, tmp_path
+):
+    (tmp_path / "a.txt").write_text("first file")
+    (tmp_path / "b.txt").write_text("second file")
+    fake_database_manager.load_documents_from_folder(tmp_path)
+
+    (tmp_path / "a.txt").unlink()
+    (tmp_path / "c.txt").write_text("second file")
+    fake_database_manager.load_documents_from_folder(tmp_path)
+
+    assert fake_database_manager.get_chunks() == ["second file"]
+
+    fake_database_manager.empty_database()
+    fake_database_manager.load_documents_from_folder(tmp_path)
+
+    assert fake_database_manager.get_chunks() == ["second file"]
+
+
+async def test_fake_database__keeps_uploaded_chunks_removed_from_a_folder(
+    fake_database_manager, tmp_path
+):
+    async for _ in fake_database_manager.add_text_to_db("shared line"):
+        pass
+    (tmp_path / "a.txt").write_text("shared line")
+    fake_database_manager.load_documents_from_folder(tmp_path)
+
+    (tmp_path / "a.txt").unlink()
+    fake_database_manager.load_documents_from_folder(tmp_path)
+
+    assert fake_database_manager.get_chunks() == ["shared line"]
+
+
+async def test_fake_database__reindexes_replaced_chunks(fake_database_manager):
+    fake_database_manager.db["default"] = ["Returns are accepted within 30 days."]
+    assert "Returns" in await fake_database_manager.get_context("returns")
+
+    fake_database_manager.db["default"] = ["Tracking provided via email."]
+    fake_database_manager.db["default"].append("Strollers are on sale.")
+
+    assert "Returns" not in await fake_database_manager.get_context("returns")
+    assert await fake_database_manager.get_context("strollers") == (
+        "Strollers are on sale."
+    )
@@ -0,0 +1,107 @@
+import pytest
+from langchain_core.documents.base import Document
+
+from app.databases.ingestion import (
+    IngestionJob,
+    abatch_documents,
+    batch_documents,
+    chunk_id,
+    estimate_tokens,
+)
+
+
+def _documents(*texts: str) -> list[Document]:
+    return [Document(text) for text in texts]
+
+
+def test_estimate_tokens__rounds_up_and_never_returns_zero():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_batch_documents__splits_by_count():
+    documents = _documents(*(f"chunk {i}" for i in range(5)))
+
+    batches = list(batch_documents(documents, max_batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [doc for batch in batches for doc in batch] == documents
+
+
+def test_batch_documents__splits_by_tokens():
+    documents = _documents("a" * 40, "b" * 40, "c" * 40)  # 10 tokens each
+
+    batches = list(batch_documents(documents, max_batch_tokens=25))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+
+
+def test_batch_documents__keeps_oversized_document_in_its_own_batch():
+    documents = _documents("small", "x" * 400, "small")
+
+    batches = list(batch_documents(documents, max_batch_tokens=10))
+
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+
+
+def test_batch_documents__returns_nothing_for_no_documents():
+    assert list(batch_documents([])) == []
+
+
+def test_batch_documents__rejects_non_positive_limits():
+    with pytest.raises(ValueError):
+        list(batch_documents(_documents("text"), max_batch_size=0))
+
+
+async def test_abatch_documents__batches_documents_as_they_arrive():
+    documents = _documents(*(f"chunk {i}" for i in range(5)))
+
+    async def arrive():
+        for document in documents:
+            yield document
+
+    batches = [batch async for batch in abatch_documents(arrive(), max_batch_size=2)]
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_chunk_id__is_deterministic_and_scoped_to_the_session():
+    assert chunk_id("text", "session-a") == chunk_id("text", "session-a")
+    assert chunk_id("text", "session-a") != chunk_id("text", "session-b")
+    assert chunk_id("text", "session-a") != chunk_id("other", "session-a")
+
+
+def test_chunk_id__is_scoped_to_the_source():
+    assert chunk_id("text", "session", "/folder") == chunk_id(
+        "text", "session", "/folder"
+    )
+    assert chunk_id("text", "session", "/folder") != chunk_id("text", "session")
+    assert chunk_id("text", "session", "/folder") != chunk_id(
+        "text", "session", "/other"
+    )
+
+
+def test_ingestion_job__drops_repeated_chunks_and_tags_the_session():
+    job = IngestionJob.from_chunks(["a", "b", "a"], "session")
+
+    assert job.total == 2
+    assert job.ids == [chunk_id("a", "session"), chunk_id("b", "session")]
+    assert all(doc.metadata == {"session": "session"} for doc in job.documents)
+
+
+def test_ingestion_job__tracks_stored_chunks_to_resume_from():
+    job = IngestionJob.from_chunks(["a", "b", "c", "d"], "session")
+
+    job.mark_stored([chunk_id("b", "session"), chunk_id("d", "session")])
+
+    assert job.completed == 2
+    assert job.progress == 50.0
+    assert [doc.page_content for doc in job.pending()] == ["a", "c"]
+
+
+def test_ingestion_job__is_complete_when_there_is_nothing_to_ingest():
+    job = IngestionJob.from_chunks([], "session")
+
+    assert job.progress == 100.0
+    assert job.pending() == []
@@ -0,0 +1,93 @@
+from app.databases.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+CHUNKS = [
+    ("strollers", "We sell strollers and car seats."),
+    ("tracking", "Tracking is provided via email once the order ships."),
+    ("error", "Error ERR-4012 means the payment was declined by the bank."),
+    ("returns", "Returns are accepted within 30 days of the order."),
+]
+
+
+def test_tokenize__keeps_codes_whole_and_by_part():
+    assert tokenize("Error ERR-4012 in v2.1!") == [
+        "error",
+        "err-4012",
+        "err",
+        "4012",
+        "in",
+        "v2.1",
+        "v2",
+        "1",
+    ]
+
+
+def test_bm25_index__ranks_best_matching_chunks_first():
+    index = BM25Index()
+    index.add(CHUNKS)
+
+    assert index.search("How is the order tracking sent?", k=2) == [
+        "tracking",
+        "returns",
+    ]
+
+
+def test_bm25_index__finds_exact_codes():
+    index = BM25Index()
+    index.add(CHUNKS)
+
+    assert index.search("What does err-4012 mean?", k=1) == ["error"]
+
+
+def test_bm25_index__prefers_rare_terms():
+    index = BM25Index()
+    index.add(CHUNKS)
+
+    assert index.search("order email", k=1) == ["tracking"]
+
+
+def test_bm25_index__returns_nothing_without_common_terms():
+    index = BM25Index()
+    index.add(CHUNKS)
+
+    assert index.search("warranty", k=3) == []
+    assert index.search("order", k=0) == []
+    assert BM25Index().search("order") == []
+
+
+def test_bm25_index__ignores_chunks_already_indexed():
+    index = BM25Index()
+    index.add(CHUNKS)
+
+    index.add([("tracking", "Completely different text")])
+
+    assert len(index) == len(CHUNKS)
+    assert index.search("different") == []
+
+
+def test_bm25_index__forgets_removed_chunks():
+    index = BM25Index()
+    index.add(CHUNKS)
+
+    index.remove(["tracking", "unknown"])
+
+    assert len(index) == len(CHUNKS) - 1
+    assert index.search("tracking email") == []
+    assert index.search("order", k=4) == ["returns"]
+
+
+def test_bm25_index__ranks_empty_chunks_last():
+    index = BM25Index()
+    index.add([("empty", "..."), ("word", "word")])
+
+    assert index.search("word") == ["word"]
+
+
+def test_reciprocal_rank_fusion__favors_ids_ranked_by_both():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]])
+
+    assert fused == ["c", "a", "b", "d"]
+
+
+def test_reciprocal_rank_fusion__keeps_first_ranked_on_ties():
+    assert reciprocal_rank_fusion([["a"], ["b"]]) == ["a", "b"]
+    assert reciprocal_rank_fusion([]) == []
@@ -0,0 +1,122 @@
+import os
+from pathlib import Path
+
+from langchain_text_splitters import CharacterTextSplitter
+
+from app.databases.ingestion import chunk_id
+from app.databases.loader import FolderLoader, FolderManifest
+
+text_splitter = CharacterTextSplitter(chunk_size=20, chunk_overlap=0, separator="\n")
+
+
+def _load(folder, manifest: FolderManifest) -> dict[str, list[str]]:
+    loader = FolderLoader(text_splitter, max_workers=2)
+    return {
+        loaded.path: [doc.page_content for doc in loaded.documents or []]
+        for loaded in loader.changed_files(folder, "session", manifest)
+    }
+
+
+def test_folder_loader__reads_text_files_of_the_whole_tree(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "a.txt").write_text("first line\nsecond line")
+    (tmp_path / "nested" / "b.txt").write_text("nested line")
+    (tmp_path / "ignored.md").write_text("not a text file")
+    manifest = FolderManifest()
+
+    loaded = _load(tmp_path, manifest)
+
+    assert loaded == {
+        "a.txt": ["first line", "second line"],
+        "nested/b.txt": ["nested line"],
+    }
+    assert manifest.files["a.txt"].size == len("first line\nsecond line")
+    assert len(manifest.chunk_ids) == 3
+
+
+def test_folder_loader__yields_files_in_order(tmp_path):
+    for index in range(10):
+        (tmp_path / f"{index:02}.txt").write_text(f"line {index}")
+
+    loaded = _load(tmp_path, FolderManifest())
+
+    assert list(loaded.values()) == [[f"line {index}"] for index in range(10)]
+
+
+def test_folder_loader__only_reloads_changed_files(tmp_path):
+    (tmp_path / "a.txt").write_text("first line")
+    (tmp_path / "b.txt").write_text("second line")
+    manifest = FolderManifest()
+    _load(tmp_path, manifest)
+
+    (tmp_path / "b.txt").write_text("second line, edited")
+
+    assert _load(tmp_path, manifest) == {"b.txt": ["second line, edited"]}
+    assert _load(tmp_path, manifest) == {}
+
+
+def test_folder_loader__does_not_split_touched_files_with_same_content(tmp_path):
+    (tmp_path / "a.txt").write_text("first line")
+    manifest = FolderManifest()
+    _load(tmp_path, manifest)
+    record = manifest.files["a.txt"]
+
+    os.utime(tmp_path / "a.txt", (record.mtime + 10, record.mtime + 10))
+
+    assert _load(tmp_path, manifest) == {}
+    assert manifest.files["a.txt"].mtime == record.mtime + 10
+    assert manifest.files["a.txt"].chunk_ids == record.chunk_ids
+
+
+def test_folder_loader__forgets_removed_and_undecodable_files(tmp_path):
+    (tmp_path / "a.txt").write_text("first line")
+    (tmp_path / "b.txt").write_text("second line")
+    manifest = FolderManifest()
+    _load(tmp_path, manifest)
+
+    (tmp_path / "a.txt").unlink()
+    (tmp_path / "b.txt").write_bytes(b"\x80 invalid")
+
+    assert _load(tmp_path, manifest) == {}
+    assert manifest.files == {}
+
+
+def test_folder_loader__skips_files_deleted_while_loading(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("first line")
+    (tmp_path / "b.txt").write_text("second line")
+    manifest = FolderManifest()
+    _load(tmp_path, manifest)
+    listed = sorted(tmp_path.rglob("*.txt"))
+
+    (tmp_path / "a.txt").unlink()
+    (tmp_path / "b.txt").unlink()
+    # Listed before being deleted
+    monkeypatch.setattr(Path, "rglob", lambda _self, _pattern: iter(listed))
+    monkeypatch.setattr(Path, "is_file", lambda _self: True)
+
+    assert _load(tmp_path, manifest) == {}
+    assert manifest.files == {}
+
+
+def test_folder_loader__scopes_chunk_ids_to_the_folder(tmp_path):
+    (tmp_path / "a.txt").write_text("first line")
+    manifest = FolderManifest()
+
+    _load(tmp_path, manifest)
+
+    assert manifest.chunk_ids == {
+        chunk_id("first line", "session", str(tmp_path.resolve()))
+    }
+    assert chunk_id("first line", "session") not in manifest.chunk_ids
+
+
+def test_folder_manifest__round_trips_through_json(tmp_path):
+    (tmp_path / "a.txt").write_text("first line")
+    manifest = FolderManifest()
+    _load(tmp_path, manifest)
+
+    manifest.save(tmp_path / "manifests" / "manifest.json")
+
+    loaded = FolderManifest.load(tmp_path / "manifests" / "manifest.json")
+    assert loaded.files == manifest.files
+    assert FolderManifest.load(tmp_path / "missing.json").files == {}
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from app.databases.chroma_database import create_embeddings
+from app.databases.local_embeddings import LocalEmbeddings
+from app.databases.local_index import HashingVectorizer
+
+
+def test_local_embeddings__are_deterministic_unit_vectors():
+    embeddings = LocalEmbeddings(batch_size=2)
+
+    vectors = embeddings.embed_documents(["first chunk", "second chunk", "third"])
+
+    assert len(vectors) == 3
+    assert vectors == LocalEmbeddings().embed_documents(
+        ["first chunk", "second chunk", "third"]
+    )
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1, rtol=1e-6)
+
+
+def test_local_embeddings__embed_queries_like_documents():
+    embeddings = LocalEmbeddings()
+
+    assert (
+        embeddings.embed_query("tracking")
+        == embeddings.embed_documents(["tracking"])[0]
+    )
+
+
+def test_local_embeddings__name_the_model_after_the_vectorizer_settings():
+    embeddings = LocalEmbeddings(HashingVectorizer(n_features=64, ngram_sizes=(2,)))
+
+    assert embeddings.model_name == "local-hashing-64-2"
+
+
+def test_create_embeddings__selects_local_provider():
+    embeddings, model_name = create_embeddings("local")
+
+    assert isinstance(embeddings, LocalEmbeddings)
+    assert model_name == embeddings.model_name
+
+
+def test_create_embeddings__rejects_unknown_provider():
+    with pytest.raises(ValueError, match="EMBEDDING_PROVIDER"):
+        create_embeddings("unknown")
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.databases.local_index import HashingVectorizer, LocalIndex
+
+
+def test_hashing_vectorizer__is_stable_and_case_insensitive():
+    vectorizer = HashingVectorizer(n_features=64)
+
+    rows = vectorizer.transform(["Tracking via email", "tracking VIA email"])
+
+    assert rows.shape == (2, 64)
+    assert rows.dtype == np.float32
+    np.testing.assert_array_equal(rows[0], rows[1])
+
+
+def test_hashing_vectorizer__rejects_non_positive_features():
+    with pytest.raises(ValueError):
+        HashingVectorizer(n_features=0)
+
+
+def test_local_index__ranks_best_matching_chunks_first():
+    index = LocalIndex()
+    index.add(
+        [
+            "We sell strollers and car seats.",
+            "Tracking is provided via email once the order ships.",
+            "Returns are accepted within 30 days.",
+        ]
+    )
+
+    assert index.search("How is tracking provided?", k=1) == [1]
+    assert index.search("Can I return my order?", k=3)[0] == 2
+
+
+def test_local_index__grows_past_its_initial_capacity():
+    index = LocalIndex(HashingVectorizer(n_features=256))
+    index.add([f"chunk number {number}" for number in range(100)])
+    index.add(["the needle in the haystack"])
+
+    assert len(index) == 101
+    assert index.search("needle", k=5)[0] == 100
+
+
+def test_local_index__returns_nothing_without_shared_terms():
+    index = LocalIndex()
+    index.add([])
+
+    assert index.search("anything") == []
+
+    index.add(["completely unrelated"])
+
+    assert index.search("zz", k=0) == []
+    assert index.search("!!!") == []
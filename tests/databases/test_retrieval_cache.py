@@ -0,0 +1,50 @@
+from app.databases.retrieval_cache import RetrievalCache, normalize_question
+
+
+def test_normalize_question__ignores_case_and_spacing():
+    assert normalize_question("What is the  Return policy?\n") == (
+        "what is the return policy?"
+    )
+
+
+def test_normalize_question__keeps_symbols():
+    assert normalize_question("C++ errors") != normalize_question("C# errors")
+    assert normalize_question("ERR-4012") != normalize_question("ERR 4012")
+
+
+def test_retrieval_cache__matches_near_identical_questions():
+    cache = RetrievalCache()
+    cache.set("session", "What is the return policy?", "context", 0)
+
+    assert cache.get("session", "what is the  Return policy?") == "context"
+    assert cache.get("session", "What is the shipping policy?") is None
+
+
+def test_retrieval_cache__is_scoped_to_the_session():
+    cache = RetrievalCache()
+    cache.set("session", "question", "context", 0)
+
+    assert cache.get("other-session", "question") is None
+
+
+def test_retrieval_cache__invalidates_one_session():
+    cache = RetrievalCache()
+    cache.set("session", "question", "context", 0)
+    cache.set("other-session", "question", "other context", 0)
+
+    cache.invalidate("session")
+
+    assert cache.get("session", "question") is None
+    assert cache.get("other-session", "question") == "other context"
+
+
+def test_retrieval_cache__drops_contexts_retrieved_before_an_invalidation():
+    cache = RetrievalCache()
+    generation = cache.generation("session")
+
+    cache.invalidate("session")
+    cache.set("session", "question", "stale context", generation)
+
+    assert cache.get("session", "question") is None
+    cache.set("session", "question", "context", cache.generation("session"))
+    assert cache.get("session", "question") == "context"
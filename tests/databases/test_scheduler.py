@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+from app.databases.scheduler import IngestionScheduler, TokenBucket
+
+
+class RateLimitedError(Exception):
+    pass
+
+
+def _scheduler(**kwargs) -> IngestionScheduler:
+    kwargs.setdefault("requests_per_minute", 600_000)
+    kwargs.setdefault("backoff", 0)
+    kwargs.setdefault("retry_on", (RateLimitedError,))
+    return IngestionScheduler(**kwargs)
+
+
+async def test_scheduler__bounds_operations_in_flight():
+    scheduler = _scheduler(max_in_flight=3)
+    running = 0
+    peak = 0
+
+    async def operation():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return "done"
+
+    results = await asyncio.gather(*(scheduler.submit(operation) for _ in range(10)))
+
+    assert results == ["done"] * 10
+    assert peak == 3
+    assert scheduler.in_flight == 0
+
+
+async def test_scheduler__retries_and_shrinks_window_on_rate_limit():
+    scheduler = _scheduler(max_in_flight=8)
+    attempts = 0
+
+    async def operation():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise RateLimitedError
+        return attempts
+
+    assert await scheduler.submit(operation) == 3
+    assert scheduler.window == 2
+
+
+async def test_scheduler__grows_window_back_after_successes():
+    scheduler = _scheduler(max_in_flight=4)
+    failed = False
+
+    async def rate_limited_once():
+        nonlocal failed
+        if not failed:
+            failed = True
+            raise RateLimitedError
+
+    async def operation():
+        pass
+
+    await scheduler.submit(rate_limited_once)
+    assert scheduler.window == 2
+
+    for _ in range(4):
+        await scheduler.submit(operation)
+
+    assert scheduler.window == 4
+
+
+async def test_scheduler__raises_once_retries_are_exhausted():
+    scheduler = _scheduler(max_retries=2)
+    attempts = 0
+
+    async def operation():
+        nonlocal attempts
+        attempts += 1
+        raise RateLimitedError
+
+    with pytest.raises(RateLimitedError):
+        await scheduler.submit(operation)
+
+    assert attempts == 3
+    assert scheduler.in_flight == 0
+
+
+async def test_scheduler__does_not_retry_other_errors():
+    scheduler = _scheduler()
+
+    async def operation():
+        raise KeyError
+
+    with pytest.raises(KeyError):
+        await scheduler.submit(operation)
+
+
+async def test_scheduler__serves_sessions_round_robin():
+    scheduler = _scheduler(max_in_flight=1)
+    order = []
+
+    def operation(name: str):
+        async def run():
+            order.append(name)
+            await asyncio.sleep(0)
+
+        return run
+
+    big_upload = [
+        scheduler.submit(operation(f"big-{i}"), session="big") for i in range(5)
+    ]
+    small_upload = scheduler.submit(operation("small"), session="small")
+
+    await asyncio.gather(*big_upload, small_upload)
+
+    assert order.index("small") <= 2
+
+
+async def test_scheduler__forgets_cancelled_waiters():
+    scheduler = _scheduler(max_in_flight=1)
+    release = asyncio.Event()
+
+    async def blocking():
+        await release.wait()
+
+    async def operation():
+        return "ok"
+
+    first = asyncio.ensure_future(scheduler.submit(blocking))
+    waiting = asyncio.ensure_future(scheduler.submit(operation, session="other"))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    release.set()
+    await first
+    assert await scheduler.submit(operation) == "ok"
+    assert scheduler.in_flight == 0
+
+
+async def test_scheduler__does_not_pace_without_request_rate():
+    scheduler = _scheduler(requests_per_minute=None)
+
+    async def operation():
+        return "done"
+
+    assert scheduler.bucket is None
+    assert await scheduler.submit(operation) == "done"
+
+
+def test_scheduler__rejects_empty_window():
+    with pytest.raises(ValueError):
+        IngestionScheduler(max_in_flight=0)
+
+
+async def test_token_bucket__waits_for_tokens_to_refill():
+    bucket = TokenBucket(rate=1000, capacity=1)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await bucket.acquire()
+    await bucket.acquire()
+
+    assert loop.time() - start >= 0.0009
+
+
+def test_token_bucket__rejects_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
@@ -0,0 +1,121 @@
+import pytest
+from fakeredis import FakeRedis
+
+from app.databases import session_store
+from app.databases.session_store import (
+    InMemorySessionStore,
+    RedisSessionStore,
+    SQLiteSessionStore,
+    create_session_store,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemorySessionStore()
+    elif request.param == "sqlite":
+        store = SQLiteSessionStore(tmp_path / "sessions.sqlite3")
+    else:
+        store = RedisSessionStore(FakeRedis())
+    yield store
+    store.close()
+
+
+def test_set_last_seen__registers_and_refreshes_sessions(store):
+    assert store.get_last_seen("a") is None
+
+    store.set_last_seen("a", 1.5)
+    store.set_last_seen("a", 2.5)
+
+    assert store.get_last_seen("a") == 2.5
+    assert store.count() == 1
+
+
+def test_pop_expired__removes_sessions_seen_before_in_batches(store):
+    for seen_at, session in enumerate(["a", "b", "c", "d"]):
+        store.set_last_seen(session, float(seen_at))
+
+    assert store.pop_expired(before=3.0, limit=2) == ["a", "b"]
+    assert store.pop_expired(before=3.0, limit=2) == ["c"]
+    assert store.pop_expired(before=3.0, limit=2) == []
+    assert store.get_last_seen("d") == 3.0
+    assert store.count() == 1
+
+
+def test_swap_revision__returns_the_previous_revision(store):
+    assert store.get_revision("a") is None
+
+    assert store.swap_revision("a", "r1") is None
+    assert store.swap_revision("a", "r2") == "r1"
+
+    assert store.get_revision("a") == "r2"
+    assert store.get_revision("b") is None
+
+
+def test_swap_revision__removes_the_revision(store):
+    store.swap_revision("a", "r1")
+
+    assert store.swap_revision("a", None) == "r1"
+    assert store.swap_revision("a", None) is None
+    assert store.get_revision("a") is None
+
+
+def test_redis_store__decodes_responses_of_decoding_clients():
+    store = RedisSessionStore(FakeRedis(decode_responses=True))
+    store.set_last_seen("a", 1.0)
+    store.swap_revision("a", "r1")
+
+    assert store.get_revision("a") == "r1"
+    assert store.pop_expired(before=2.0, limit=10) == ["a"]
+
+
+def test_sqlite_store__is_shared_by_connections(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    first, second = SQLiteSessionStore(path), SQLiteSessionStore(path)
+
+    first.set_last_seen("a", 1.0)
+
+    assert second.get_last_seen("a") == 1.0
+    assert second.pop_expired(before=2.0, limit=10) == ["a"]
+    assert first.count() == 0
+
+    first.swap_revision("a", "r1")
+
+    assert second.swap_revision("a", "r2") == "r1"
+    first.close()
+    second.close()
+
+
+def test_sqlite_store__works_in_memory():
+    store = SQLiteSessionStore()
+    store.set_last_seen("a", 1.0)
+
+    assert store.count() == 1
+    store.close()
+
+
+@pytest.mark.parametrize(
+    ("kind", "store_class"),
+    [
+        ("memory", InMemorySessionStore),
+        ("sqlite", SQLiteSessionStore),
+        ("redis", RedisSessionStore),
+    ],
+)
+def test_create_session_store__returns_configured_store(
+    kind, store_class, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(
+        session_store, "SESSION_STORE_PATH", str(tmp_path / "sessions.sqlite3")
+    )
+
+    store = create_session_store(kind)
+
+    assert isinstance(store, store_class)
+    store.close()
+
+
+def test_create_session_store__rejects_unknown_store():
+    with pytest.raises(ValueError):
+        create_session_store("memcached")
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+from langchain_text_splitters import CharacterTextSplitter
+
+from app.databases.splitter import StreamingTextSplitter
+
+
+async def _pieces(text: str, size: int):
+    for start in range(0, len(text), size):
+        yield text[start : start + size]
+
+
+async def _split(splitter: StreamingTextSplitter, text: str, size: int) -> list[str]:
+    return [chunk async for chunk in splitter.split(_pieces(text, size))]
+
+
+@pytest.mark.parametrize("piece_size", [1, 7, 200, 10_000])
+async def test_streaming_text_splitter__matches_character_text_splitter(piece_size):
+    generator = random.Random(piece_size)
+    # Lines fit in a chunk, longer ones are cut by the streaming splitter only
+    lines = [
+        " ".join("word" for _ in range(generator.randint(0, 40))) for _ in range(300)
+    ]
+    text = "\n".join(lines) + "\n\n  trailing line  \n"
+    expected = CharacterTextSplitter(
+        chunk_size=200, chunk_overlap=0, separator="\n"
+    ).split_text(text)
+
+    chunks = await _split(StreamingTextSplitter(chunk_size=200), text, piece_size)
+
+    assert chunks == expected
+
+
+async def test_streaming_text_splitter__handles_separator_across_pieces():
+    splitter = StreamingTextSplitter(chunk_size=5, separator="--")
+
+    assert await _split(splitter, "abc--def--ghi", 4) == ["abc", "def", "ghi"]
+
+
+@pytest.mark.parametrize("piece_size", [1, 3, 7, 100])
+async def test_streaming_text_splitter__cuts_text_without_separator(piece_size):
+    splitter = StreamingTextSplitter(chunk_size=10, separator="--")
+    text = "x" * 25 + "--abc--" + "y" * 9 + "-"
+
+    chunks = await _split(splitter, text, piece_size)
+
+    assert chunks == ["x" * 10, "x" * 10, "xxxxx--abc", "y" * 9 + "-"]
+
+
+async def test_streaming_text_splitter__returns_nothing_for_blank_text():
+    assert await _split(StreamingTextSplitter(), "\n \n\n", 2) == []
+
+
+def test_streaming_text_splitter__rejects_empty_separator():
+    with pytest.raises(ValueError):
+        StreamingTextSplitter(separator="")
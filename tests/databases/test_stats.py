@@ -0,0 +1,47 @@
+from app.databases.stats import SessionStatistics
+
+
+def test_session_statistics__are_empty_initially():
+    assert SessionStatistics().summary() == {
+        "number_of_vectors": 0,
+        "longest_vector": 0,
+        "total_characters": 0,
+        "length_histogram": {},
+    }
+
+
+def test_session_statistics__track_added_chunks():
+    statistics = SessionStatistics()
+
+    statistics.add([("a", "x" * 10), ("b", "x" * 120), ("c", "x" * 30)])
+
+    assert statistics.count == 3
+    assert statistics.longest == 120
+    assert statistics.total_characters == 160
+    assert statistics.histogram() == {"0-49": 2, "100-149": 1}
+
+
+def test_session_statistics__ignore_chunks_already_stored():
+    statistics = SessionStatistics()
+    statistics.add([("a", "text")])
+
+    statistics.add([("a", "text")])
+
+    assert statistics.count == 1
+    assert statistics.total_characters == 4
+
+
+def test_session_statistics__update_longest_when_removing_chunks():
+    statistics = SessionStatistics()
+    statistics.add([("a", "x" * 10), ("b", "x" * 120), ("c", "x" * 120)])
+
+    statistics.remove(["b"])
+    assert statistics.longest == 120
+
+    statistics.remove(["c", "unknown"])
+    assert statistics.longest == 10
+    assert statistics.count == 1
+    assert statistics.total_characters == 10
+
+    statistics.remove(["a"])
+    assert statistics.longest == 0
@@ -0,0 +1,78 @@
+import pytest
+
+from app.cache import LRUCache
+
+
+class TestLRUCache:
+    def test_returns_none_for_missing_keys(self):
+        assert LRUCache().get("missing") is None
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert len(cache) == 2
+
+    def test_bounds_the_total_weight_of_the_entries(self):
+        cache = LRUCache(max_size=5, weigh=len)
+        cache.set("a", [1, 2])
+        cache.set("b", [1, 2])
+        cache.get("a")
+
+        cache.set("c", [1, 2])
+
+        assert "b" not in cache
+        assert cache.total_weight == 4
+
+    def test_weighs_entries_again_when_set_again(self):
+        cache = LRUCache(max_size=5, weigh=len)
+        grown = [1, 2]
+        cache.set("a", grown)
+        cache.set("b", [1, 2])
+
+        grown.extend([3, 4])
+        cache.set("a", grown)
+
+        assert "b" not in cache
+        assert cache.total_weight == 4
+
+    def test_does_not_keep_an_entry_heavier_than_the_bound(self):
+        cache = LRUCache(max_size=3, weigh=len)
+        cache.set("a", [1])
+
+        cache.set("b", [1, 2, 3, 4])
+
+        assert len(cache) == 0
+        assert cache.total_weight == 0
+
+    def test_pop_and_clear(self):
+        cache = LRUCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_rejects_empty_cache(self):
+        with pytest.raises(ValueError):
+            LRUCache(max_size=0)
+
+    def test_expires_entries_after_ttl(self):
+        now = 0.0
+        cache = LRUCache(ttl=10, clock=lambda: now)
+        cache.set("a", 1)
+
+        now = 10.0
+        assert cache.get("a") == 1
+
+        now = 10.5
+        assert cache.get("a") is None
+        assert "a" not in cache
@@ -1,30 +1,63 @@
+import asyncio
+import os
+import time
 import uuid
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from typing import Annotated
 
 import pytest
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from starlette.testclient import TestClient
 
-from app.middleware import SessionCookieMiddleware
+from app.api.dependencies import get_cookie_session
+from app.databases.session_store import InMemorySessionStore
+from app.middleware import SESSION_SCOPE_KEY, SessionCookieMiddleware, find_cookie
+from app.sessions import SessionRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
 
 
 @pytest.fixture
-def app():
+def registry(clock):
+    return SessionRegistry(InMemorySessionStore(), ttl=3600, clock=clock)
+
+
+@pytest.fixture
+def app(registry):
     @asynccontextmanager
     async def lifespan(app: FastAPI) -> AsyncIterator[dict]:
         _ = app
         # Set up state similar to main app
-        yield {"cookies": set()}
+        yield {"cookies": registry}
 
     test_app = FastAPI(lifespan=lifespan)
-    test_app.add_middleware(SessionCookieMiddleware, cookie_name="TEST_SESSION")
+    test_app.add_middleware(
+        SessionCookieMiddleware, cookie_name="TEST_SESSION", max_age=3600
+    )
 
     @test_app.get("/test")
     async def _test_endpoint(request: Request):
         _ = request
         return {"message": "test"}
 
+    @test_app.get("/session")
+    async def _session_endpoint(
+        session: Annotated[str, Depends(get_cookie_session)],
+    ):
+        return {"session": session}
+
     return test_app
 
 
@@ -79,7 +112,7 @@ class TestSessionCookieMiddleware:
         # Check that cookie has httponly flag
         cookie_header = response.headers.get("set-cookie", "")
         assert "HttpOnly" in cookie_header
-        assert "Max-Age" in cookie_header
+        assert "Max-Age=3600" in cookie_header
 
     def test_concurrent_sessions(self, client):
         """Test that multiple sessions can be created and tracked."""
@@ -110,3 +143,129 @@ class TestSessionCookieMiddleware:
 
         session_id = response.cookies["TEST_SESSION"]
         uuid.UUID(session_id)  # Verify it's a valid UUID
+
+    def test_creates_new_session_when_session_expired(self, client, clock):
+        """Test that a session not seen for the TTL is replaced."""
+        session_id = client.get("/test").cookies["TEST_SESSION"]
+
+        clock.now = 3601
+        response = client.get("/test", cookies={"TEST_SESSION": session_id})
+
+        assert response.cookies["TEST_SESSION"] != session_id
+
+    def test_refreshes_session_on_every_request(self, client, clock, registry):
+        """Test that using a session postpones its expiration."""
+        session_id = client.get("/test").cookies["TEST_SESSION"]
+
+        clock.now = 3000
+        client.get("/test", cookies={"TEST_SESSION": session_id})
+        clock.now = 6000
+
+        assert asyncio.run(registry.contains(session_id))
+        assert asyncio.run(registry.pop_expired(limit=10)) == []
+
+    def test_exposes_session_to_the_app(self, client):
+        """Test that the app reads the session parsed by the middleware."""
+        response = client.get("/session")
+        session_id = response.cookies["TEST_SESSION"]
+
+        assert response.json() == {"session": session_id}
+        response = client.get("/session", cookies={"TEST_SESSION": session_id})
+        assert response.json() == {"session": session_id}
+
+
+class TestFindCookie:
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            (b"SESSION=abc", "abc"),
+            (b"a=1; SESSION=abc; b=2", "abc"),
+            (b"a=1;SESSION= abc ;b=2", "abc"),
+            (b'SESSION="abc"', "abc"),
+            (b"OTHER_SESSION=x; SESSION_ID=y; SESSION=abc", "abc"),
+            (b"OTHER_SESSION=x", None),
+            (b"", None),
+        ],
+    )
+    def test_finds_cookie_value(self, header, expected):
+        assert find_cookie([(b"cookie", header)], b"SESSION") == expected
+
+    def test_scans_every_cookie_header(self):
+        headers = [
+            (b"host", b"SESSION=no"),
+            (b"cookie", b"a=1"),
+            (b"cookie", b"SESSION=abc"),
+        ]
+
+        assert find_cookie(headers, b"SESSION") == "abc"
+
+
+def http_scope(headers, state) -> dict:
+    return {"type": "http", "headers": headers, "state": state}
+
+
+async def noop_app(scope, receive, send):
+    _ = scope, receive, send
+
+
+async def noop_receive():
+    return {"type": "http.request"}
+
+
+async def noop_send(message):
+    _ = message
+
+
+class TestSessionCookieMiddlewareFastPath:
+    def test_valid_session_does_not_copy_headers(self, registry):
+        asyncio.run(registry.add("known"))
+        headers = [(b"cookie", b"TEST_SESSION=known")]
+        scope = http_scope(headers, {"cookies": registry})
+        middleware = SessionCookieMiddleware(noop_app, cookie_name="TEST_SESSION")
+
+        asyncio.run(middleware(scope, noop_receive, noop_send))
+
+        assert scope["headers"] is headers
+        assert headers == [(b"cookie", b"TEST_SESSION=known")]
+        assert scope[SESSION_SCOPE_KEY] == "known"
+
+    def test_new_session_is_added_to_immutable_headers(self, registry):
+        scope = http_scope(((b"host", b"testserver"),), {"cookies": registry})
+        middleware = SessionCookieMiddleware(noop_app, cookie_name="TEST_SESSION")
+
+        asyncio.run(middleware(scope, noop_receive, noop_send))
+
+        session = scope[SESSION_SCOPE_KEY]
+        assert scope["headers"] == [
+            (b"host", b"testserver"),
+            (b"cookie", f"TEST_SESSION={session}".encode()),
+        ]
+
+    @pytest.mark.skipif(
+        not os.getenv("RUN_BENCHMARKS"),
+        reason="Timing is unreliable under coverage and on shared runners",
+    )
+    def test_per_request_overhead_is_small(self, registry):
+        """Microbenchmark of the middleware on requests of a known session."""
+        asyncio.run(registry.add("known"))
+        headers = [
+            (b"host", b"testserver"),
+            (b"user-agent", b"benchmark"),
+            (b"cookie", b"_ga=GA1.1.1234; theme=dark; TEST_SESSION=known"),
+        ]
+        state = {"cookies": registry}
+        middleware = SessionCookieMiddleware(noop_app, cookie_name="TEST_SESSION")
+        requests = 20_000
+
+        async def run(call) -> float:
+            start = time.perf_counter()
+            for _ in range(requests):
+                await call(http_scope(headers, state), noop_receive, noop_send)
+            return time.perf_counter() - start
+
+        baseline = asyncio.run(run(noop_app))
+        elapsed = asyncio.run(run(middleware))
+
+        overhead = (elapsed - baseline) / requests
+        # A few microseconds per request, the budget leaves room for slow CI
+        assert overhead < 50e-6
@@ -0,0 +1,132 @@
+import sqlite3
+
+import pytest
+
+from app.databases.session_store import InMemorySessionStore, SQLiteSessionStore
+from app.sessions import SessionRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSessionRegistry:
+    def test_rejects_non_positive_ttl(self):
+        with pytest.raises(ValueError):
+            SessionRegistry(InMemorySessionStore(), ttl=0)
+
+    async def test_recognizes_sessions_until_they_expire(self):
+        clock = FakeClock()
+        registry = SessionRegistry(InMemorySessionStore(), ttl=10, clock=clock)
+        await registry.add("a")
+
+        clock.now = 10
+        assert await registry.contains("a")
+        clock.now = 11
+        assert not await registry.contains("a")
+        assert not await registry.contains("b")
+
+    async def test_adding_a_session_again_refreshes_it(self):
+        clock = FakeClock()
+        registry = SessionRegistry(InMemorySessionStore(), ttl=10, clock=clock)
+        await registry.update(["a", "b"])
+
+        clock.now = 5
+        await registry.add("a")
+        clock.now = 11
+
+        assert await registry.contains("a")
+        assert await registry.pop_expired(limit=10) == ["b"]
+        assert await registry.count() == 1
+
+    async def test_pops_expired_sessions_in_batches_oldest_first(self):
+        clock = FakeClock()
+        registry = SessionRegistry(InMemorySessionStore(), ttl=10, clock=clock)
+        for session in ["a", "b", "c"]:
+            await registry.add(session)
+            clock.now += 1
+        await registry.add("d")
+
+        clock.now = 13
+        assert await registry.pop_expired(limit=2) == ["a", "b"]
+        assert await registry.pop_expired(limit=2) == ["c"]
+        assert await registry.pop_expired(limit=2) == []
+        assert await registry.contains("d")
+
+    async def test_recognizes_sessions_registered_by_other_workers(self, tmp_path):
+        clock = FakeClock()
+        path = tmp_path / "sessions.sqlite3"
+        worker, other_worker = (
+            SessionRegistry(SQLiteSessionStore(path), ttl=100, clock=clock),
+            SessionRegistry(SQLiteSessionStore(path), ttl=100, clock=clock),
+        )
+        await worker.add("a")
+
+        assert await other_worker.contains("a")
+        assert await other_worker.count() == 1
+        worker.close()
+        other_worker.close()
+
+    async def test_reads_recently_seen_sessions_from_the_local_cache(self):
+        clock = FakeClock()
+        store = InMemorySessionStore()
+        registry = SessionRegistry(store, ttl=100, clock=clock, cache_ttl=5)
+        await registry.add("a")
+
+        clock.now = 4
+        await registry.add("a")
+        store.pop_expired(before=1, limit=10)
+
+        # Not written back nor read again within the cache TTL
+        assert await registry.contains("a")
+        clock.now = 6
+        assert not await registry.contains("a")
+
+    async def test_update_only_registers_unknown_sessions(self):
+        clock = FakeClock()
+        registry = SessionRegistry(InMemorySessionStore(), ttl=10, clock=clock)
+        await registry.add("a")
+
+        clock.now = 5
+        await registry.update(["a", "b"])
+
+        assert registry.store.get_last_seen("a") == 0
+        assert registry.store.get_last_seen("b") == 5
+
+    async def test_restore_scans_the_database_for_an_in_memory_store(self):
+        registry = SessionRegistry(InMemorySessionStore())
+        await registry.add("a")
+
+        assert await registry.restore(lambda: ["a", "b"])
+        assert await registry.count() == 2
+
+    async def test_restore_scans_the_database_once_for_a_shared_store(self, tmp_path):
+        path = tmp_path / "sessions.sqlite3"
+        scans = []
+
+        def load_sessions() -> list[str]:
+            scans.append(len(scans))
+            return ["a", "b"]
+
+        first_start = SessionRegistry(SQLiteSessionStore(path))
+        assert await first_start.restore(load_sessions)
+        first_start.close()
+        restart = SessionRegistry(SQLiteSessionStore(path))
+
+        assert not await restart.restore(load_sessions)
+        assert await restart.count() == 2
+        assert scans == [0]
+        restart.close()
+
+    def test_close_closes_the_store(self, tmp_path):
+        store = SQLiteSessionStore(tmp_path / "sessions.sqlite3")
+        registry = SessionRegistry(store)
+
+        registry.close()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            store.count()
@@ -0,0 +1,257 @@
+"""Tests for the API services, in process and over an in-memory HTTP transport."""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.agents import FakeAgent
+from app.agents.info import describe_agent
+from app.api.database import router as database_router
+from app.api.dependencies import (
+    get_agent_from_state,
+    get_agent_info_from_state,
+    get_answer_cache_from_state,
+    get_db_from_state,
+    get_prefetcher_from_state,
+)
+from app.api.prompting import router as prompting_router
+from app.databases import FakeDatabaseManager
+from app.ui.services.api import (
+    ApiService,
+    ApiServiceError,
+    HttpApiService,
+    InProcessApiService,
+    create_http_client,
+)
+from app.usecases.answer_cache import AnswerCache
+from app.usecases.prefetch import ContextPrefetcher
+
+DOCUMENT = "First line of the document\nSecond line of the document"
+
+
+@pytest.fixture
+def api_app(fake_database_manager: FakeDatabaseManager, fake_agent: FakeAgent):
+    app = FastAPI()
+    app.include_router(database_router)
+    app.include_router(prompting_router)
+    app.dependency_overrides[get_db_from_state] = lambda: fake_database_manager
+    app.dependency_overrides[get_agent_from_state] = lambda: fake_agent
+    agent_info = describe_agent(fake_agent, fake_database_manager)
+    app.dependency_overrides[get_agent_info_from_state] = lambda: agent_info
+    answer_cache = AnswerCache()
+    app.dependency_overrides[get_answer_cache_from_state] = lambda: answer_cache
+    prefetcher = ContextPrefetcher()
+    app.dependency_overrides[get_prefetcher_from_state] = lambda: prefetcher
+    return app
+
+
+@pytest.fixture(params=["in-process", "http"])
+def service(request, fake_database_manager, fake_agent, api_app) -> ApiService:
+    if request.param == "in-process":
+        return InProcessApiService(fake_database_manager, fake_agent, AnswerCache())
+    client = create_http_client(
+        "http://testserver", transport=httpx.ASGITransport(api_app)
+    )
+    return HttpApiService(client)
+
+
+async def test_add_document__reports_progress_and_stores_chunks(
+    service: ApiService, fake_database_manager: FakeDatabaseManager
+):
+    lines = [line async for line in service.add_document("doc.txt", DOCUMENT, "s1")]
+
+    assert float(lines[-1]) == 100.0
+    assert fake_database_manager.get_chunks("s1") == [DOCUMENT]
+    assert fake_database_manager.get_chunks("s2") == []
+
+
+async def test_get_statistics__is_scoped_to_the_session(
+    service: ApiService, fake_database_manager: FakeDatabaseManager
+):
+    fake_database_manager.db["s1"].append("chunk")
+
+    assert (await service.get_statistics("s1"))["number_of_vectors"] == 1
+    assert (await service.get_statistics("s2"))["number_of_vectors"] == 0
+
+
+async def test_query_stream__yields_the_answer_tokens(
+    service: ApiService, fake_database_manager: FakeDatabaseManager
+):
+    fake_database_manager.db["s1"].append("The shop opens at nine")
+
+    tokens = [
+        token async for token in service.query_stream("When does the shop open?", "s1")
+    ]
+
+    assert all(isinstance(token, str) for token in tokens)
+    assert "The shop opens at nine" in "".join(tokens)
+
+
+async def test_prefetch_context__is_used_by_the_query(
+    service: ApiService, fake_database_manager: FakeDatabaseManager
+):
+    fake_database_manager.db["s1"].append("The shop opens at nine")
+
+    with patch.object(
+        fake_database_manager,
+        "get_context",
+        wraps=fake_database_manager.get_context,
+    ) as get_context:
+        await service.prefetch_context("When does the shop open?", "s1")
+        tokens = [
+            token
+            async for token in service.query_stream("When does the shop open?", "s1")
+        ]
+
+    get_context.assert_called_once_with("When does the shop open?", "s1")
+    assert "The shop opens at nine" in "".join(tokens)
+
+
+async def test_empty_database__only_empties_the_session(
+    service: ApiService, fake_database_manager: FakeDatabaseManager
+):
+    fake_database_manager.db["s1"].append("chunk")
+    fake_database_manager.db["s2"].append("chunk")
+
+    await service.empty_database("s1")
+
+    assert fake_database_manager.get_sessions() == {"s2"}
+
+
+async def test_get_agent_info__describes_the_agent(service: ApiService):
+    info = await service.get_agent_info()
+
+    assert info["is_fake"] is True
+    assert info["label"] == "RAG Parrot"
+
+
+async def test_http_api_service__raises_api_service_errors():
+    service = HttpApiService(
+        create_http_client(
+            "http://testserver",
+            transport=httpx.MockTransport(lambda _: httpx.Response(500)),
+        )
+    )
+
+    with pytest.raises(ApiServiceError):
+        await service.get_statistics("s1")
+    with pytest.raises(ApiServiceError):
+        await service.get_agent_info()
+    with pytest.raises(ApiServiceError):
+        [line async for line in service.add_document("doc.txt", DOCUMENT, "s1")]
+    with pytest.raises(ApiServiceError):
+        [token async for token in service.query_stream("When?", "s1")]
+    with pytest.raises(ApiServiceError):
+        await service.prefetch_context("When?", "s1")
+    with pytest.raises(ApiServiceError):
+        await service.empty_database("s1")
+
+
+async def test_http_api_service__skips_timing_events():
+    service = HttpApiService(
+        create_http_client(
+            "http://testserver",
+            transport=httpx.MockTransport(
+                lambda _: httpx.Response(
+                    200,
+                    headers={"content-type": "text/event-stream"},
+                    content=(
+                        b'event: timing\ndata: {"stage": "retrieval"}\n\n'
+                        b'data: "Hello"\n\n'
+                    ),
+                )
+            ),
+        )
+    )
+
+    assert [token async for token in service.query_stream("Hi", "s1")] == ["Hello"]
+
+
+async def test_http_api_service__keeps_events_that_are_not_json():
+    service = HttpApiService(
+        create_http_client(
+            "http://testserver",
+            transport=httpx.MockTransport(
+                lambda _: httpx.Response(
+                    200,
+                    headers={"content-type": "text/event-stream"},
+                    content=b'data: "Hello"\n\ndata: world\n\n',
+                )
+            ),
+        )
+    )
+
+    assert [token async for token in service.query_stream("Hi", "s1")] == [
+        "Hello",
+        "world",
+    ]
+
+
+async def test_http_api_service__reuses_one_client_without_storing_cookies():
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={"message": "Database emptied successfully"},
+            headers={"set-cookie": "SESSION=minted-by-the-api; Path=/"},
+        )
+
+    client = create_http_client(
+        "http://testserver", transport=httpx.MockTransport(handler)
+    )
+    service = HttpApiService(client)
+
+    await service.empty_database("s1")
+    await service.empty_database("s2")
+
+    assert [request.headers["cookie"] for request in requests] == [
+        "SESSION=s1",
+        "SESSION=s2",
+    ]
+    assert not client.cookies
+    assert not client.is_closed
+    await service.aclose()
+    assert client.is_closed
+
+
+async def test_in_process_api_service__has_nothing_to_close(
+    fake_database_manager, fake_agent
+):
+    await InProcessApiService(fake_database_manager, fake_agent).aclose()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_http_api_service__caches_agent_info_then_revalidates_it(api_app):
+    statuses: list[int] = []
+    transport = httpx.ASGITransport(api_app)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        response = await transport.handle_async_request(request)
+        statuses.append(response.status_code)
+        return response
+
+    clock = FakeClock()
+    service = HttpApiService(
+        create_http_client("http://testserver", transport=httpx.MockTransport(handler)),
+        clock=clock,
+    )
+
+    first = await service.get_agent_info()
+    clock.now = 299
+    assert await service.get_agent_info() == first
+    assert statuses == [200]
+
+    clock.now = 301
+    assert await service.get_agent_info() == first
+    assert statuses == [200, 304]
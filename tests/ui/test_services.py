@@ -5,7 +5,7 @@ from datetime import datetime
 import pytest
 
 from app.ui.services.activity import ActivityService
-from app.ui.services.chat import WELCOME_MESSAGE, ChatService, Message
+from app.ui.services.chat import WELCOME_MESSAGE, ChatService, Message, TokenBuffer
 
 
 class TestChatService:
@@ -100,6 +100,164 @@ class TestChatService:
 
         assert timestamp == "10:30 AM"  # Based on fixed_time fixture
 
+    def test_add_message_appends_to_stored_list_in_place(self, chat_service, storage):
+        """Should append one dict without rewriting the stored list."""
+        chat_service.get_or_create_history()
+        stored = storage["chat_history"]
+
+        chat_service.add_user_message("Hello")
+
+        assert storage["chat_history"] is stored
+        assert stored[-1] == {
+            "role": "user",
+            "content": "Hello",
+            "timestamp": "10:30 AM",
+        }
+
+    def test_add_message_without_history_creates_it(self, chat_service, storage):
+        """Should create the stored list on the first message."""
+        chat_service.add_user_message("Hello")
+
+        assert len(storage["chat_history"]) == 1
+
+    def test_iter_history_deserializes_lazily(self, chat_service, storage):
+        """Should not read stored messages before they are iterated."""
+        storage["chat_history"] = [
+            {"role": "user", "content": "First", "timestamp": "10:00"},
+            {"bad": "message"},
+        ]
+
+        history = chat_service.iter_history()
+
+        assert next(history).content == "First"
+        with pytest.raises(KeyError):
+            next(history)
+
+    def test_history_is_kept_whole_by_default(self, chat_service):
+        """Should never drop messages without a window."""
+        for index in range(300):
+            chat_service.add_user_message(f"Message {index}")
+
+        history = chat_service.get_history()
+
+        assert len(history) == 300
+        assert history[0].content == "Message 0"
+
+    def test_history_is_trimmed_to_the_window(self, storage, fixed_time):
+        """Should drop the oldest messages once the window is full."""
+        service = ChatService(storage, lambda: fixed_time, max_messages=4)
+
+        for index in range(5):
+            service.add_user_message(f"Message {index}")
+
+        assert [msg.content for msg in service.get_history()[1:]] == [
+            "Message 2",
+            "Message 3",
+            "Message 4",
+        ]
+
+    def test_trimmed_messages_are_reported(self, storage, fixed_time):
+        """Should tell how many messages were dropped without a summarizer."""
+        service = ChatService(storage, lambda: fixed_time, max_messages=4)
+
+        for index in range(7):
+            service.add_user_message(f"Message {index}")
+
+        assert service.get_history()[0] == Message(
+            "summary",
+            "4 older messages were removed from this conversation.",
+            "10:30 AM",
+        )
+
+    def test_trimmed_messages_are_summarized(self, storage, fixed_time):
+        """Should fold the dropped messages into the previous summary."""
+        summarized = []
+
+        def summarizer(messages: list[Message]) -> str:
+            summarized.append([msg.content for msg in messages])
+            return f"Summary of {len(messages)}"
+
+        service = ChatService(storage, lambda: fixed_time, 4, summarizer)
+        for index in range(7):
+            service.add_user_message(f"Message {index}")
+
+        history = service.get_history()
+
+        assert summarized == [
+            ["Message 0", "Message 1"],
+            ["Summary of 2", "Message 2", "Message 3"],
+        ]
+        assert history[0] == Message("summary", "Summary of 3", "10:30 AM")
+        assert [msg.content for msg in history[1:]] == [
+            "Message 4",
+            "Message 5",
+            "Message 6",
+        ]
+
+    def test_clear_history_removes_summary(self, storage, fixed_time):
+        """Should forget the summary of the old messages."""
+        service = ChatService(storage, lambda: fixed_time, 2)
+        for index in range(3):
+            service.add_user_message(f"Message {index}")
+
+        history = service.clear_history()
+
+        assert "chat_summary" not in storage
+        assert "chat_dropped" not in storage
+        assert [msg.content for msg in history] == [WELCOME_MESSAGE]
+
+    def test_get_history_page_returns_last_messages(self, chat_service, storage):
+        """Should return the newest page and tell that older messages remain."""
+        storage["chat_history"] = [
+            {"role": "user", "content": f"Message {index}", "timestamp": ""}
+            for index in range(5)
+        ]
+
+        messages, has_older = chat_service.get_history_page(2)
+
+        assert [msg.content for msg in messages] == ["Message 3", "Message 4"]
+        assert has_older
+
+    def test_get_history_page_skips_rendered_messages(self, chat_service, storage):
+        """Should return the page preceding the skipped messages."""
+        storage["chat_history"] = [
+            {"role": "user", "content": f"Message {index}", "timestamp": ""}
+            for index in range(5)
+        ]
+
+        messages, has_older = chat_service.get_history_page(4, skip=2)
+
+        assert [msg.content for msg in messages] == [
+            "Message 0",
+            "Message 1",
+            "Message 2",
+        ]
+        assert not has_older
+
+    def test_get_history_page_of_empty_history(self, chat_service):
+        """Should return no message when there is no history."""
+        assert chat_service.get_history_page(10) == ([], False)
+
+    def test_get_history_page_ends_with_summary(self, storage, fixed_time):
+        """Should return the summary as the oldest message of the history."""
+        service = ChatService(storage, lambda: fixed_time, 4, lambda _: "Summary")
+        for index in range(5):
+            service.add_user_message(f"Message {index}")
+
+        newest, has_older = service.get_history_page(2)
+        oldest, has_more = service.get_history_page(2, skip=2)
+
+        assert [msg.content for msg in newest] == ["Message 3", "Message 4"]
+        assert has_older
+        assert [msg.content for msg in oldest] == ["Summary", "Message 2"]
+        assert not has_more
+        assert service.get_history_page(2, skip=4) == ([], False)
+
+    def test_window_too_small_raises(self, storage):
+        """Should reject a window that would keep no message."""
+        with pytest.raises(ValueError, match="max_messages"):
+            ChatService(storage, max_messages=1)
+
 
 class TestMessage:
     """Tests for the Message dataclass."""
@@ -131,6 +289,32 @@ class TestMessage:
         assert msg.timestamp == ""
 
 
+class TestTokenBuffer:
+    """Tests for the TokenBuffer class."""
+
+    def test_flush_returns_text_since_previous_flush(self):
+        """Should return only the tokens added since the previous flush."""
+        buffer = TokenBuffer()
+        buffer.add("Hello")
+        buffer.add(", ")
+
+        first = buffer.flush()
+        buffer.add("world")
+
+        assert first == "Hello, "
+        assert buffer.flush() == "world"
+        assert buffer.flush() == ""
+
+    def test_text_joins_all_tokens(self):
+        """Should return the whole text, flushed or not."""
+        buffer = TokenBuffer()
+        buffer.add("Hello")
+        buffer.flush()
+        buffer.add(" world")
+
+        assert buffer.text == "Hello world"
+
+
 class TestActivityService:
     """Tests for the ActivityService class."""
 
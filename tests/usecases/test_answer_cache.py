@@ -0,0 +1,52 @@
+from app.agents import FakeAgent
+from app.usecases.answer_cache import AnswerCache, split_into_tokens
+
+
+def test_split_into_tokens__keeps_every_character():
+    answer = " Hello  world,\nhow are you? "
+
+    tokens = split_into_tokens(answer)
+
+    assert tokens == [" ", "Hello  ", "world,\n", "how ", "are ", "you? "]
+    assert "".join(tokens) == answer
+
+
+def test_split_into_tokens__returns_nothing_for_empty_answer():
+    assert split_into_tokens("") == []
+
+
+def test_answer_cache__returns_stored_answer(fake_agent):
+    cache = AnswerCache()
+    cache.set(fake_agent, "question", "context", "answer")
+
+    assert cache.get(fake_agent, "question", "context") == "answer"
+
+
+def test_answer_cache__misses_when_context_changes(fake_agent):
+    cache = AnswerCache()
+    cache.set(fake_agent, "question", "context", "answer")
+
+    assert cache.get(fake_agent, "question", "new context") is None
+
+
+def test_answer_cache__misses_when_model_or_prompt_changes(fake_agent):
+    cache = AnswerCache()
+    cache.set(fake_agent, "question", "context", "answer")
+
+    other_model = FakeAgent()
+    other_model.model_name = "other"
+    other_prompt = FakeAgent()
+    other_prompt.prompt_template = "Answer {question} with {context}"
+
+    assert cache.get(other_model, "question", "context") is None
+    assert cache.get(other_prompt, "question", "context") is None
+
+
+def test_answer_cache__expires_answers(fake_agent):
+    now = 0.0
+    cache = AnswerCache(ttl=60, clock=lambda: now)
+    cache.set(fake_agent, "question", "context", "answer")
+
+    now = 61.0
+
+    assert cache.get(fake_agent, "question", "context") is None
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from app.databases import FakeDatabaseManager
+from app.usecases.prefetch import ContextPrefetcher
+
+
+class CountingDatabase(FakeDatabaseManager):
+    def __init__(self, failures: int = 0):
+        super().__init__()
+        self.retrievals = 0
+        self.failures = failures
+
+    async def get_context(self, question: str, cookie: str | None = None) -> str:
+        self.retrievals += 1
+        await asyncio.sleep(0)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("retrieval failed")
+        return f"{cookie}: {question}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_retrieve__takes_the_prefetched_retrieval():
+    db = CountingDatabase()
+    prefetcher = ContextPrefetcher()
+
+    prefetcher.prefetch(db, "question", "session")
+    prefetcher.prefetch(db, "question", "session")
+    context = await prefetcher.retrieve(db, "question", "session")
+
+    assert context == "session: question"
+    assert db.retrievals == 1
+
+
+async def test_retrieve__hands_out_a_prefetched_retrieval_once():
+    db = CountingDatabase()
+    prefetcher = ContextPrefetcher()
+    prefetcher.prefetch(db, "question", "session")
+
+    await prefetcher.retrieve(db, "question", "session")
+    await prefetcher.retrieve(db, "question", "session")
+
+    assert db.retrievals == 2
+
+
+async def test_retrieve__starts_retrieval_for_other_sessions_and_questions():
+    db = CountingDatabase()
+    prefetcher = ContextPrefetcher()
+    prefetcher.prefetch(db, "question", "session")
+
+    other_session = await prefetcher.retrieve(db, "question", "other")
+    other_question = await prefetcher.retrieve(db, "other", "session")
+
+    assert (other_session, other_question) == ("other: question", "session: other")
+    assert db.retrievals == 3
+
+
+async def test_retrieve__ignores_expired_retrieval():
+    db = CountingDatabase()
+    clock = FakeClock()
+    prefetcher = ContextPrefetcher(ttl=30.0, clock=clock)
+    prefetcher.prefetch(db, "question", "session")
+
+    clock.now = 31.0
+    await prefetcher.retrieve(db, "question", "session")
+
+    assert db.retrievals == 2
+
+
+async def test_retrieve__retries_failed_retrieval():
+    db = CountingDatabase(failures=1)
+    prefetcher = ContextPrefetcher()
+    prefetcher.prefetch(db, "question", "session")
+    await asyncio.sleep(0.01)
+
+    context = await prefetcher.retrieve(db, "question", "session")
+
+    assert context == "session: question"
+    assert db.retrievals == 2
+
+
+async def test_prefetch__restarts_failed_retrieval():
+    db = CountingDatabase(failures=1)
+    prefetcher = ContextPrefetcher(min_interval=0.0)
+    prefetcher.prefetch(db, "question", "session")
+    await asyncio.sleep(0.01)
+
+    prefetcher.prefetch(db, "question", "session")
+    await asyncio.sleep(0.01)
+
+    assert db.retrievals == 2
+    assert await prefetcher.retrieve(db, "question", "session") == "session: question"
+    assert db.retrievals == 2
+
+
+async def test_prefetch__is_throttled_per_session():
+    db = CountingDatabase()
+    clock = FakeClock()
+    prefetcher = ContextPrefetcher(clock=clock, min_interval=1.0)
+    prefetcher.prefetch(db, "first", "session")
+
+    clock.now = 0.5
+    prefetcher.prefetch(db, "second", "session")
+    prefetcher.prefetch(db, "first", "other")
+    clock.now = 1.0
+    prefetcher.prefetch(db, "third", "session")
+    await asyncio.sleep(0)
+
+    assert db.retrievals == 3
+    await prefetcher.retrieve(db, "second", "session")
+    assert db.retrievals == 4
+
+
+async def test_prefetch__does_nothing_when_disabled():
+    db = CountingDatabase()
+    prefetcher = ContextPrefetcher(enabled=False)
+
+    prefetcher.prefetch(db, "question", "session")
+    await asyncio.sleep(0)
+
+    assert db.retrievals == 0
+    assert await prefetcher.retrieve(db, "question", "session") == "session: question"
+
+
+async def test_retrieve__propagates_error_of_retrieval_started_now():
+    db = CountingDatabase(failures=1)
+    prefetcher = ContextPrefetcher()
+
+    with pytest.raises(RuntimeError, match="retrieval failed"):
+        await prefetcher.retrieve(db, "question", "session")
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.databases import FakeDatabaseManager
+from app.databases.session_store import InMemorySessionStore
+from app.sessions import SessionRegistry
+from app.usecases.sessions import reap_expired_sessions, run_session_reaper
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def registry(clock) -> SessionRegistry:
+    return SessionRegistry(InMemorySessionStore(), ttl=10, clock=clock)
+
+
+async def test_reap_expired_sessions__deletes_expired_sessions_only(
+    fake_database_manager: FakeDatabaseManager, registry, clock
+):
+    for session in ["old-1", "old-2", "old-3"]:
+        fake_database_manager.db[session].append(f"chunk of {session}")
+        await registry.add(session)
+    clock.now = 5
+    fake_database_manager.db["active"].append("chunk of active")
+    await registry.add("active")
+
+    clock.now = 11
+    reaped = await reap_expired_sessions(fake_database_manager, registry, 2)
+
+    assert reaped == 3
+    assert fake_database_manager.get_sessions() == {"active"}
+    assert await registry.contains("active")
+
+
+async def test_run_session_reaper__reaps_periodically_skipping_failures(
+    fake_database_manager: FakeDatabaseManager, registry, clock, monkeypatch
+):
+    fake_database_manager.db["old"].append("chunk")
+    await registry.update(["broken", "old"])
+    clock.now = 11
+    calls = []
+    original_empty_database = fake_database_manager.empty_database
+
+    def empty_database(cookie=None):
+        calls.append(cookie)
+        if cookie == "broken":
+            raise RuntimeError("database unavailable")
+        original_empty_database(cookie)
+
+    monkeypatch.setattr(fake_database_manager, "empty_database", empty_database)
+
+    reaper = asyncio.create_task(
+        run_session_reaper(fake_database_manager, registry, interval=0.01)
+    )
+    while "old" not in calls:
+        await asyncio.sleep(0.01)
+    reaper.cancel()
+
+    assert calls == ["broken", "old"]
+    assert fake_database_manager.get_sessions() == set()
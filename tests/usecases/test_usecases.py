@@ -3,10 +3,14 @@ from unittest.mock import patch
 
 from app.ports.errors import EmbeddingAPILimitError
 from app.usecases import (
+    Timing,
     add_content_into_db,
+    add_stream_into_db,
+    decode_utf8,
     query_agent,
-    query_agent_with_stream_response,
+    stream_answer,
 )
+from app.usecases.answer_cache import AnswerCache
 from tests.conftest import data_location
 
 
@@ -19,7 +23,7 @@ async def test_load_initial_documents__load_chunks_from_file_in_folder(
 
     assert len(chunks) == 18
     expected_content_chunk = (
-        "Little Steps Baby Shop\nCustomer Q&A (Short Version)\n"
+        "Little Steps Baby Shop - Customer Q&A (Short Version)\n"
         + "Format: .txt\nLast updated: June 2025\n"
         + "1. Products and Safety"
     )
@@ -67,12 +71,17 @@ Third chunk starts here with more content.
     assert len(chunks) > 0
 
 
+async def stream_tokens(db, agent, question, answer_cache=None) -> list[str]:
+    """Tokens of the answer streamed by ``stream_answer``, without the timings."""
+    stream = stream_answer(agent, question, db.get_context(question), answer_cache)
+    assert isinstance(stream, AsyncGenerator)
+    return [token async for token in stream if isinstance(token, str)]
+
+
 async def test_usecase__can_stream_from_fake_agent(fake_database_manager, fake_agent):
-    streaming_response_generator = query_agent_with_stream_response(
+    response = await stream_tokens(
         fake_database_manager, fake_agent, "What time is it?"
     )
-    assert isinstance(streaming_response_generator, AsyncGenerator)
-    response = [chunk async for chunk in streaming_response_generator]
     assert len(response) == 25
     assert response[0] == "You "
 
@@ -80,11 +89,9 @@ async def test_usecase__can_stream_from_fake_agent(fake_database_manager, fake_a
 async def test_usecase__can_stream_from_cohere_agent(
     chroma_database_manager, cohere_agent
 ):
-    streaming_response_generator = query_agent_with_stream_response(
+    response = await stream_tokens(
         chroma_database_manager, cohere_agent, "What time is it?"
     )
-    assert isinstance(streaming_response_generator, AsyncGenerator)
-    response = [chunk async for chunk in streaming_response_generator]
     assert len(response) > 20
 
 
@@ -111,7 +118,9 @@ Third chunk starts here with more content.
         yield 25.0  # First chunk progress
 
         # Simulate API limit error during second chunk
-        raise EmbeddingAPILimitError(content="API limit exceeded", chunks_uploaded=1)
+        raise EmbeddingAPILimitError(
+            content="API limit exceeded", chunks_uploaded=1, chunks_total=3
+        )
 
     # Patch the fake_database method
     with patch.object(
@@ -127,7 +136,9 @@ Third chunk starts here with more content.
         # Verify we got progress update followed by API limit signal
         assert len(responses) == 2
         assert responses[0] == "25.0"  # Progress update
-        assert responses[1] == "API_LIMIT_EXCEEDED"  # Error signal
+        assert (
+            responses[1] == "API_LIMIT_EXCEEDED:1/3"
+        )  # Error signal and resume cursor
 
 
 async def test_add_content_into_db__handles_api_limit_error_on_first_chunk(
@@ -139,7 +150,9 @@ async def test_add_content_into_db__handles_api_limit_error_on_first_chunk(
     async def mock_add_text_immediate_failure(text: str, cookie: str | None = None):
         # Simulate API limit error before any chunks are uploaded
         _, _ = text, cookie
-        raise EmbeddingAPILimitError(content="API limit exceeded", chunks_uploaded=0)
+        raise EmbeddingAPILimitError(
+            content="API limit exceeded", chunks_uploaded=0, chunks_total=1
+        )
         yield  # Necessary for async for syntax
 
     # Patch the fake_database method
@@ -155,7 +168,60 @@ async def test_add_content_into_db__handles_api_limit_error_on_first_chunk(
 
         # Verify we only got the API limit signal with no progress updates
         assert len(responses) == 1
-        assert responses[0] == "API_LIMIT_EXCEEDED"
+        assert responses[0] == "API_LIMIT_EXCEEDED:0/1"
+
+
+async def _blocks(content: bytes, size: int):
+    for start in range(0, len(content), size):
+        yield content[start : start + size]
+
+
+async def test_decode_utf8__decodes_characters_spanning_blocks():
+    content = "caffè ☕ e brioche 🥐".encode()
+
+    pieces = [piece async for piece in decode_utf8(_blocks(content, 1))]
+
+    assert "".join(pieces) == "caffè ☕ e brioche 🥐"
+
+
+async def test_add_stream_into_db__streams_progress_updates(fake_database_manager):
+    content = "\n".join(f"line {i} " + "x" * 80 for i in range(20)).encode()
+
+    progress_updates = [
+        float(progress_str)
+        async for progress_str in add_stream_into_db(
+            fake_database_manager, _blocks(content, 256), len(content)
+        )
+    ]
+
+    assert len(progress_updates) > 1
+    assert progress_updates == sorted(progress_updates)
+    assert progress_updates[-1] == 100.0
+    assert fake_database_manager.get_chunks() == (
+        fake_database_manager.text_splitter.split_text(content.decode())
+    )
+
+
+async def test_add_stream_into_db__handles_api_limit_error(fake_database_manager):
+    async def mock_add_text_stream_with_api_limit(pieces, cookie: str | None = None):
+        _ = cookie
+        async for _ in pieces:
+            yield 1
+        raise EmbeddingAPILimitError(content="API limit exceeded", chunks_uploaded=1)
+
+    with patch.object(
+        fake_database_manager,
+        "add_text_stream_to_db",
+        side_effect=mock_add_text_stream_with_api_limit,
+    ):
+        responses = [
+            response.strip()
+            async for response in add_stream_into_db(
+                fake_database_manager, _blocks(b"first\nsecond", 6), 12
+            )
+        ]
+
+    assert responses == ["50.0", "API_LIMIT_EXCEEDED:1"]
 
 
 async def test_query_agent__returns_answer_from_fake_agent(
@@ -197,3 +263,92 @@ async def test_query_agent__works_with_cohere_agent(
 
     assert isinstance(answer, str)
     assert len(answer) > 0
+
+
+async def test_query_agent__returns_cached_answer_for_same_context(
+    fake_database_manager, fake_agent
+):
+    answer_cache = AnswerCache()
+    question = "What time is it?"
+    answer_cache.set(fake_agent, question, "", "It is noon.")
+
+    answer = await query_agent(
+        fake_database_manager, fake_agent, question, answer_cache=answer_cache
+    )
+
+    assert answer == "It is noon."
+
+
+async def test_query_agent__stores_answer_in_cache(fake_database_manager, fake_agent):
+    answer_cache = AnswerCache()
+    question = "What time is it?"
+
+    answer = await query_agent(
+        fake_database_manager, fake_agent, question, answer_cache=answer_cache
+    )
+
+    assert answer_cache.get(fake_agent, question, "") == answer
+
+
+async def test_usecase__replays_cached_answer_as_a_stream(
+    fake_database_manager, fake_agent
+):
+    answer_cache = AnswerCache()
+    question = "What time is it?"
+
+    first = await stream_tokens(
+        fake_database_manager, fake_agent, question, answer_cache
+    )
+    with patch.object(fake_agent, "get_stream_response") as get_stream_response:
+        second = await stream_tokens(
+            fake_database_manager, fake_agent, question, answer_cache
+        )
+
+    get_stream_response.assert_not_called()
+    assert len(second) > 1
+    assert "".join(second) == "".join(first)
+
+
+class StepClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += 1.0
+        return self.now
+
+
+async def _context(text: str) -> str:
+    return text
+
+
+async def test_stream_answer__yields_timings_before_tokens(fake_agent):
+    stream = [
+        item
+        async for item in stream_answer(
+            fake_agent, "What time is it?", _context(""), clock=StepClock()
+        )
+    ]
+
+    assert stream[:2] == [Timing("retrieval", 1.0), Timing("first_token", 2.0)]
+    assert all(isinstance(token, str) for token in stream[2:])
+    assert stream[2] == "You "
+
+
+async def test_stream_answer__times_the_replay_of_a_cached_answer(fake_agent):
+    answer_cache = AnswerCache()
+    answer_cache.set(fake_agent, "question", "context", "Cached answer")
+
+    stream = [
+        item
+        async for item in stream_answer(
+            fake_agent, "question", _context("context"), answer_cache, StepClock()
+        )
+    ]
+
+    assert stream == [
+        Timing("retrieval", 1.0),
+        Timing("first_token", 2.0),
+        "Cached ",
+        "answer",
+    ]